@@ -11,8 +11,15 @@ from aiogram.enums import ChatType
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums.parse_mode import ParseMode
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from data.config import BACKUP_HOUR, BOT_MODE, DB_ENGINE, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_URL
+from tasks.backup import scheduled_backup
 from tasks.cleanup import delete_old_schedules
+from tasks.prewarm import prewarm_schedules
+from services.user_stats import rollup_daily_stats
 from tasks.reminder import send_daily_reminders
+from utils.fsm_storage import purge_expired_states
+from utils.i18n import load_catalogs
+from keyboards.inline.menu import prebuild_keyboards
 
 
 def setup_handlers(dispatcher: Dispatcher) -> None:
@@ -24,10 +31,16 @@ def setup_handlers(dispatcher: Dispatcher) -> None:
 
 def setup_middlewares(dispatcher: Dispatcher, bot: Bot) -> None:
     """MIDDLEWARE"""
-    from middlewares.throttling import ThrottlingMiddleware
+    from loader import throttling
+    from middlewares.user_context import UserMiddleware
 
-    # Spamdan himoya qilish uchun klassik ichki o'rta dastur. So'rovlar orasidagi asosiy vaqtlar 0,5 soniya
-    dispatcher.message.middleware(ThrottlingMiddleware(slow_mode_delay=0.5))
+    # Spamdan himoya: foydalanuvchi bo'yicha token bucket, xabar va callback'lar uchun umumiy.
+    # Og'ir handler'lar flags={"throttling_cost": N} bilan ko'proq token sarflaydi
+    dispatcher.message.middleware(throttling)
+    dispatcher.callback_query.middleware(throttling)
+
+    # Bazadagi foydalanuvchi (guruhi bilan) har bir update uchun bir marta, keshdan
+    dispatcher.update.outer_middleware(UserMiddleware())
 
 
 def setup_filters(dispatcher: Dispatcher) -> None:
@@ -48,24 +61,50 @@ async def setup_aiogram(dispatcher: Dispatcher, bot: Bot) -> None:
 
 
 async def database_connected():
-    # Tortoise ORM bilan SQLite bazasini yaratamiz:
-    from utils.db.tortoise import init_db
+    # Tortoise ORM bilan bazani (SQLite yoki DB_ENGINE=postgres) ulaymiz:
+    from utils.db.tortoise import describe_connection, init_db
+    from services.week_calendar import week_calendar
     await init_db()
-    logger.info("Tortoise ORM with SQLite initialized")
+    await week_calendar.load()
+    logger.info(f"Tortoise ORM initialized: {describe_connection()}")
 
 
 async def aiogram_on_startup_polling(dispatcher: Dispatcher, bot: Bot) -> None:
     from utils.set_bot_commands import set_default_commands
     from utils.notify_admins import on_startup_notify
 
+    # Tarjimalar kompilyatsiya qilinadi — to'liq bo'lmasa bot shu yerda to'xtaydi
+    load_catalogs()
+    prebuild_keyboards()
+
     logger.info("Database connected")
     await database_connected()
 
-    logger.info("Starting polling")
-    await bot.delete_webhook(drop_pending_updates=True)
     await setup_aiogram(bot=bot, dispatcher=dispatcher)
+
+    # Restart paytida kelgan update'lar tashlanmaydi (drop_pending_updates=False)
+    if BOT_MODE == "webhook":
+        logger.info("Setting webhook")
+        await bot.set_webhook(
+            WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET or None,
+            allowed_updates=dispatcher.resolve_used_update_types(),
+            drop_pending_updates=False,
+        )
+    else:
+        logger.info("Starting polling")
+        await bot.delete_webhook(drop_pending_updates=False)
     await on_startup_notify(bot=bot)
     await set_default_commands(bot=bot)
+
+    # ukiu.uz sahifalari fonda keshga yuklanadi (diskdagi nusxa darhol ishlatiladi)
+    from utils.ukiu_scraper import scraper
+    scraper.start_prefetch()
+
+    # Restartdan oldin tugallanmagan reklamalar davom ettiriladi
+    from services.broadcast import resume_broadcasts
+    await resume_broadcasts()
+
     logger.info("Scheduler ishga tushdi...")
     scheduler = AsyncIOScheduler(timezone="Asia/Tashkent")
  
@@ -78,6 +117,55 @@ async def aiogram_on_startup_polling(dispatcher: Dispatcher, bot: Bot) -> None:
         id="cleanup_old_schedules",
         replace_existing=True,
     )
+
+    # Har kuni BACKUP_HOUR da — bazaning siqilgan onlayn backupi (retention bilan)
+    if DB_ENGINE == "sqlite":
+        scheduler.add_job(
+            scheduled_backup,
+            trigger="cron",
+            hour=BACKUP_HOUR,
+            minute=0,
+            id="database_backup",
+            replace_existing=True,
+        )
+
+    # Har soatda — tashlab ketilgan (eskirgan) FSM holatlari o'chiriladi
+    scheduler.add_job(
+        purge_expired_states,
+        trigger="cron",
+        minute=15,
+        id="purge_fsm_states",
+        replace_existing=True,
+    )
+
+    # Har 30 daqiqada — eskirgan ukiu.uz sahifalari yangilanadi (304 bo'lsa qayta yuklanmaydi)
+    scheduler.add_job(
+        scraper.prefetch,
+        trigger="interval",
+        minutes=30,
+        id="ukiu_prefetch",
+        replace_existing=True,
+    )
+
+    # Har kuni 00:05 — kechagi kun statistikasi (DailyStats)
+    scheduler.add_job(
+        rollup_daily_stats,
+        trigger="cron",
+        hour=0,
+        minute=5,
+        id="daily_stats_rollup",
+        replace_existing=True,
+    )
+
+    # Har kuni 05:00 — guruhlar jadvali (joriy + keyingi hafta) oldindan yuklanadi
+    scheduler.add_job(
+        prewarm_schedules,
+        trigger="cron",
+        hour=5,
+        minute=0,
+        id="prewarm_schedules",
+        replace_existing=True,
+    )
  
 
     # Har kuni 20:00 — eslatma yuboriladi
@@ -98,25 +186,35 @@ async def aiogram_on_shutdown_polling(dispatcher: Dispatcher, bot: Bot):
     logger.info("Stopping polling")
     from utils.db.tortoise import close_db
     from utils.ukiu_scraper import scraper
-    
+    from services.hemis_service import close_connector
+    from services.hemis_session_pool import hemis_sessions
+    from services.broadcast import stop_workers
+    from utils.db.write_queue import write_queue
+
+    await stop_workers()
+    await write_queue.stop()
     await close_db()
     await scraper.close()
+    await hemis_sessions.close()
+    await close_connector()
     await bot.session.close()
     await dispatcher.storage.close()
 
 
 def main():
     """CONFIG"""
-    from data.config import BOT_TOKEN
-    from aiogram.enums import ParseMode
-    from aiogram.fsm.storage.memory import MemoryStorage
-
-    bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-    storage = MemoryStorage()
-    dispatcher = Dispatcher(storage=storage)
+    # Handler'lar ham loader.bot dan foydalanadi — bitta bot, bitta chiquvchi limit
+    from loader import bot, dispatcher
 
     dispatcher.startup.register(aiogram_on_startup_polling)
     dispatcher.shutdown.register(aiogram_on_shutdown_polling)
+
+    if BOT_MODE == "webhook":
+        from utils.webhook import run_webhook
+
+        run_webhook(dispatcher, bot)
+        return
+
     asyncio.run(dispatcher.start_polling(bot, close_bot_session=True))
     # allowed_updates=['message', 'chat_member']
 
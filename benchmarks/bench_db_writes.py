@@ -0,0 +1,105 @@
+"""SQLite yozish benchmarki: standart sozlamalar vs ishlash profili vs yozuvlar navbati.
+
+Ishga tushirish (loyiha ildizidan):
+
+    python benchmarks/bench_db_writes.py --users 2000 --writers 200 --ops 10
+
+``--writers`` ta parallel "handler" har biri ``--ops`` marta kichik yozuv qiladi
+(eslatmani yoqish/o'chirish, foydalanuvchi ma'lumotini yangilash).
+Natija: o'tkazuvchanlik (yozuv/s) va yozuv kechikishi p50/p99 (ms).
+
+- default — Tortoise standart sozlamalari (synchronous=FULL);
+- profile — ``sqlite_pragmas()`` (synchronous=NORMAL, mmap, cache, busy_timeout);
+- profile+queue — profil + ``WriteQueue`` (yozuvlar guruhlangan tranzaksiyalarda).
+
+Har bir rejim uchun yangi vaqtinchalik SQLite fayl ishlatiladi.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tortoise import Tortoise  # noqa: E402
+
+MODELS = ["models.user", "models.group"]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run(label, db_url, args, use_queue):
+    from models.user import User
+    from utils.db.write_queue import WriteQueue
+
+    await Tortoise.init(db_url=db_url, modules={"models": MODELS})
+    await Tortoise.generate_schemas()
+    await User.bulk_create(
+        [User(telegram_id=1_000_000 + i, full_name=f"User {i}") for i in range(args.users)]
+    )
+    users = await User.all()
+    queue = WriteQueue() if use_queue else None
+    latencies = []
+
+    async def write(user):
+        if random.random() < 0.5:
+            user.reminder_enabled = not user.reminder_enabled
+            fn = lambda: user.save(update_fields=["reminder_enabled"])  # noqa: E731
+        else:
+            user.full_name = f"User {random.randint(0, 10**6)}"
+            fn = lambda: user.save(update_fields=["full_name"])  # noqa: E731
+
+        started = time.perf_counter()
+        if queue:
+            await queue.submit(fn)
+        else:
+            await fn()
+        latencies.append(time.perf_counter() - started)
+
+    async def writer():
+        for _ in range(args.ops):
+            await write(random.choice(users))
+            await asyncio.sleep(random.random() * 0.002)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer() for _ in range(args.writers)))
+    elapsed = time.perf_counter() - started
+
+    if queue:
+        await queue.stop()
+    await Tortoise.close_connections()
+
+    extra = f"  o'rtacha partiya {queue.stats()['avg_batch']}" if queue else ""
+    print(
+        f"{label:<15} {len(latencies) / elapsed:9.0f} yozuv/s  "
+        f"p50 {percentile(latencies, 0.50) * 1000:8.2f} ms  "
+        f"p99 {percentile(latencies, 0.99) * 1000:8.2f} ms{extra}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--writers", type=int, default=200)
+    parser.add_argument("--ops", type=int, default=10)
+    args = parser.parse_args()
+
+    from utils.db.tortoise import sqlite_db_url
+
+    print(f"{args.writers} parallel yozuvchi x {args.ops} yozuv, {args.users} foydalanuvchi")
+    with tempfile.TemporaryDirectory() as tmp:
+        await run("default", f"sqlite:///{os.path.join(tmp, 'default.db')}", args, use_queue=False)
+        await run("profile", sqlite_db_url(os.path.join(tmp, "profile.db")), args, use_queue=False)
+        await run("profile+queue", sqlite_db_url(os.path.join(tmp, "queue.db")), args, use_queue=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
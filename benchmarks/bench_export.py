@@ -0,0 +1,79 @@
+"""Foydalanuvchilar exporti benchmarki: eski export_to_excel vs stream_export.
+
+Ishga tushirish (loyiha ildizidan):
+
+    python benchmarks/bench_export.py --rows 100000
+
+Har bir rejim uchun vaqt, Python xotirasining eng yuqori nuqtasi (tracemalloc)
+va fayl hajmi chiqariladi. Qatorlar DB o'rniga generatorda yasaladi —
+stream rejimlari ularni 2000 tadan bo'laklab oladi.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.pgtoexcel import export_to_excel, stream_export  # noqa: E402
+
+HEADINGS = ["ID", "Telegram ID", "To'liq ism", "Username", "Telefon raqam", "Qo'shilgan vaqt"]
+WIDTHS = [8, 16, 32, 24, 18, 22]
+CHUNK = 2000
+
+
+def make_row(i: int):
+    return [i, 100000000 + i, f"Foydalanuvchi {i}", f"user_{i}", "+998901234567", "2026-03-09 12:00:00"]
+
+
+async def make_chunks(rows: int):
+    for start in range(0, rows, CHUNK):
+        yield [make_row(i) for i in range(start, min(start + CHUNK, rows))]
+        await asyncio.sleep(0)
+
+
+async def legacy(rows: int, directory: str) -> str:
+    path = os.path.join(directory, "legacy.xlsx")
+    await export_to_excel([make_row(i) for i in range(rows)], HEADINGS, path)
+    return path
+
+
+async def stream(rows: int, fmt: str) -> str:
+    path, _ = await stream_export(make_chunks(rows), HEADINGS, fmt=fmt, widths=WIDTHS)
+    return path
+
+
+async def measure(label: str, factory):
+    tracemalloc.start()
+    started = time.perf_counter()
+    path = await factory()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    size = os.path.getsize(path)
+    os.remove(path)
+    print(f"{label:<14} {elapsed:8.2f} s   peak {peak / 2**20:8.1f} MiB   fayl {size / 2**20:6.2f} MiB")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{args.rows} qator")
+    with tempfile.TemporaryDirectory() as tmp:
+        if not args.skip_legacy:
+            await measure("legacy xlsx", lambda: legacy(args.rows, tmp))
+        await measure("stream xlsx", lambda: stream(args.rows, "xlsx"))
+        await measure("stream csv.gz", lambda: stream(args.rows, "csv"))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""i18n benchmarki: eski ``get_text`` (ichma-ich dict) vs kompilyatsiya qilingan kataloglar.
+
+Ishga tushirish (loyiha ildizidan):
+
+    python benchmarks/bench_i18n.py --number 200000
+
+- get_text — bitta matn (mavjud kalit, noma'lum til, noma'lum kalit);
+- keyboards — to'liq klaviaturalar (asosiy menyu, qabul bo'limi, profil).
+
+Natija: bitta chaqiruv uchun o'rtacha vaqt (ns / µs).
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import keyboards.inline.menu as menu  # noqa: E402
+from schemas.language import LanguageEnum  # noqa: E402
+from utils import i18n  # noqa: E402
+
+
+def legacy_get_text(key, language=LanguageEnum.UZ):
+    """Oldingi implementatsiya (taqqoslash uchun)."""
+    if key in i18n.TRANSLATIONS:
+        return i18n.TRANSLATIONS[key].get(language, i18n.TRANSLATIONS[key][LanguageEnum.EN])
+    return key
+
+
+class _User:
+    hemis_login = "student"
+    reminder_enabled = True
+
+
+def render_keyboards():
+    for language in (LanguageEnum.UZ, LanguageEnum.RU, LanguageEnum.EN):
+        menu.get_main_menu_keyboard(language)
+        menu.get_admission_submenu_keyboard(language)
+        menu.get_profile_menu_keyboard(language, _User)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=200_000, help="get_text chaqiruvlari soni")
+    parser.add_argument("--renders", type=int, default=5_000, help="klaviatura renderlari soni")
+    args = parser.parse_args()
+
+    i18n.load_catalogs()
+    cases = [
+        ("welcome, ru", ("welcome", LanguageEnum.RU)),
+        ("welcome, unknown", ("welcome", LanguageEnum.UNKNOWN)),
+        ("missing key", ("no_such_key", LanguageEnum.UZ)),
+    ]
+    print("get_text (ns/chaqiruv)")
+    for label, call_args in cases:
+        results = []
+        for fn in (legacy_get_text, i18n.get_text):
+            seconds = min(timeit.repeat(lambda: fn(*call_args), number=args.number, repeat=3))
+            results.append(seconds / args.number * 1e9)
+        print(f"  {label:<18} legacy {results[0]:7.1f}  compiled {results[1]:7.1f}")
+
+    print("keyboards (µs/render, 3 til × 3 klaviatura)")
+    results = []
+    for fn in (legacy_get_text, i18n.get_text):
+        menu.get_text = fn
+        seconds = min(timeit.repeat(render_keyboards, number=args.renders, repeat=3))
+        results.append(seconds / args.renders * 1e6)
+    menu.get_text = i18n.get_text
+    print(f"  {'render':<18} legacy {results[0]:7.1f}  compiled {results[1]:7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Klaviaturalar benchmarki: har safar qurish vs memoizatsiya qilingan registry.
+
+Ishga tushirish (loyiha ildizidan):
+
+    python benchmarks/bench_keyboards.py --callbacks 20000
+
+Bitta "callback" — odatiy javobda ishlatiladigan klaviaturalar: asosiy menyu,
+jadval menyusi, hafta tugmalari va profil. Har bir rejim uchun:
+
+- CPU — bitta callback uchun o'rtacha vaqt (µs);
+- xotira — bitta callback davomida ajratilgan eng ko'p xotira (tracemalloc, KiB).
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from keyboards.inline import menu  # noqa: E402
+from utils.i18n import LANGUAGES  # noqa: E402
+
+WEEK_ID = "10850"
+
+
+class _User:
+    hemis_login = "student"
+    reminder_enabled = True
+
+
+def uncached(builder):
+    return getattr(builder, "__wrapped__", builder)
+
+
+def callback(language, build):
+    build(menu.get_main_menu_keyboard)(language)
+    build(menu.get_schedule_menu_keyboard)(language)
+    build(menu.get_week_pagination_keyboard)(language, WEEK_ID)
+    if build is uncached:
+        build(menu._get_profile_menu_keyboard)(language, True, True)
+    else:
+        menu.get_profile_menu_keyboard(language, _User)
+
+
+def measure(label, build, callbacks):
+    languages = [LANGUAGES[i % len(LANGUAGES)] for i in range(callbacks)]
+
+    started = time.perf_counter()
+    for language in languages:
+        callback(language, build)
+    cpu_us = (time.perf_counter() - started) / callbacks * 1e6
+
+    samples = min(callbacks, 2000)
+    tracemalloc.start()
+    peak_total = 0
+    for language in languages[:samples]:
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        callback(language, build)
+        peak_total += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+
+    print(f"{label:<10} {cpu_us:8.1f} µs/callback  {peak_total / samples / 1024:7.2f} KiB peak/callback")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--callbacks", type=int, default=20_000)
+    args = parser.parse_args()
+
+    menu.prebuild_keyboards()
+    # Birinchi chaqiruvlar (import, kesh to'ldirish) o'lchovga kirmasin
+    for language in LANGUAGES:
+        callback(language, uncached)
+        callback(language, lambda builder: builder)
+
+    measure("rebuild", uncached, args.callbacks)
+    measure("memoized", lambda builder: builder, args.callbacks)
+    print(menu.keyboard_cache_stats())
+
+
+if __name__ == "__main__":
+    main()
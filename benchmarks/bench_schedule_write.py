@@ -0,0 +1,138 @@
+"""Haftalik jadvalni yozish benchmarki: eski get_or_create sikli vs save_week_schedule.
+
+Ishga tushirish (loyiha ildizidan):
+
+    python benchmarks/bench_schedule_write.py --weeks 20 --lessons 30
+
+Natija: har bir hafta uchun SQL so'rovlar soni va o'rtacha vaqt (ms) —
+birinchi yozish, o'zgarmagan yangilash (same) va bitta dars o'zgargan
+yangilash (1-diff) uchun.
+Vaqtinchalik SQLite fayl ishlatiladi — fsync xarajati ham hisobga kiradi.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tortoise import Tortoise  # noqa: E402
+
+MODELS = ["models.user", "models.group", "models.week", "models.schedule", "models.hemis_session", "models.schedule_version"]
+DAYS = ["Dushanba", "Seshanba", "Chorshanba", "Payshanba", "Juma", "Shanba"]
+
+
+class QueryCounter(logging.Handler):
+    """tortoise.db_client logger orqali bajarilgan so'rovlarni sanaydi."""
+
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+def make_lessons(n: int):
+    return [
+        {
+            "day": DAYS[i % len(DAYS)],
+            "pair_number": i // len(DAYS) + 1,
+            "subject": f"Fan {i}",
+            "teacher": f"O'qituvchi {i}",
+            "room": f"{100 + i}",
+            "lesson_type": "Ma'ruza",
+            "lesson_time": "08:30-09:50",
+        }
+        for i in range(n)
+    ]
+
+
+async def legacy_write(group, week, lessons, replace):
+    from models.schedule import Schedule
+
+    if replace:
+        await Schedule.filter(group=group, week=week).delete()
+    result = []
+    for item in lessons:
+        schedule, _ = await Schedule.get_or_create(
+            group=group,
+            week=week,
+            day=item["day"],
+            pair_number=item["pair_number"],
+            defaults={
+                "subject": item["subject"],
+                "teacher": item.get("teacher"),
+                "room": item.get("room"),
+                "lesson_type": item.get("lesson_type"),
+                "lesson_time": item.get("lesson_time"),
+            },
+        )
+        result.append(schedule)
+    return result
+
+
+async def run(label, write, weeks, lessons, counter):
+    from models.group import Group
+    from models.week import Week
+
+    group = await Group.create(name=f"BENCH-{label}")
+    week_objs = [await Week.create(week_number=100000 + len(label) * 1000 + i) for i in range(weeks)]
+
+    changed = [dict(item) for item in lessons]
+    changed[0]["room"] = "999"
+
+    runs = (
+        ("insert", lessons, False),
+        ("same", lessons, True),
+        ("1-diff", changed, True),
+    )
+    for mode, payload, replace in runs:
+        counter.count = 0
+        started = time.perf_counter()
+        for week in week_objs:
+            await write(group, week, payload, replace)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{label:<8} {mode:<8} "
+            f"{counter.count / weeks:8.1f} so'rov/hafta "
+            f"{elapsed * 1000 / weeks:8.2f} ms/hafta"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weeks", type=int, default=20)
+    parser.add_argument("--lessons", type=int, default=30)
+    args = parser.parse_args()
+
+    from services.schedule_repository import save_week_schedule
+
+    with tempfile.TemporaryDirectory() as tmp:
+        await Tortoise.init(
+            db_url=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            modules={"models": MODELS},
+        )
+        await Tortoise.generate_schemas()
+
+        counter = QueryCounter()
+        db_logger = logging.getLogger("tortoise.db_client")
+        db_logger.setLevel(logging.DEBUG)
+        db_logger.addHandler(counter)
+        db_logger.propagate = False
+
+        lessons = make_lessons(args.lessons)
+        print(f"{args.weeks} hafta x {args.lessons} dars")
+        await run("legacy", legacy_write, args.weeks, lessons, counter)
+        await run("bulk", save_week_schedule, args.weeks, lessons, counter)
+
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+"""pytest uchun umumiy sozlamalar.
+
+data/config.py import paytida BOT_TOKEN va ADMINS ni talab qiladi — testlar
+.env siz ham ishlashi uchun soxta qiymatlar beriladi. Testlar PostgreSQL ga
+faqat ``TEST_DATABASE_URL`` berilganda ulanadi (DB_ENGINE doim sqlite).
+
+pytest-asyncio ishlatilmaydi: har bir test o'z korutinasini ``asyncio.run``
+bilan ishga tushiradi, ``run_db`` esa shu korutinani in-memory SQLite bazasi
+bilan o'rab beradi.
+"""
+
+import asyncio
+import os
+
+import pytest
+
+os.environ.setdefault("BOT_TOKEN", "123456:TEST-TOKEN-aaaaaaaaaaaaaaaaaaaaaaaaaaaaa")
+os.environ.setdefault("ADMINS", "1")
+os.environ["DB_ENGINE"] = "sqlite"
+
+
+@pytest.fixture
+def run_db():
+    """``run_db(fn)`` — ``fn()`` korutinasini toza in-memory baza bilan bajaradi.
+
+    ``migrate=True`` bo'lsa sxema ``generate_schemas`` emas, production dagi
+    kabi ``apply_migrations`` bilan quriladi.
+    """
+    from tortoise import Tortoise
+
+    from utils.db.tortoise import MODELS
+
+    def run(fn, migrate=False):
+        async def wrapper():
+            await Tortoise.init(db_url="sqlite://:memory:", modules={"models": MODELS})
+            if migrate:
+                from utils.db.migrations import apply_migrations
+
+                await apply_migrations()
+            else:
+                await Tortoise.generate_schemas()
+            try:
+                return await fn()
+            finally:
+                await Tortoise.close_connections()
+
+        return asyncio.run(wrapper())
+
+    return run
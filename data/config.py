@@ -1,3 +1,5 @@
+from pathlib import Path
+
 from environs import Env
 
 # environs kutubxonasidan foydalanish
@@ -12,3 +14,64 @@ ADMINS = env.list("ADMINS")  # adminlar ro'yxati
 
 
 BACKEND_HOST = env.str("BACKEND_HOST", "http://localhost:8000")
+
+# HEMIS (student.ukiu.uz) ga chiquvchi so'rovlar limiti (token bucket)
+HEMIS_RATE = env.float("HEMIS_RATE", 0.5)  # so'rov / soniya
+HEMIS_BURST = env.int("HEMIS_BURST", 2)  # ketma-ket ruxsat etilgan so'rovlar soni
+
+# Telegram ga chiquvchi xabarlar limiti
+TELEGRAM_RATE = env.float("TELEGRAM_RATE", 25)  # umumiy, xabar / soniya
+TELEGRAM_CHAT_RATE = env.float("TELEGRAM_CHAT_RATE", 1.0)  # bitta chatga, xabar / soniya
+
+# Kiruvchi so'rovlar (xabar + callback) limiti — har bir foydalanuvchi uchun token bucket
+THROTTLE_RATE = env.float("THROTTLE_RATE", 2.0)  # token / soniya
+THROTTLE_BURST = env.int("THROTTLE_BURST", 6)
+
+# SQLite baza fayli va backup sozlamalari
+BASE_DIR = Path(__file__).resolve().parent.parent
+# Nisbiy yo'llar loyiha ildiziga nisbatan olinadi
+DB_PATH = BASE_DIR / env.path("DB_PATH", "utils/kiuf_bot.db")
+BACKUP_DIR = BASE_DIR / env.path("BACKUP_DIR", "backups")
+BACKUP_KEEP = env.int("BACKUP_KEEP", 7)  # nechta oxirgi backup saqlanadi
+BACKUP_HOUR = env.int("BACKUP_HOUR", 4)  # avtomatik backup soati (Asia/Tashkent)
+BACKUP_SEND = env.bool("BACKUP_SEND", False)  # avtomatik backupni adminlarga yuborish
+
+# Tashqi tarjima kataloglari (<til>.json yoki <til>/LC_MESSAGES/messages.mo), bo'lmasa o'tkaziladi
+I18N_DIR = BASE_DIR / env.path("I18N_DIR", "locales")
+
+# ukiu.uz sahifalari keshi: TTL dan keyin fonda yangilanadi, MAX_STALE gacha eski nusxa beriladi
+SCRAPER_CACHE_FILE = BASE_DIR / env.path("SCRAPER_CACHE_FILE", "cache/ukiu_pages.json")
+SCRAPER_TTL = env.int("SCRAPER_TTL", 6 * 60 * 60)  # soniya
+SCRAPER_MAX_STALE = env.int("SCRAPER_MAX_STALE", 7 * 24 * 60 * 60)  # soniya
+SCRAPER_RETRY_AFTER = env.int("SCRAPER_RETRY_AFTER", 60)  # muvaffaqiyatsiz so'rovdan keyin kutish, soniya
+
+# SQLite ishlash profili (PRAGMA lar har bir ulanishda qo'llanadi)
+DB_SYNCHRONOUS = env.str("DB_SYNCHRONOUS", "NORMAL")  # WAL bilan NORMAL xavfsiz va tezroq
+DB_MMAP_SIZE = env.int("DB_MMAP_SIZE", 256 * 1024 * 1024)  # bayt
+DB_CACHE_SIZE = env.int("DB_CACHE_SIZE", -64000)  # manfiy — KiB (≈64 MB)
+DB_BUSY_TIMEOUT = env.int("DB_BUSY_TIMEOUT", 5000)  # ms, "database is locked" oldidan kutish
+DB_WRITE_BATCH = env.int("DB_WRITE_BATCH", 50)  # bitta tranzaksiyadagi maksimal yozuvlar
+DB_WRITE_DELAY = env.float("DB_WRITE_DELAY", 0.005)  # soniya, partiya yig'ish oynasi
+
+# Ma'lumotlar bazasi turi: "sqlite" (standart) yoki "postgres" (bir nechta bot worker uchun)
+DB_ENGINE = env.str("DB_ENGINE", "sqlite").lower()
+DB_HOST = env.str("DB_HOST", "localhost")
+DB_PORT = env.int("DB_PORT", 5432)
+DB_USER = env.str("DB_USER", "postgres")
+DB_PASS = env.str("DB_PASS", "")
+DB_NAME = env.str("DB_NAME", "kiuf_bot")
+DB_POOL_MIN = env.int("DB_POOL_MIN", 1)  # Tortoise va asyncpg pool'lari uchun bir xil
+DB_POOL_MAX = env.int("DB_POOL_MAX", 10)
+
+# FSM (holatlar) saqlash joyi: "db" (bot bazasi), "redis" yoki "memory"
+FSM_STORAGE = env.str("FSM_STORAGE", "db").lower()
+FSM_REDIS_URL = env.str("FSM_REDIS_URL", "redis://localhost:6379/0")
+FSM_TTL = env.int("FSM_TTL", 24 * 60 * 60)  # soniya, tugallanmagan holatlar shundan keyin o'chadi
+
+# Ishga tushirish rejimi: "polling" yoki "webhook" (aiohttp server)
+BOT_MODE = env.str("BOT_MODE", "polling").lower()
+WEBHOOK_URL = env.str("WEBHOOK_URL", "")  # tashqi manzil, masalan https://bot.example.com
+WEBHOOK_PATH = env.str("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = env.str("WEBHOOK_SECRET", "")  # X-Telegram-Bot-Api-Secret-Token
+WEB_HOST = env.str("WEB_HOST", "0.0.0.0")
+WEB_PORT = env.int("PORT", 8080)  # Render PORT ni o'zi beradi
@@ -1,20 +1,30 @@
 import logging
 import asyncio
 import os
-import shutil
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
 from aiogram import Router, types, F
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.types import FSInputFile
 from loader import bot
-from keyboards.inline.buttons import are_you_sure_markup, get_admin_menu_markup, get_admin_manage_markup
+from keyboards.inline.buttons import (
+    are_you_sure_markup,
+    get_admin_menu_markup,
+    get_admin_manage_markup,
+    get_users_page_markup,
+)
 from states.test import AdminState
 from filters.admin import IsBotAdminFilter
 from data.config import ADMINS
-from utils.pgtoexcel import export_to_excel
+from utils.pgtoexcel import FORMAT_SUFFIXES, stream_export
+from utils.db.backup import backup_database as create_database_backup
+from tasks.backup import send_backup_files
 from models.user import User
+from models.broadcast import Broadcast
+from services.broadcast import start_broadcast, cancel_broadcast
+from services.user_cache import user_cache
+from services.user_stats import get_daily_history, get_user_stats, get_users_page
 
 router = Router()
 
@@ -30,6 +40,7 @@ Quyidagi buyruqlardan birini tanlang yoki menyudan foydalaning:
 • /allusers - Barcha foydalanuvchilar ro'yxati
 • /stats - Statistika
 • /reklama - Reklama yuborish
+• /reklama_stop - Reklamani to'xtatish
 • /backup - Bazani backup qilish
 • /cleandb - Bazani tozalash
 • /admins - Adminlarni boshqarish
@@ -44,42 +55,62 @@ async def admin_allusers_callback(call: types.CallbackQuery):
     await get_all_users_handler(call.message)
 
 
-async def get_all_users_handler(message: types.Message):
-    """Get all users handler"""
+async def get_all_users_handler(
+    message: types.Message,
+    after_id: int = None,
+    before_id: int = None,
+    edit: bool = False,
+):
+    """Get all users handler (keyset pagination, 20 tadan)"""
     try:
-        users = await User.all()
-        total = len(users)
+        total = await User.all().count()
         
         if total == 0:
             await message.answer("❌ Bazada foydalanuvchilar topilmadi.")
             return
         
+        users, has_prev, has_next = await get_users_page(after_id=after_id, before_id=before_id)
+        if not users:
+            await message.answer("❌ Foydalanuvchilar topilmadi.")
+            return
+        
         # Format users list
         text = f"👥 <b>BARCHA FOYDALANUVCHILAR</b>\n\n"
         text += f"📊 <b>Jami:</b> {total} ta foydalanuvchi\n\n"
         
-        # Show first 20 users
-        for idx, user in enumerate(users[:20], 1):
+        for user in users:
             username = f"@{user.username}" if user.username else "❌ Yo'q"
             phone = user.phone_number if user.phone_number else "❌ Yo'q"
             created = user.created_at.strftime("%d.%m.%Y %H:%M") if user.created_at else "N/A"
             
-            text += f"{idx}. <b>{user.full_name or 'N/A'}</b>\n"
+            text += f"{user.id}. <b>{user.full_name or 'N/A'}</b>\n"
             text += f"   🆔 ID: <code>{user.telegram_id}</code>\n"
             text += f"   👤 Username: {username}\n"
             text += f"   📱 Tel: {phone}\n"
             text += f"   🕐 {created}\n\n"
         
-        if total > 20:
-            text += f"\n... va yana {total - 20} ta foydalanuvchi"
-        
-        await message.answer(text, parse_mode="HTML")
+        markup = get_users_page_markup(users[0].id, users[-1].id, has_prev, has_next)
+        if edit:
+            await message.edit_text(text, reply_markup=markup, parse_mode="HTML")
+        else:
+            await message.answer(text, reply_markup=markup, parse_mode="HTML")
         
     except Exception as e:
         logging.exception(f"Error in get_all_users: {e}")
         await message.answer(f"❌ Xatolik yuz berdi: {str(e)}")
 
 
+@router.callback_query(F.data.startswith("allusers:"), IsBotAdminFilter(ADMINS))
+async def paginate_all_users(call: types.CallbackQuery):
+    """⬅️ / ➡️ tugmalari"""
+    await call.answer()
+    _, direction, cursor = call.data.split(":")
+    if direction == "next":
+        await get_all_users_handler(call.message, after_id=int(cursor), edit=True)
+    else:
+        await get_all_users_handler(call.message, before_id=int(cursor), edit=True)
+
+
 @router.message(Command('allusers'), IsBotAdminFilter(ADMINS))
 async def get_all_users(message: types.Message):
     await get_all_users_handler(message)
@@ -100,37 +131,18 @@ async def stats(message: types.Message):
 async def stats_handler(message: types.Message):
     """Statistics handler"""
     try:
-        # Get all users
-        all_users = await User.all()
-        total_users = len(all_users)
+        stats = await get_user_stats()
+        total_users = stats.get("total", 0)
         
         if total_users == 0:
             await message.answer("❌ Bazada ma'lumotlar yo'q.")
             return
         
-        # Calculate statistics
-        # Use naive datetime to avoid timezone comparison issues
-        now = datetime.now().replace(tzinfo=None)
-        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        week_ago = now - timedelta(days=7)
-        month_ago = now - timedelta(days=30)
-        
-        # Helper function to make datetime naive if needed
-        def make_naive(dt):
-            """Convert datetime to naive if it's timezone-aware"""
-            if dt is None:
-                return None
-            if dt.tzinfo is not None:
-                return dt.replace(tzinfo=None)
-            return dt
-        
-        today_users = sum(1 for u in all_users if u.created_at and make_naive(u.created_at) >= today)
-        week_users = sum(1 for u in all_users if u.created_at and make_naive(u.created_at) >= week_ago)
-        month_users = sum(1 for u in all_users if u.created_at and make_naive(u.created_at) >= month_ago)
-        
-        # Users with phone numbers
-        users_with_phone = sum(1 for u in all_users if u.phone_number)
-        users_with_username = sum(1 for u in all_users if u.username)
+        now = datetime.now()
+        history = await get_daily_history(days=7)
+        history_text = "\n".join(
+            f"• {row.day.strftime('%d.%m')}: +{row.new_users} ({row.total_users})" for row in history
+        )
         
         # Format statistics
         text = f"""
@@ -141,13 +153,18 @@ async def stats_handler(message: types.Message):
 ━━━━━━━━━━━━━━━━━━━━
 
 📅 <b>Vaqt bo'yicha:</b>
-• Bugun: {today_users} ta
-• Oxirgi 7 kun: {week_users} ta
-• Oxirgi 30 kun: {month_users} ta
+• Bugun: {stats["today"]} ta
+• Oxirgi 7 kun: {stats["week"]} ta
+• Oxirgi 30 kun: {stats["month"]} ta
+
+📈 <b>Kunlar bo'yicha (yangi / jami):</b>
+{history_text}
 
 📱 <b>Ma'lumotlar:</b>
-• Telefon raqami bor: {users_with_phone} ta
-• Username bor: {users_with_username} ta
+• Telefon raqami bor: {stats["with_phone"]} ta
+• Username bor: {stats["with_username"]} ta
+• HEMIS ulangan: {stats["hemis_linked"]} ta
+• Eslatma yoqilgan: {stats["reminders"]} ta
 
 🕐 <b>Oxirgi yangilanish:</b> {now.strftime("%d.%m.%Y %H:%M:%S")}
 """
@@ -175,98 +192,55 @@ async def ask_ad_content(message: types.Message, state: FSMContext):
 
 @router.message(AdminState.ask_ad_content, IsBotAdminFilter(ADMINS))
 async def send_ad_to_users(message: types.Message, state: FSMContext):
-    """Send advertisement to all users"""
+    """Send advertisement to all users (fon worker, progress xabari bilan)"""
     try:
-        await message.answer("⏳ Reklama yuborilmoqda...")
-        
-        # Get all users
-        users = await User.all()
-        total = len(users)
-        
-        if total == 0:
+        if not await User.exists():
             await message.answer("❌ Bazada foydalanuvchilar topilmadi.")
             await state.clear()
             return
-        
-        # Counters
-        success = 0
-        failed = 0
-        
-        # Send message to all users
-        for user in users:
-            try:
-                # Copy message based on content type
-                if message.photo:
-                    await bot.send_photo(
-                        chat_id=user.telegram_id,
-                        photo=message.photo[-1].file_id,
-                        caption=message.caption or "",
-                        caption_entities=message.caption_entities
-                    )
-                elif message.video:
-                    await bot.send_video(
-                        chat_id=user.telegram_id,
-                        video=message.video.file_id,
-                        caption=message.caption or "",
-                        caption_entities=message.caption_entities
-                    )
-                elif message.document:
-                    await bot.send_document(
-                        chat_id=user.telegram_id,
-                        document=message.document.file_id,
-                        caption=message.caption or "",
-                        caption_entities=message.caption_entities
-                    )
-                elif message.animation:
-                    await bot.send_animation(
-                        chat_id=user.telegram_id,
-                        animation=message.animation.file_id,
-                        caption=message.caption or "",
-                        caption_entities=message.caption_entities
-                    )
-                else:
-                    await bot.send_message(
-                        chat_id=user.telegram_id,
-                        text=message.text or message.caption or "",
-                        entities=message.entities or message.caption_entities
-                    )
-                
-                success += 1
-                # Small delay to avoid rate limiting
-                await asyncio.sleep(0.05)
-                
-            except Exception as e:
-                failed += 1
-                logging.error(f"Failed to send ad to user {user.telegram_id}: {e}")
-                continue
-        
-        # Send result
-        result_text = f"""
-✅ <b>REKLAMA YUBORILDI</b>
 
-━━━━━━━━━━━━━━━━━━━━
-✅ Muvaffaqiyatli: {success} ta
-❌ Xatolik: {failed} ta
-📊 Jami: {total} ta
-━━━━━━━━━━━━━━━━━━━━
-"""
-        await message.answer(result_text, parse_mode="HTML")
+        # Admin posti copy_message orqali nusxalanadi — har qanday media turi
+        await start_broadcast(
+            admin_chat_id=message.chat.id,
+            from_chat_id=message.chat.id,
+            message_id=message.message_id,
+        )
         await state.clear()
-        
+
     except Exception as e:
         logging.exception(f"Error in send_ad_to_users: {e}")
         await message.answer(f"❌ Xatolik yuz berdi: {str(e)}")
         await state.clear()
 
 
-@router.callback_query(F.data == 'admin_export')
+@router.message(Command('reklama_stop'), IsBotAdminFilter(ADMINS))
+async def stop_ads(message: types.Message):
+    """Yuborilayotgan reklamalarni to'xtatish"""
+    running = await Broadcast.filter(status="running").values_list("id", flat=True)
+    for broadcast_id in running:
+        await cancel_broadcast(broadcast_id)
+
+    if running:
+        await message.answer(f"⏹ To'xtatildi: {len(running)} ta reklama")
+    else:
+        await message.answer("ℹ️ Yuborilayotgan reklama yo'q")
+
+
+@router.callback_query(F.data == 'admin_export', IsBotAdminFilter(ADMINS))
 async def admin_export_callback(call: types.CallbackQuery):
     """Export to Excel via callback"""
     await call.answer("⏳ Excel fayl tayyorlanmoqda...")
     await export_to_excel_handler(call.message)
 
 
-@router.callback_query(F.data == 'admin_backup')
+@router.callback_query(F.data == 'admin_export_csv', IsBotAdminFilter(ADMINS))
+async def admin_export_csv_callback(call: types.CallbackQuery):
+    """Export to CSV (gzip) via callback"""
+    await call.answer("⏳ CSV fayl tayyorlanmoqda...")
+    await export_to_excel_handler(call.message, fmt="csv")
+
+
+@router.callback_query(F.data == 'admin_backup', IsBotAdminFilter(ADMINS))
 async def admin_backup_callback(call: types.CallbackQuery):
     """Backup database via callback"""
     await call.answer("⏳ Backup tayyorlanmoqda...")
@@ -279,116 +253,74 @@ async def backup_database(message: types.Message):
     await backup_database_handler(message)
 
 
-async def export_to_excel_handler(message: types.Message):
-    """Export users to Excel"""
+EXPORT_HEADINGS = ["ID", "Telegram ID", "To'liq ism", "Username", "Telefon raqam", "Qo'shilgan vaqt"]
+EXPORT_WIDTHS = [8, 16, 32, 24, 18, 22]
+EXPORT_CHUNK = 2000
+
+
+async def _iter_user_rows():
+    """Foydalanuvchilarni keyset pagination bilan bo'laklab beradi."""
+    last_id = 0
+    while True:
+        rows = await User.filter(id__gt=last_id).order_by("id").limit(EXPORT_CHUNK).values_list(
+            "id", "telegram_id", "full_name", "username", "phone_number", "created_at"
+        )
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield [
+            [
+                user_id,
+                telegram_id,
+                full_name or "N/A",
+                username or "N/A",
+                phone_number or "N/A",
+                created_at.strftime("%Y-%m-%d %H:%M:%S") if created_at else "N/A",
+            ]
+            for user_id, telegram_id, full_name, username, phone_number, created_at in rows
+        ]
+
+
+async def export_to_excel_handler(message: types.Message, fmt: str = "xlsx"):
+    """Export users to Excel (yoki csv.gz) — oqimli, fon thread'da"""
+    filepath = None
     try:
-        users = await User.all()
-        
-        if not users:
+        if not await User.exists():
             await message.answer("❌ Bazada foydalanuvchilar topilmadi.")
             return
         
-        # Prepare data
-        headings = ["ID", "Telegram ID", "To'liq ism", "Username", "Telefon raqam", "Qo'shilgan vaqt"]
-        data = []
-        
-        for user in users:
-            data.append([
-                user.id,
-                user.telegram_id,
-                user.full_name or "N/A",
-                user.username or "N/A",
-                user.phone_number or "N/A",
-                user.created_at.strftime("%Y-%m-%d %H:%M:%S") if user.created_at else "N/A"
-            ])
-        
-        # Create file path
-        filepath = "users_export.xlsx"
-        
-        # Export to Excel
-        await export_to_excel(data, headings, filepath)
+        filepath, total = await stream_export(
+            _iter_user_rows(), EXPORT_HEADINGS, fmt=fmt, widths=EXPORT_WIDTHS
+        )
         
         # Send file
-        if os.path.exists(filepath):
-            file = FSInputFile(filepath)
-            await message.answer_document(
-                document=file,
-                caption=f"📥 <b>Excel fayl</b>\n\nJami: {len(users)} ta foydalanuvchi",
-                parse_mode="HTML"
-            )
-            # Delete file after sending
-            os.remove(filepath)
-        else:
-            await message.answer("❌ Fayl yaratishda xatolik yuz berdi.")
+        filename = f"users_export_{datetime.now().strftime('%Y%m%d_%H%M')}{FORMAT_SUFFIXES[fmt]}"
+        title = "Excel fayl" if fmt == "xlsx" else "CSV fayl (gzip)"
+        await message.answer_document(
+            document=FSInputFile(filepath, filename=filename),
+            caption=f"📥 <b>{title}</b>\n\nJami: {total} ta foydalanuvchi",
+            parse_mode="HTML"
+        )
             
     except Exception as e:
         logging.exception(f"Error in export_to_excel: {e}")
         await message.answer(f"❌ Xatolik yuz berdi: {str(e)}")
+    finally:
+        # Delete file after sending
+        if filepath and os.path.exists(filepath):
+            os.remove(filepath)
 
 
 async def backup_database_handler(message: types.Message):
-    """Backup SQLite database and send to admin"""
+    """Onlayn backup (SQLite backup API, siqilgan) yaratib adminga yuboradi"""
     try:
-        # Get database path (same logic as in tortoise.py)
-        # From handlers/users/admin.py -> config/utils/kiuf_bot.db
-        # Path(__file__) = handlers/users/admin.py
-        # parent.parent.parent = config/ (root directory)
-        db_path = Path(__file__).parent.parent.parent / "utils" / "kiuf_bot.db"
-        
-        # Alternative paths if above doesn't work
-        if not db_path.exists():
-            # Try relative to config directory
-            db_path = Path(__file__).parent.parent / "utils" / "kiuf_bot.db"
-        
-        if not db_path.exists():
-            # Try in utils directory from current working directory
-            db_path = Path("utils") / "kiuf_bot.db"
-        
-        if not db_path.exists():
-            # Try absolute path from config root
-            config_root = Path(__file__).parent.parent.parent
-            db_path = config_root / "utils" / "kiuf_bot.db"
-        
-        if not db_path.exists():
-            await message.answer("❌ Baza fayli topilmadi. Iltimos, baza fayl yo'lini tekshiring.")
-            logging.error(f"Database file not found. Searched paths: {db_path}")
-            return
-        
-        # Create backup filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_filename = f"kiuf_bot_backup_{timestamp}.db"
-        backup_path = Path(backup_filename)
-        
-        # Copy database file
-        shutil.copy2(db_path, backup_path)
-        
-        # Get file size
-        file_size = backup_path.stat().st_size
-        file_size_mb = file_size / (1024 * 1024)
-        
-        # Send backup file
-        if backup_path.exists():
-            file = FSInputFile(backup_path)
-            await message.answer_document(
-                document=file,
-                caption=f"""
-💾 <b>BAZA BACKUP</b>
-
-━━━━━━━━━━━━━━━━━━━━
-📁 <b>Fayl nomi:</b> {backup_filename}
-📊 <b>Hajmi:</b> {file_size_mb:.2f} MB
-🕐 <b>Vaqt:</b> {datetime.now().strftime("%d.%m.%Y %H:%M:%S")}
-━━━━━━━━━━━━━━━━━━━━
-
-✅ Backup muvaffaqiyatli yaratildi!
-""",
-                parse_mode="HTML"
-            )
-            # Delete backup file after sending
-            backup_path.unlink()
-        else:
-            await message.answer("❌ Backup fayl yaratishda xatolik yuz berdi.")
-            
+        status = await message.answer("⏳ Backup tayyorlanmoqda...")
+        paths = await create_database_backup()
+        await send_backup_files(message.chat.id, paths)
+        await status.delete()
+    except FileNotFoundError as e:
+        logging.error(f"Error in backup_database: {e}")
+        await message.answer("❌ Baza fayli topilmadi. Iltimos, DB_PATH sozlamasini tekshiring.")
     except Exception as e:
         logging.exception(f"Error in backup_database: {e}")
         await message.answer(f"❌ Backup yaratishda xatolik yuz berdi: {str(e)}")
@@ -430,6 +362,8 @@ async def clean_db(call: types.CallbackQuery, state: FSMContext):
             
             # Delete all users
             await User.all().delete()
+            # Ommaviy delete signal chiqarmaydi — keshdagi foydalanuvchilar ham o'chiriladi
+            user_cache.clear()
             
             await call.message.edit_text(
                 f"✅ Bazani tozalash muvaffaqiyatli yakunlandi.\n\n"
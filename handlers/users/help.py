@@ -1,3 +1,5 @@
+from typing import Optional
+
 from aiogram import Router, types
 from aiogram.filters.command import Command
 from models.user import User
@@ -8,9 +10,8 @@ router = Router()
 
 
 @router.message(Command('help'))
-async def bot_help(message: types.Message):
+async def bot_help(message: types.Message, user: Optional[User]):
     # Get user language
-    user = await User.get_or_none(telegram_id=message.from_user.id)
     language = user.language if user else LanguageEnum.UZ
     
     # Help texts in different languages
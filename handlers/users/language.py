@@ -1,7 +1,10 @@
 """Language selection handlers"""
 
+from typing import Optional
+
 from aiogram import Router, types, F
 from models.user import User
+from services.user_cache import user_cache
 from schemas.language import LanguageEnum
 from utils.i18n import get_text
 from keyboards.inline.menu import get_main_menu_keyboard, get_language_keyboard, get_admission_submenu_keyboard
@@ -10,7 +13,7 @@ router = Router()
 
 
 @router.callback_query(F.data.startswith("lang_"))
-async def set_language(callback: types.CallbackQuery):
+async def set_language(callback: types.CallbackQuery, user: Optional[User]):
     """Set user language"""
     await callback.answer()
 
@@ -25,10 +28,9 @@ async def set_language(callback: types.CallbackQuery):
     selected_language = language_map.get(lang_code, LanguageEnum.UZ)
 
     # Update user language
-    user = await User.get_or_none(telegram_id=callback.from_user.id)
     if user:
         user.language = selected_language
-        await user.save(update_fields=['language'])
+        await user_cache.save(user, ['language'])
     else:
         # Create user if not exists
         user = await User.create(
@@ -37,6 +39,7 @@ async def set_language(callback: types.CallbackQuery):
             username=callback.from_user.username,
             language=selected_language
         )
+        user_cache.put(user)
 
     # Send confirmation and main menu
     await callback.message.edit_text(
@@ -73,11 +76,10 @@ async def back_to_admission_menu(callback: types.CallbackQuery):
     )
 
 @router.callback_query(F.data == "back_to_menu")
-async def back_to_menu(callback: types.CallbackQuery):
+async def back_to_menu(callback: types.CallbackQuery, user: Optional[User]):
     """Return to main menu"""
     await callback.answer()
 
-    user = await User.get_or_none(telegram_id=callback.from_user.id)
     language = user.language if user else LanguageEnum.UZ
 
     # Try to delete the current message (photo/image message)
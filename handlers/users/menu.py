@@ -5,6 +5,7 @@ from aiogram import Router, types, F
 from aiogram.fsm.context import FSMContext
 from loader import bot
 from models.user import User
+from services.user_cache import user_cache
 from schemas.language import LanguageEnum
 from utils.i18n import get_text
 from keyboards.inline.menu import (
@@ -28,7 +29,7 @@ logger = logging.getLogger(__name__)
 
 async def _get_user_lang(telegram_id: int) -> LanguageEnum:
     """Foydalanuvchi tilini qaytaradi, topilmasa UZ."""
-    user = await User.get_or_none(telegram_id=telegram_id)
+    user = await user_cache.get(telegram_id)
     return user.language if user else LanguageEnum.UZ
 
 
@@ -270,8 +271,7 @@ async def process_feedback(message: types.Message, state: FSMContext):
             except Exception as e:
                 logger.error(f"Admin {admin_id} ga xabar yuborishda xatolik: {e}")
 
-        user = await User.get_or_none(telegram_id=user_id)
-        language = user.language if user else LanguageEnum.UZ
+        language = await _get_user_lang(user_id)
 
         await message.answer(
             get_text("feedback_sent", language),
@@ -1,12 +1,11 @@
-import re
 import logging
-import requests
+from typing import Optional
+
 from aiogram import Router, types, F
 from aiogram.fsm.context import FSMContext
 from loader import bot
 from models.user import User
 from models.group import Group
-from models.schedule import Schedule
 from schemas.language import LanguageEnum
 from utils.i18n import get_text
 from keyboards.inline.menu import get_profile_menu_keyboard, get_back_to_menu_keyboard
@@ -15,11 +14,13 @@ from services.hemis_service import (
     get_hemis_captcha,
     hemis_login,
     create_session,
-    DASHBOARD_URL,
+    get_student_group,
     fetch_schedule,
 )
-from services.schedule_service import get_current_week, update_cached_week_id
-from bs4 import BeautifulSoup
+from services.hemis_session_pool import hemis_sessions
+from services.schedule_repository import save_week_schedule
+from services.schedule_service import get_current_week
+from services.user_cache import user_cache
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -30,13 +31,9 @@ logger = logging.getLogger(__name__)
 # =========================================================
 
 @router.callback_query(F.data == "menu_profile")
-async def show_profile_menu(callback: types.CallbackQuery):
+async def show_profile_menu(callback: types.CallbackQuery, user: Optional[User]):
     await callback.answer()
 
-    user = await User.get_or_none(
-        telegram_id=callback.from_user.id
-    ).prefetch_related("group")
-
     language = user.language if user else LanguageEnum.UZ
 
     group_name = user.group.name if user and user.group else "—"
@@ -61,11 +58,10 @@ async def show_profile_menu(callback: types.CallbackQuery):
 # =========================================================
 
 @router.callback_query(F.data == "connect_hemis")
-async def start_connect_hemis(callback: types.CallbackQuery, state: FSMContext):
+async def start_connect_hemis(callback: types.CallbackQuery, state: FSMContext, user: Optional[User]):
 
     await callback.answer()
 
-    user = await User.get_or_none(telegram_id=callback.from_user.id)
     language = user.language if user else LanguageEnum.UZ
 
     msg = await callback.message.edit_text(
@@ -119,7 +115,7 @@ async def process_hemis_login(message: types.Message, state: FSMContext):
 # 3-QADAM PAROL QABUL QILISH
 # =========================================================
 
-@router.message(UserState.waiting_hemis_password)
+@router.message(UserState.waiting_hemis_password, flags={"throttling_cost": 3})
 async def process_hemis_password(message: types.Message, state: FSMContext):
 
     data = await state.get_data()
@@ -141,9 +137,10 @@ async def process_hemis_password(message: types.Message, state: FSMContext):
         hemis_password=password
     )
 
-    session = create_session()
-
-    csrf, captcha_bytes, cookies = get_hemis_captcha(session)
+    async with create_session() as session:
+        csrf, captcha_bytes, cookies = await get_hemis_captcha(
+            session, user_key=message.from_user.id
+        )
 
     if not csrf or not captcha_bytes:
 
@@ -177,10 +174,8 @@ async def process_hemis_password(message: types.Message, state: FSMContext):
 # 4-QADAM CAPTCHA QABUL QILISH
 # =========================================================
 
-@router.message(UserState.waiting_hemis_captcha)
-async def process_hemis_captcha(message: types.Message, state: FSMContext):
-
-    user = await User.get_or_none(telegram_id=message.from_user.id)
+@router.message(UserState.waiting_hemis_captcha, flags={"throttling_cost": 3})
+async def process_hemis_captcha(message: types.Message, state: FSMContext, user: Optional[User]):
 
     language = user.language if user else LanguageEnum.UZ
 
@@ -206,103 +201,63 @@ async def process_hemis_captcha(message: types.Message, state: FSMContext):
 
     wait = await message.answer("⏳ HEMIS ga ulanmoqda...")
 
-    session = create_session()
-
-    for k, v in cookies.items():
-        session.cookies.set(k, v, domain="student.ukiu.uz")
-
-    is_valid, error = hemis_login(
-        session,
-        csrf,
-        login,
-        password,
-        captcha_code,
-    )
-
-    if not is_valid:
-
-        await wait.edit_text("❌ Login yoki captcha xato")
-
-        await state.clear()
-
-        return
+    async with create_session(cookies) as session:
 
-    session.get(DASHBOARD_URL)
+        is_valid, error = await hemis_login(
+            session,
+            csrf,
+            login,
+            password,
+            captcha_code,
+            user_key=message.from_user.id,
+        )
 
-    user.hemis_login = login
-    user.hemis_password = password
+        if not is_valid:
 
-    try:
+            await wait.edit_text("❌ Login yoki captcha xato")
 
-        update_cached_week_id(session)
+            await state.clear()
 
-        resp = session.get(DASHBOARD_URL)
+            return
 
-        soup = BeautifulSoup(resp.text, "html.parser")
+        await hemis_sessions.store(message.from_user.id, session)
 
-        group_name = None
+        user.hemis_login = login
+        user.hemis_password = password
 
-        user_role_span = soup.find("span", class_="user-role")
+        try:
 
-        if user_role_span:
-            group_name = user_role_span.text.strip()
+            group_name = await get_student_group(session, user_key=message.from_user.id)
 
-        if not group_name:
+            if group_name:
 
-            for pattern in [
-                r"Guruh:\s*([A-Z0-9\-]+)",
-                r"Group:\s*([A-Z0-9\-]+)",
-            ]:
+                group, _ = await Group.get_or_create(
+                    name=group_name.upper()
+                )
 
-                match = re.search(pattern, resp.text)
+                user.group = group
 
-                if match:
-                    group_name = match.group(1).strip()
-                    break
+            await user.save()
 
-        if group_name:
+            week = await get_current_week()
 
-            group, _ = await Group.get_or_create(
-                name=group_name.upper()
+            schedule_data = await fetch_schedule(
+                session,
+                str(week.week_number),
+                user_key=message.from_user.id,
             )
 
-            user.group = group
-
-        await user.save()
-
-        week = await get_current_week()
-
-        schedule_data = fetch_schedule(
-            session,
-            str(week.week_number),
-        )
-
-        for item in schedule_data:
-
-            await Schedule.get_or_create(
-                group=user.group,
-                week=week,
-                day=item["day"],
-                pair_number=item["pair_number"],
-                defaults={
-                    "subject": item["subject"],
-                    "teacher": item.get("teacher"),
-                    "room": item.get("room"),
-                    "lesson_type": item.get("lesson_type"),
-                    "lesson_time": item.get("lesson_time"),
-                },
-            )
+            if user.group:
+                await save_week_schedule(user.group, week, schedule_data)
 
-    except Exception as e:
+        except Exception as e:
 
-        logger.error(f"HEMIS caching xatoligi: {e}")
+            logger.error(f"HEMIS caching xatoligi: {e}")
+            # Saqlanmagan o'zgarishlar keshda qolmasin
+            user_cache.invalidate(message.from_user.id)
 
     await wait.delete()
 
-    user = await User.get_or_none(
-        telegram_id=message.from_user.id
-    ).prefetch_related("group")
-
     await message.answer(
         "✅ HEMIS muvaffaqiyatli ulandi",
         reply_markup=get_profile_menu_keyboard(language, user),
@@ -317,14 +272,10 @@ async def process_hemis_captcha(message: types.Message, state: FSMContext):
 # =========================================================
 
 @router.callback_query(F.data == "disconnect_hemis")
-async def disconnect_hemis(callback: types.CallbackQuery):
+async def disconnect_hemis(callback: types.CallbackQuery, user: Optional[User]):
 
     await callback.answer()
 
-    user = await User.get_or_none(
-        telegram_id=callback.from_user.id
-    )
-
     language = user.language if user else LanguageEnum.UZ
 
     await User.filter(
@@ -336,9 +287,14 @@ async def disconnect_hemis(callback: types.CallbackQuery):
         reminder_enabled=False,
     )
 
-    user = await User.get_or_none(
-        telegram_id=callback.from_user.id
-    )
+    await hemis_sessions.discard(callback.from_user.id)
+
+    # Keshdagi obyekt ham bazaga moslanadi (qayta o'qimasdan)
+    if user:
+        user.hemis_login = None
+        user.hemis_password = None
+        user.group = None
+        user.reminder_enabled = False
 
     await callback.message.edit_text(
         get_text("hemis_disconnected", language),
@@ -6,8 +6,11 @@ Mavjud import qatorlariga qo'shing:
     from tasks.reminder import send_daily_reminders  # ixtiyoriy, test uchun
 """
 
+from typing import Optional
+
 from aiogram import Router, types, F
 from models.user import User
+from services.user_cache import user_cache
 from schemas.language import LanguageEnum
 from utils.i18n import get_text
 from keyboards.inline.menu import get_profile_menu_keyboard
@@ -19,17 +22,14 @@ from keyboards.inline.menu import get_profile_menu_keyboard
 router = Router()
 
 @router.callback_query(F.data == "reminder_disable")
-async def disable_reminder(callback: types.CallbackQuery):
+async def disable_reminder(callback: types.CallbackQuery, user: Optional[User]):
     await callback.answer()
 
-    user = await User.get_or_none(telegram_id=callback.from_user.id)
     language = user.language if user else LanguageEnum.UZ
 
     if user:
         user.reminder_enabled = False
-        await user.save(update_fields=["reminder_enabled"])
-        # ✅ DB dan qayta o'qiymiz — yangilangan obyekt
-        user = await User.get_or_none(telegram_id=callback.from_user.id)
+        await user_cache.save(user, ["reminder_enabled"])
 
     await callback.message.edit_text(
         get_text("reminder_disabled_text", language),
@@ -39,17 +39,14 @@ async def disable_reminder(callback: types.CallbackQuery):
 
 
 @router.callback_query(F.data == "reminder_enable")
-async def enable_reminder(callback: types.CallbackQuery):
+async def enable_reminder(callback: types.CallbackQuery, user: Optional[User]):
     await callback.answer()
 
-    user = await User.get_or_none(telegram_id=callback.from_user.id)
     language = user.language if user else LanguageEnum.UZ
 
     if user:
         user.reminder_enabled = True
-        await user.save(update_fields=["reminder_enabled"])
-        # ✅ DB dan qayta o'qiymiz
-        user = await User.get_or_none(telegram_id=callback.from_user.id)
+        await user_cache.save(user, ["reminder_enabled"])
 
     await callback.message.edit_text(
         get_text("reminder_enabled_text", language),
@@ -1,11 +1,10 @@
 import logging
-import requests
 from datetime import datetime
+from typing import Optional
 from aiogram import Router, types, F
 from aiogram.fsm.context import FSMContext
 from loader import bot
 from models.user import User
-from models.week import Week
 from schemas.language import LanguageEnum
 from utils.i18n import get_text
 from keyboards.inline.menu import (
@@ -15,12 +14,14 @@ from keyboards.inline.menu import (
 )
 from services.schedule_service import (
     get_current_week,
+    get_week,
     get_or_fetch_schedule,
     format_schedule_message,
     NeedsHemisLoginError,
     format_week_date_range,
 )
-from services.hemis_service import get_hemis_captcha, hemis_login, create_session
+from services.hemis_service import get_hemis_captcha, hemis_login, create_session, HemisUnavailableError
+from services.hemis_session_pool import hemis_sessions
 from states.test import UserState
 
 router = Router()
@@ -58,14 +59,21 @@ async def _build_today_text(schedules, language: LanguageEnum) -> str:
     return text
 
 
+async def _show_hemis_unavailable(message: types.Message, language: LanguageEnum) -> None:
+    """HEMIS javob bermadi — saqlangan jadvalga tegilmaydi, foydalanuvchiga xato ko'rsatiladi."""
+    await message.edit_text(
+        get_text("error_loading", language),
+        reply_markup=get_schedule_menu_keyboard(language),
+    )
+
+
 # ---------------------------------------------------------------------------
 # Schedule menu
 # ---------------------------------------------------------------------------
 
 @router.callback_query(F.data == "menu_schedule")
-async def show_schedule_menu(callback: types.CallbackQuery):
+async def show_schedule_menu(callback: types.CallbackQuery, user: Optional[User]):
     await callback.answer()
-    user = await User.get_or_none(telegram_id=callback.from_user.id)
     language = user.language if user else LanguageEnum.UZ
 
     await callback.message.edit_text(
@@ -79,10 +87,9 @@ async def show_schedule_menu(callback: types.CallbackQuery):
 # Bugungi jadval
 # ---------------------------------------------------------------------------
 
-@router.callback_query(F.data == "today_schedule")
-async def show_today_schedule(callback: types.CallbackQuery, state: FSMContext):
+@router.callback_query(F.data == "today_schedule", flags={"throttling_cost": 2})
+async def show_today_schedule(callback: types.CallbackQuery, state: FSMContext, user: Optional[User]):
     await callback.answer()
-    user = await User.get_or_none(telegram_id=callback.from_user.id).prefetch_related("group")
     language = user.language if user else LanguageEnum.UZ
 
     await callback.message.edit_text(get_text("schedule_loading", language), parse_mode="HTML")
@@ -97,6 +104,9 @@ async def show_today_schedule(callback: types.CallbackQuery, state: FSMContext):
             week_id=str(week.week_number),
         )
         return
+    except HemisUnavailableError:
+        await _show_hemis_unavailable(callback.message, language)
+        return
 
     text = await _build_today_text(schedules, language)
     await callback.message.edit_text(
@@ -110,10 +120,9 @@ async def show_today_schedule(callback: types.CallbackQuery, state: FSMContext):
 # Haftalik jadval (joriy hafta)
 # ---------------------------------------------------------------------------
 
-@router.callback_query(F.data == "week_schedule")
-async def show_week_schedule(callback: types.CallbackQuery, state: FSMContext):
+@router.callback_query(F.data == "week_schedule", flags={"throttling_cost": 2})
+async def show_week_schedule(callback: types.CallbackQuery, state: FSMContext, user: Optional[User]):
     await callback.answer()
-    user = await User.get_or_none(telegram_id=callback.from_user.id).prefetch_related("group")
     language = user.language if user else LanguageEnum.UZ
 
     await callback.message.edit_text(get_text("schedule_loading", language), parse_mode="HTML")
@@ -129,6 +138,9 @@ async def show_week_schedule(callback: types.CallbackQuery, state: FSMContext):
             week_id=week_id,
         )
         return
+    except HemisUnavailableError:
+        await _show_hemis_unavailable(callback.message, language)
+        return
 
     await state.update_data(selected_week_id=week_id)
     text = await _build_week_text(schedules, week_id, language)
@@ -143,23 +155,16 @@ async def show_week_schedule(callback: types.CallbackQuery, state: FSMContext):
 # Pagination — boshqa hafta tanlandi
 # ---------------------------------------------------------------------------
 
-@router.callback_query(F.data.startswith("select_week:"))
-async def select_week(callback: types.CallbackQuery, state: FSMContext):
+@router.callback_query(F.data.startswith("select_week:"), flags={"throttling_cost": 2})
+async def select_week(callback: types.CallbackQuery, state: FSMContext, user: Optional[User]):
     await callback.answer()
-    user = await User.get_or_none(telegram_id=callback.from_user.id).prefetch_related("group")
     language = user.language if user else LanguageEnum.UZ
 
     week_id = callback.data.split(":")[1]
 
     await callback.message.edit_text(get_text("schedule_loading", language), parse_mode="HTML")
 
-    week, _ = await Week.get_or_create(
-        week_number=week_id,
-        defaults={
-            "start_date": datetime.today().date(),
-            "end_date": datetime.today().date(),
-        },
-    )
+    week = await get_week(week_id)
 
     try:
         schedules = await get_or_fetch_schedule(user.group, week, user=user)
@@ -171,6 +176,9 @@ async def select_week(callback: types.CallbackQuery, state: FSMContext):
             week_id=week_id,
         )
         return
+    except HemisUnavailableError:
+        await _show_hemis_unavailable(callback.message, language)
+        return
 
     await state.update_data(selected_week_id=week_id)
     text = await _build_week_text(schedules, week_id, language)
@@ -185,11 +193,10 @@ async def select_week(callback: types.CallbackQuery, state: FSMContext):
 # Yangilash (force update)
 # ---------------------------------------------------------------------------
 
-@router.callback_query(F.data.startswith("update_schedule:"))
-async def update_schedule(callback: types.CallbackQuery, state: FSMContext):
+@router.callback_query(F.data.startswith("update_schedule:"), flags={"throttling_cost": 4})
+async def update_schedule(callback: types.CallbackQuery, state: FSMContext, user: Optional[User]):
     week_id = callback.data.split(":")[1]
     await callback.answer()
-    user = await User.get_or_none(telegram_id=callback.from_user.id).prefetch_related("group")
     language = user.language if user else LanguageEnum.UZ
 
     await callback.message.edit_text(get_text("schedule_loading", language), parse_mode="HTML")
@@ -198,13 +205,7 @@ async def update_schedule(callback: types.CallbackQuery, state: FSMContext):
     # data = await state.get_data()
 
     if week_id:
-        week, _ = await Week.get_or_create(
-            week_number=week_id,
-            defaults={
-                "start_date": datetime.today().date(),
-                "end_date": datetime.today().date(),
-            },
-        )
+        week = await get_week(week_id)
     else:
         week = await get_current_week()
         week_id = str(week.week_number)
@@ -218,6 +219,9 @@ async def update_schedule(callback: types.CallbackQuery, state: FSMContext):
             week_id=week_id,
         )
         return
+    except HemisUnavailableError:
+        await _show_hemis_unavailable(callback.message, language)
+        return
 
     await state.update_data(selected_week_id=week_id)
     text = await _build_week_text(schedules, week_id, language)
@@ -241,8 +245,10 @@ async def _start_captcha_flow(
     week_id: str,          # ✅ FIX: week_id ni ham saqlaymiz
 ):
     """Captcha so'rab, state ga action_type va week_id ni yozadi."""
-    session = create_session()
-    csrf, captcha_bytes, cookies = get_hemis_captcha(session)
+    async with create_session() as session:
+        csrf, captcha_bytes, cookies = await get_hemis_captcha(
+            session, user_key=message.chat.id
+        )
 
     if not csrf or not captcha_bytes:
         await message.edit_text(
@@ -272,9 +278,8 @@ async def _start_captcha_flow(
     await state.set_state(UserState.waiting_hemis_captcha_schedule)
 
 
-@router.message(UserState.waiting_hemis_captcha_schedule)
-async def process_schedule_captcha(message: types.Message, state: FSMContext):
-    user = await User.get_or_none(telegram_id=message.from_user.id).prefetch_related("group")
+@router.message(UserState.waiting_hemis_captcha_schedule, flags={"throttling_cost": 3})
+async def process_schedule_captcha(message: types.Message, state: FSMContext, user: Optional[User]):
     language = user.language if user else LanguageEnum.UZ
 
     data = await state.get_data()
@@ -288,51 +293,46 @@ async def process_schedule_captcha(message: types.Message, state: FSMContext):
 
     wait_msg = await message.answer(get_text("loading", language))
 
-    session = create_session()
-    for k, v in cookies_dict.items():
-        session.cookies.set(k, v, domain="student.ukiu.uz")
-
-    is_valid, error_msg = hemis_login(
-        session, csrf, user.hemis_login, user.hemis_password, captcha_code
-    )
-
-    if not is_valid:
-        await wait_msg.delete()
-        await message.answer(
-            f"{error_msg}\n\nQaytadan urinib ko'ring",
-            reply_markup=get_back_to_menu_keyboard(language),
+    async with create_session(cookies_dict) as session:
+        is_valid, error_msg = await hemis_login(
+            session, csrf, user.hemis_login, user.hemis_password, captcha_code,
+            user_key=message.from_user.id,
         )
-        await state.clear()
-        return
-
-    # ✅ FIX: week_id dan Week obyektini olamiz (joriy hafta emas!)
-    if week_id:
-        week, _ = await Week.get_or_create(
-            week_number=week_id,
-            defaults={
-                "start_date": datetime.today().date(),
-                "end_date": datetime.today().date(),
-            },
-        )
-    else:
-        week = await get_current_week()
-        week_id = str(week.week_number)
 
-    force_update = action_type == "force_update"
-
-    try:
-        schedules = await get_or_fetch_schedule(
-            user.group, week, force_update=force_update, session=session
-        )
-    except Exception as e:
-        logger.error(f"Captcha keyingi jadval olishda xatolik: {e}")
-        await wait_msg.delete()
-        await message.answer(
-            get_text("error_loading", language),
-            reply_markup=get_back_to_menu_keyboard(language),
-        )
-        await state.clear()
-        return
+        if not is_valid:
+            await wait_msg.delete()
+            await message.answer(
+                f"{error_msg}\n\nQaytadan urinib ko'ring",
+                reply_markup=get_back_to_menu_keyboard(language),
+            )
+            await state.clear()
+            return
+
+        # Keyingi so'rovlar captcha'siz shu sessiya orqali ketadi
+        await hemis_sessions.store(message.from_user.id, session)
+
+        # ✅ FIX: week_id dan Week obyektini olamiz (joriy hafta emas!)
+        if week_id:
+            week = await get_week(week_id)
+        else:
+            week = await get_current_week()
+            week_id = str(week.week_number)
+
+        force_update = action_type == "force_update"
+
+        try:
+            schedules = await get_or_fetch_schedule(
+                user.group, week, force_update=force_update, session=session, user=user
+            )
+        except Exception as e:
+            logger.error(f"Captcha keyingi jadval olishda xatolik: {e}")
+            await wait_msg.delete()
+            await message.answer(
+                get_text("error_loading", language),
+                reply_markup=get_back_to_menu_keyboard(language),
+            )
+            await state.clear()
+            return
 
     await wait_msg.delete()
     await state.clear()
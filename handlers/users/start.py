@@ -1,8 +1,11 @@
+from typing import Optional
+
 from aiogram import Router, types
 from aiogram.filters import CommandStart
 from aiogram.client.session.middlewares.request_logging import logger
 from loader import bot
 from models.user import User
+from services.user_cache import user_cache
 from schemas.language import LanguageEnum
 from utils.i18n import get_text
 from keyboards.inline.menu import get_main_menu_keyboard, get_language_keyboard
@@ -12,7 +15,7 @@ router = Router()
 
 
 @router.message(CommandStart())
-async def do_start(message: types.Message):
+async def do_start(message: types.Message, user: Optional[User]):
     """Start command handler with language support and user registration"""
     telegram_id = message.from_user.id
     full_name = message.from_user.full_name
@@ -23,16 +26,20 @@ async def do_start(message: types.Message):
     if message.contact:
         phone_number = message.contact.phone_number
 
-    # Get or create user
-    user, created = await User.get_or_create(
-        telegram_id=telegram_id,
-        defaults={
-            "full_name": full_name,
-            "username": username,
-            "phone_number": phone_number,
-            "language": LanguageEnum.UZ
-        }
-    )
+    # Get or create user (mavjud foydalanuvchi UserMiddleware dan keladi)
+    created = False
+    if user is None:
+        user, created = await User.get_or_create(
+            telegram_id=telegram_id,
+            defaults={
+                "full_name": full_name,
+                "username": username,
+                "phone_number": phone_number,
+                "language": LanguageEnum.UZ
+            }
+        )
+        if created:
+            user_cache.put(user)
 
     # Update user info if changed
     if not created:
@@ -47,7 +54,7 @@ async def do_start(message: types.Message):
             user.phone_number = phone_number
             update_fields.append('phone_number')
         if update_fields:
-            await user.save(update_fields=update_fields)
+            await user_cache.save(user, update_fields)
     else:
         # New user - send notification to admins
         try:
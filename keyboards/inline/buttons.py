@@ -19,6 +19,9 @@ def get_admin_menu_markup():
             InlineKeyboardButton(text="📢 Reklama yuborish", callback_data='admin_reklama'),
             InlineKeyboardButton(text="📥 Excel export", callback_data='admin_export')
         ],
+        [
+            InlineKeyboardButton(text="📥 CSV export (gzip)", callback_data='admin_export_csv')
+        ],
         [
             InlineKeyboardButton(text="💾 Backup bazasi", callback_data='admin_backup'),
             InlineKeyboardButton(text="🗑️ Bazani tozalash", callback_data='admin_cleandb')
@@ -57,4 +60,14 @@ def get_reply_user_markup(user_id: int):
             )
         ]
     ]
-    return InlineKeyboardMarkup(inline_keyboard=keyboard)
\ No newline at end of file
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+def get_users_page_markup(first_id: int, last_id: int, has_prev: bool, has_next: bool):
+    """/allusers sahifalash tugmalari (keyset: User.id bo'yicha)"""
+    row = []
+    if has_prev:
+        row.append(InlineKeyboardButton(text="⬅️ Oldingi", callback_data=f"allusers:prev:{first_id}"))
+    if has_next:
+        row.append(InlineKeyboardButton(text="Keyingi ➡️", callback_data=f"allusers:next:{last_id}"))
+    return InlineKeyboardMarkup(inline_keyboard=[row] if row else [])
@@ -1,10 +1,26 @@
-"""Menu keyboards for the bot"""
+"""Menu keyboards for the bot
+
+Klaviaturalar faqat tilga (va bir nechta parametrga) bog'liq, shuning uchun
+ular ``lru_cache`` bilan bir marta quriladi va keyin tayyor obyekt qaytadi
+(aiogram turlari frozen — bo'lishib ishlatish xavfsiz). Startupda
+``prebuild_keyboards()`` statik klaviaturalarni barcha tillar uchun quradi;
+hafta tugmalari keshi hafta indeksi yangilanganda tozalanadi.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict
 
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, WebAppInfo
 from schemas.language import LanguageEnum
-from utils.i18n import get_text
+from utils.i18n import LANGUAGES, get_text
 
+# Statik klaviaturalar: kalit — faqat til
+_STATIC_CACHE_SIZE = 16
+# Hafta tugmalari: (til, hafta) juftliklari
+_WEEK_CACHE_SIZE = 512
 
+
+@lru_cache(maxsize=_STATIC_CACHE_SIZE)
 def get_main_menu_keyboard(language: LanguageEnum = LanguageEnum.UZ) -> InlineKeyboardMarkup:
     """Get main menu keyboard"""
     # Determine language code for URL
@@ -75,6 +91,7 @@ def get_main_menu_keyboard(language: LanguageEnum = LanguageEnum.UZ) -> InlineKe
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+@lru_cache(maxsize=1)
 def get_language_keyboard() -> InlineKeyboardMarkup:
     """Get language selection keyboard"""
     keyboard = [
@@ -100,7 +117,7 @@ def get_language_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-
+@lru_cache(maxsize=_STATIC_CACHE_SIZE)
 def get_back_to_admission_menu_keyboard(language: LanguageEnum = LanguageEnum.UZ) -> InlineKeyboardMarkup:
     """Get back to admission submenu keyboard"""
     keyboard = [
@@ -112,8 +129,9 @@ def get_back_to_admission_menu_keyboard(language: LanguageEnum = LanguageEnum.UZ
         ]
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
-    
 
+
+@lru_cache(maxsize=_STATIC_CACHE_SIZE)
 def get_back_to_menu_keyboard(language: LanguageEnum = LanguageEnum.UZ) -> InlineKeyboardMarkup:
     """Get back to menu keyboard"""
     keyboard = [
@@ -127,6 +145,7 @@ def get_back_to_menu_keyboard(language: LanguageEnum = LanguageEnum.UZ) -> Inlin
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+@lru_cache(maxsize=_STATIC_CACHE_SIZE)
 def get_admission_submenu_keyboard(language: LanguageEnum = LanguageEnum.UZ) -> InlineKeyboardMarkup:
     """Get admission submenu keyboard"""
     keyboard = [
@@ -163,6 +182,8 @@ def get_admission_submenu_keyboard(language: LanguageEnum = LanguageEnum.UZ) ->
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+
+@lru_cache(maxsize=_STATIC_CACHE_SIZE)
 def get_schedule_menu_keyboard(language: LanguageEnum = LanguageEnum.UZ) -> InlineKeyboardMarkup:
     """Asosiy schedule menyu — update tugmasi yo'q"""
     keyboard = [
@@ -182,6 +203,7 @@ def get_schedule_menu_keyboard(language: LanguageEnum = LanguageEnum.UZ) -> Inli
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+@lru_cache(maxsize=_WEEK_CACHE_SIZE)
 def get_week_pagination_keyboard(language: LanguageEnum = LanguageEnum.UZ, week_id: str = None) -> InlineKeyboardMarkup:
     """Haftalik jadval — pagination + update tugmasi bor"""
     from services.schedule_service import get_prev_week_id, get_next_week_id, format_week_date_range
@@ -223,15 +245,16 @@ def get_week_pagination_keyboard(language: LanguageEnum = LanguageEnum.UZ, week_
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from utils.i18n import get_text
+def get_profile_menu_keyboard(language, user=None):
+    hemis_connected = bool(user and getattr(user, "hemis_login", None))
+    reminder_enabled = bool(hemis_connected and getattr(user, "reminder_enabled", False))
+    return _get_profile_menu_keyboard(language, hemis_connected, reminder_enabled)
 
 
-def get_profile_menu_keyboard(language, user=None):
+@lru_cache(maxsize=_STATIC_CACHE_SIZE * 4)
+def _get_profile_menu_keyboard(language, hemis_connected: bool, reminder_enabled: bool):
     buttons: list[list[InlineKeyboardButton]] = []
 
-    hemis_connected = user and getattr(user, "hemis_login", None)
-
     # --- HEMIS tugmasi ---
     if hemis_connected:
         buttons.append([
@@ -242,7 +265,6 @@ def get_profile_menu_keyboard(language, user=None):
         ])
 
         # --- Eslatma tugmasi — FAQAT HEMIS ulangan bo'lsa ko'rinadi ---
-        reminder_enabled = getattr(user, "reminder_enabled", False)
         buttons.append([
             InlineKeyboardButton(
                 text=get_text("btn_reminder_disable" if reminder_enabled else "btn_reminder_enable", language),
@@ -269,10 +291,51 @@ def get_profile_menu_keyboard(language, user=None):
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
-def get_back_to_menu_keyboard(language):
-    return InlineKeyboardMarkup(inline_keyboard=[[
-        InlineKeyboardButton(
-            text=get_text("btn_back", language),
-            callback_data="back_to_menu"
-        )
-    ]])
\ No newline at end of file
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+
+STATIC_KEYBOARDS = (
+    get_main_menu_keyboard,
+    get_back_to_admission_menu_keyboard,
+    get_back_to_menu_keyboard,
+    get_admission_submenu_keyboard,
+    get_schedule_menu_keyboard,
+)
+PARAMETRIZED_KEYBOARDS = (get_week_pagination_keyboard, _get_profile_menu_keyboard)
+
+
+def clear_keyboard_cache() -> None:
+    """Tarjimalar yoki hafta indeksi o'zgarganda chaqiriladi."""
+    get_language_keyboard.cache_clear()
+    for builder in STATIC_KEYBOARDS + PARAMETRIZED_KEYBOARDS:
+        builder.cache_clear()
+
+
+def prebuild_keyboards() -> None:
+    """Statik klaviaturalarni barcha tillar uchun oldindan quradi (startupda)."""
+    from services.week_calendar import week_calendar
+
+    clear_keyboard_cache()
+    week_calendar.add_listener(get_week_pagination_keyboard.cache_clear)
+
+    get_language_keyboard()
+    for language in LANGUAGES:
+        for builder in STATIC_KEYBOARDS:
+            builder(language)
+        for hemis_connected, reminder_enabled in ((False, False), (True, False), (True, True)):
+            _get_profile_menu_keyboard(language, hemis_connected, reminder_enabled)
+
+
+def keyboard_cache_stats() -> Dict[str, Any]:
+    builders = (get_language_keyboard, *STATIC_KEYBOARDS, *PARAMETRIZED_KEYBOARDS)
+    infos = [builder.cache_info() for builder in builders]
+    hits = sum(info.hits for info in infos)
+    misses = sum(info.misses for info in infos)
+    return {
+        "name": "keyboards",
+        "size": sum(info.currsize for info in infos),
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+    }
@@ -1,13 +1,23 @@
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums.parse_mode import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
 
-from data.config import BOT_TOKEN
+from data.config import BOT_TOKEN, TELEGRAM_RATE, TELEGRAM_CHAT_RATE, THROTTLE_BURST, THROTTLE_RATE
+from middlewares.outgoing import OutgoingRateLimitMiddleware
+from middlewares.throttling import ThrottlingMiddleware
+from utils.fsm_storage import create_storage
 
 
 bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
 
-storage = MemoryStorage()
+# Barcha bot.send_* chaqiruvlari umumiy va har bir chat limitidan o'tadi
+outgoing_limiter = OutgoingRateLimitMiddleware(global_rate=TELEGRAM_RATE, chat_rate=TELEGRAM_CHAT_RATE)
+bot.session.middleware(outgoing_limiter)
+
+# Kiruvchi xabar/callback'lar uchun foydalanuvchi limiti (app.setup_middlewares da ulanadi)
+throttling = ThrottlingMiddleware(rate=THROTTLE_RATE, burst=THROTTLE_BURST)
+
+# FSM_STORAGE: db (standart) | redis | memory — restartdan keyin ham holatlar saqlanadi
+storage = create_storage()
 dispatcher = Dispatcher(storage=storage)
 
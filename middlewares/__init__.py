@@ -1 +1,3 @@
 from .throttling import ThrottlingMiddleware
+from .outgoing import OutgoingRateLimitMiddleware, bulk_sending
+from .user_context import UserMiddleware
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict
+
+from aiogram import Bot, methods
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+
+from utils.rate_limit import Priority, PriorityRateLimiter, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+_send_priority: ContextVar[Priority] = ContextVar("telegram_send_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def bulk_sending():
+    """Shu blok ichidagi (va undan yaratilgan task'lardagi) yuborishlar fon navbatiga tushadi.
+
+    Reklama, eslatmalar kabi ommaviy yuborishlar foydalanuvchilarga javoblarni
+    sekinlashtirmasligi uchun ishlatiladi::
+
+        with bulk_sending():
+            await asyncio.gather(*(bot.send_message(...) for ...))
+    """
+    token = _send_priority.set(Priority.BACKGROUND)
+    try:
+        yield
+    finally:
+        _send_priority.reset(token)
+
+
+class OutgoingRateLimitMiddleware(BaseRequestMiddleware):
+    """Bot sessiyasi uchun chiquvchi xabarlar rejalashtiruvchisi.
+
+    - Umumiy limit (``global_rate`` xabar/soniya) — ``PriorityRateLimiter``:
+      interaktiv javoblar ommaviy yuborishlardan oldin o'tadi, chatlar
+      orasida navbat adolatli taqsimlanadi.
+    - Har bir chat uchun alohida token bucket (shaxsiy chat ~1/s, guruhlar ~20/min).
+    - ``TelegramRetryAfter`` kelsa ko'rsatilgan vaqt kutilib, so'rov qayta yuboriladi.
+    """
+
+    # Faqat chatda yangi xabar paydo qiladigan metodlar cheklanadi. Edit, delete,
+    # sendChatAction, answerCallbackQuery va h.k. chat limitiga kirmaydi.
+    LIMITED_METHODS = frozenset(
+        {
+            methods.SendMessage,
+            methods.SendPhoto,
+            methods.SendDocument,
+            methods.SendVideo,
+            methods.SendAnimation,
+            methods.SendAudio,
+            methods.SendVoice,
+            methods.SendVideoNote,
+            methods.SendSticker,
+            methods.SendMediaGroup,
+            methods.SendLocation,
+            methods.SendVenue,
+            methods.SendContact,
+            methods.SendPoll,
+            methods.SendDice,
+            methods.SendInvoice,
+            methods.SendGame,
+            methods.CopyMessage,
+            methods.CopyMessages,
+            methods.ForwardMessage,
+            methods.ForwardMessages,
+        }
+    )
+
+    def __init__(
+        self,
+        global_rate: float = 25,
+        chat_rate: float = 1.0,
+        chat_burst: int = 3,
+        group_rate: float = 20 / 60,
+        max_retries: int = 3,
+        bucket_ttl: float = 300,
+    ):
+        self.limiter = PriorityRateLimiter(rate=global_rate, burst=max(1, int(global_rate)), name="telegram")
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.bucket_ttl = bucket_ttl
+
+        self._buckets: Dict[int, TokenBucket] = {}
+        self._last_used: Dict[int, float] = {}
+        self._last_sweep = time.monotonic()
+        self.retries = 0
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if type(method) not in self.LIMITED_METHODS:
+            return await make_request(bot, method)
+
+        chat_id = getattr(method, "chat_id", None)
+        priority = _send_priority.get()
+        attempt = 0
+
+        while True:
+            if isinstance(chat_id, int):
+                await self._chat_bucket(chat_id).acquire()
+            await self.limiter.acquire(priority, key=chat_id)
+
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                attempt += 1
+                self.retries += 1
+                if attempt > self.max_retries:
+                    raise
+                logger.warning(
+                    f"Telegram flood limit: {type(method).__name__} chat={chat_id}, "
+                    f"{e.retry_after}s kutamiz ({attempt}/{self.max_retries})"
+                )
+                await asyncio.sleep(e.retry_after)
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        now = time.monotonic()
+        if now - self._last_sweep > self.bucket_ttl:
+            self._sweep(now)
+
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            if chat_id < 0:
+                bucket = TokenBucket(self.group_rate, burst=self.chat_burst)
+            else:
+                bucket = TokenBucket(self.chat_rate, burst=self.chat_burst)
+            self._buckets[chat_id] = bucket
+        self._last_used[chat_id] = now
+        return bucket
+
+    def _sweep(self, now: float) -> None:
+        """Uzoq vaqt ishlatilmagan chat bucket'larini o'chiradi."""
+        for chat_id, last_used in list(self._last_used.items()):
+            if now - last_used > self.bucket_ttl:
+                self._buckets.pop(chat_id, None)
+                del self._last_used[chat_id]
+        self._last_sweep = now
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.limiter.stats()
+        stats["chats"] = len(self._buckets)
+        stats["retries"] = self.retries
+        return stats
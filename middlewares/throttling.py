@@ -1,28 +1,136 @@
+import sys
 import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict
 
+from aiogram.dispatcher.flags import get_flag
 from aiogram.dispatcher.middlewares.base import BaseMiddleware
-from aiogram.types import Message
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from utils.rate_limit import TokenBucket
+
+WARNING_TEXT = "Juda ko'p so'rov! Biroz kuting."
+
+
+class _UserEntry:
+    __slots__ = ("bucket", "last_seen", "warned_at")
+
+    def __init__(self, bucket: TokenBucket, now: float):
+        self.bucket = bucket
+        self.last_seen = now
+        self.warned_at = 0.0
 
 
 class ThrottlingMiddleware(BaseMiddleware):
-    def __init__(self, slow_mode_delay=0.5):
-        self.user_timeouts = {}
-        self.slow_mode_delay = slow_mode_delay
-        super(ThrottlingMiddleware, self).__init__()
-
-    async def __call__(self, handler, event: Message, data):
-        user_id = event.from_user.id
-        current_time = time.time()
-        
-        # Ushbu foydalanuvchining so'nggi so'rovi bo'yicha yozuv mavjudligini tekshirish
-        last_request_time = self.user_timeouts.get(user_id, 0)
-        if current_time - last_request_time < self.slow_mode_delay:
-            # Agar so'rovlar juda tez-tez bo'lsa, sekin rejimni yoqish
-            await event.reply("Juda ko'p so'rov! Biroz kuting.")
-            return
-        
-        else:
-            # Oxirgi so'rovning vaqtini yangilash
-            self.user_timeouts[user_id] = current_time
-            # Event ni handlerga o'tkazish
+    """Kiruvchi xabar va callback'lar uchun foydalanuvchi bo'yicha token bucket.
+
+    Har bir foydalanuvchida ``rate`` token/soniya, ko'pi bilan ``burst`` token.
+    Handler narxi ``throttling_cost`` flag'i bilan beriladi (standart 1)::
+
+        @router.callback_query(F.data == "...", flags={"throttling_cost": 4})
+
+    Token yetmasa update tashlanadi (callback matnsiz javoblanadi);
+    ogohlantirish foydalanuvchiga ``warn_interval`` soniyada ko'pi bilan bir
+    marta yuboriladi. ``idle_ttl``
+    soniya faol bo'lmagan foydalanuvchilar xotiradan o'chiriladi.
+
+    Bitta obyekt ``dispatcher.message`` va ``dispatcher.callback_query`` ga
+    ulanadi — limit ikkalasi uchun umumiy.
+    """
+
+    def __init__(
+        self,
+        rate: float = 2.0,
+        burst: int = 6,
+        idle_ttl: float = 300,
+        warn_interval: float = 10,
+        max_users: int = 50_000,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.idle_ttl = idle_ttl
+        self.warn_interval = warn_interval
+        self.max_users = max_users
+
+        # user_id -> holat; oxirgi faol foydalanuvchi oxirida (LRU)
+        self._users: "OrderedDict[int, _UserEntry]" = OrderedDict()
+        self.allowed = 0
+        self.dropped = 0
+        self.warnings = 0
+        self.evicted = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        from_user = data.get("event_from_user")
+        if from_user is None:
+            return await handler(event, data)
+
+        now = time.monotonic()
+        entry = self._entry(from_user.id, now)
+        cost = min(float(get_flag(data, "throttling_cost", default=1)), self.burst)
+
+        if entry.bucket.consume(cost):
+            self.allowed += 1
             return await handler(event, data)
+
+        self.dropped += 1
+        warn = now - entry.warned_at >= self.warn_interval
+        if warn:
+            entry.warned_at = now
+            self.warnings += 1
+        await self._reject(event, warn)
+
+    async def _reject(self, event: TelegramObject, warn: bool) -> None:
+        """Tashlangan update: callback har doim javoblanadi (tugma "yuklanmoqda"
+        holatida qolmasin), ogohlantirish matni esa faqat ``warn`` bo'lsa."""
+        try:
+            if isinstance(event, CallbackQuery):
+                await event.answer(WARNING_TEXT if warn else None)
+            elif warn and isinstance(event, Message):
+                await event.reply(WARNING_TEXT)
+        except Exception:
+            pass
+
+    def _entry(self, user_id: int, now: float) -> _UserEntry:
+        entry = self._users.get(user_id)
+        if entry is None:
+            entry = self._users[user_id] = _UserEntry(TokenBucket(self.rate, burst=self.burst), now)
+        else:
+            self._users.move_to_end(user_id)
+            entry.last_seen = now
+        # Joriy foydalanuvchi endi oxirida — o'chirilmaydi
+        self._evict(now)
+        return entry
+
+    def _evict(self, now: float) -> None:
+        """Eng eski (boshidagi) faol bo'lmagan foydalanuvchilarni o'chiradi."""
+        while self._users:
+            user_id, entry = next(iter(self._users.items()))
+            if now - entry.last_seen <= self.idle_ttl and len(self._users) <= self.max_users:
+                break
+            del self._users[user_id]
+            self.evicted += 1
+
+    def memory_bytes(self) -> int:
+        """Taxminiy xotira: lug'at + har bir foydalanuvchi yozuvi va bucket'i."""
+        size = sys.getsizeof(self._users)
+        if self._users:
+            sample = next(iter(self._users.values()))
+            per_user = sys.getsizeof(sample) + sys.getsizeof(sample.bucket) + sys.getsizeof(sample.bucket.__dict__)
+            size += per_user * len(self._users)
+        return size
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": "throttling",
+            "users": len(self._users),
+            "memory_bytes": self.memory_bytes(),
+            "allowed": self.allowed,
+            "dropped": self.dropped,
+            "warnings": self.warnings,
+            "evicted": self.evicted,
+        }
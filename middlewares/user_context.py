@@ -0,0 +1,25 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram.dispatcher.middlewares.base import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from services.user_cache import user_cache
+
+
+class UserMiddleware(BaseMiddleware):
+    """Har bir update uchun bazadagi foydalanuvchini (guruhi bilan) bir marta yuklaydi.
+
+    ``dispatcher.update.outer_middleware`` sifatida o'rnatiladi: handler'lar
+    ``user: Optional[User]`` argumentini oladi (ro'yxatdan o'tmagan bo'lsa None).
+    Yuklash ``user_cache`` orqali — issiq keshda DB ga so'rov yo'q.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        from_user = data.get("event_from_user")
+        data["user"] = await user_cache.get(from_user.id) if from_user else None
+        return await handler(event, data)
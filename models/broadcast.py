@@ -0,0 +1,34 @@
+from tortoise.models import Model
+from tortoise import fields
+
+
+class Broadcast(Model):
+    """Admin broadcast (/reklama) copied from the admin's original post"""
+
+    id = fields.IntField(pk=True)
+
+    admin_chat_id = fields.BigIntField()
+    from_chat_id = fields.BigIntField()
+    message_id = fields.IntField()
+    progress_message_id = fields.IntField(null=True)
+
+    # pending → running → done | cancelled | failed
+    status = fields.CharField(max_length=20, default="pending", index=True)
+
+    # Qabul qiluvchilar outbox'ga ko'chirilganmi va qaysi User.id gacha
+    enqueued = fields.BooleanField(default=False)
+    last_user_id = fields.IntField(default=0)
+
+    total = fields.IntField(default=0)
+    delivered = fields.IntField(default=0)
+    blocked = fields.IntField(default=0)
+    failed = fields.IntField(default=0)
+
+    created_at = fields.DatetimeField(auto_now_add=True)
+    finished_at = fields.DatetimeField(null=True)
+
+    class Meta:
+        table = "broadcasts"
+
+    def __str__(self):
+        return f"Broadcast #{self.id} ({self.status})"
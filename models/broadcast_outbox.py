@@ -0,0 +1,27 @@
+from tortoise.models import Model
+from tortoise import fields
+
+
+class BroadcastOutbox(Model):
+    """One recipient of a broadcast and its delivery status"""
+
+    id = fields.IntField(pk=True)
+
+    broadcast: fields.ForeignKeyRelation["Broadcast"] = fields.ForeignKeyField(
+        "models.Broadcast",
+        related_name="outbox"
+    )
+
+    telegram_id = fields.BigIntField()
+
+    # pending | delivered | blocked | failed
+    status = fields.CharField(max_length=20, default="pending")
+    error = fields.CharField(max_length=255, null=True)
+
+    class Meta:
+        table = "broadcast_outbox"
+        unique_together = ("broadcast", "telegram_id")
+        indexes = (("broadcast", "status", "id"),)
+
+    def __str__(self):
+        return f"{self.broadcast_id} → {self.telegram_id}: {self.status}"
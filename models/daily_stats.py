@@ -0,0 +1,21 @@
+from tortoise.models import Model
+from tortoise import fields
+
+
+class DailyStats(Model):
+    """Daily rollup of user counts (finished days only)"""
+
+    id = fields.IntField(pk=True)
+
+    day = fields.DateField(unique=True)
+
+    new_users = fields.IntField(default=0)
+    total_users = fields.IntField(default=0)
+
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta:
+        table = "daily_stats"
+
+    def __str__(self):
+        return f"{self.day}: +{self.new_users} ({self.total_users})"
@@ -0,0 +1,21 @@
+from tortoise.models import Model
+from tortoise import fields
+
+
+class FSMState(Model):
+    """Persisted aiogram FSM state and data of one chat/user key"""
+
+    id = fields.IntField(pk=True)
+
+    key = fields.CharField(max_length=255, unique=True)
+    state = fields.CharField(max_length=255, null=True)
+    # Ixcham JSON (katta bo'lsa zlib bilan siqilgan) — utils/fsm_storage.py
+    data = fields.BinaryField(null=True)
+
+    expires_at = fields.DatetimeField(index=True)
+
+    class Meta:
+        table = "fsm_states"
+
+    def __str__(self):
+        return f"{self.key}: {self.state}"
@@ -0,0 +1,21 @@
+from tortoise.models import Model
+from tortoise import fields
+
+
+class HemisSession(Model):
+    """Authenticated HEMIS cookie jar of a user"""
+
+    id = fields.IntField(pk=True)
+
+    telegram_id = fields.BigIntField(unique=True)
+
+    cookies = fields.JSONField(default=dict)
+
+    created_at = fields.DatetimeField(auto_now_add=True)
+    updated_at = fields.DatetimeField(auto_now=True)
+
+    class Meta:
+        table = "hemis_sessions"
+
+    def __str__(self):
+        return f"HEMIS session {self.telegram_id}"
@@ -35,7 +35,10 @@ class Schedule(Model):
 
     class Meta:
         table = "schedules"
+        # (group_id, week_id, day, pair_number) — guruh/hafta/kun bo'yicha qidiruv va tartiblash
         unique_together = ("group", "week", "day", "pair_number")
+        # Hafta bo'yicha: eslatmalar (week, day, group_id IN ...) va eski haftalarni tozalash
+        indexes = (("week_id", "day", "group_id", "pair_number"),)
 
     def __str__(self):
         return f"{self.subject} ({self.day})"
\ No newline at end of file
@@ -0,0 +1,29 @@
+from tortoise.models import Model
+from tortoise import fields
+
+
+class ScheduleVersion(Model):
+    """Content hash of the stored lessons of a (group, week)"""
+
+    id = fields.IntField(pk=True)
+
+    group: fields.ForeignKeyRelation["Group"] = fields.ForeignKeyField(
+        "models.Group",
+        related_name="schedule_versions"
+    )
+
+    week: fields.ForeignKeyRelation["Week"] = fields.ForeignKeyField(
+        "models.Week",
+        related_name="schedule_versions"
+    )
+
+    content_hash = fields.CharField(max_length=64)
+
+    updated_at = fields.DatetimeField(auto_now=True)
+
+    class Meta:
+        table = "schedule_versions"
+        unique_together = ("group", "week")
+
+    def __str__(self):
+        return f"{self.group_id}/{self.week_id}: {self.content_hash[:12]}"
@@ -25,11 +25,13 @@ class User(Model):
         source_field="group_id"
     )
 
-    created_at = fields.DatetimeField(auto_now_add=True)
+    created_at = fields.DatetimeField(auto_now_add=True, index=True)
     updated_at = fields.DatetimeField(auto_now=True)
 
     class Meta:
         table = "users"
+        # Eslatmalar: reminder_enabled=True AND group_id IS NOT NULL
+        indexes = (("reminder_enabled", "group_id"),)
 
     def __str__(self):
         return f"{self.telegram_id} - {self.full_name}"
\ No newline at end of file
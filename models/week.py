@@ -7,7 +7,7 @@ class Week(Model):
 
     id = fields.IntField(pk=True)
 
-    week_number = fields.IntField()
+    week_number = fields.IntField(index=True)
     start_date = fields.DateField(null=True)
     end_date = fields.DateField(null=True)
 
@@ -0,0 +1,297 @@
+"""Reklama (broadcast) yuborish: doimiy outbox + fon worker
+
+Jarayon:
+1. ``start_broadcast`` — ``Broadcast`` yozuvi yaratiladi va worker ishga tushadi.
+2. Worker foydalanuvchilarni keyset pagination (``User.id > cursor``) bilan
+   ``BroadcastOutbox`` ga ko'chiradi — xotiraga hammasi yuklanmaydi.
+3. ``pending`` qatorlar partiyalab olinadi va admin postidan ``copy_message``
+   bilan yuboriladi; natija har bir partiyadan keyin DB ga yoziladi.
+4. Jarayon to'xtab qolsa (restart), ``resume_broadcasts`` tugallanmagan
+   reklamalarni qolgan joyidan davom ettiradi. Eng ko'pi bilan bitta
+   partiya qayta yuborilishi mumkin.
+
+Yuborish tezligini ``loader.outgoing_limiter`` boshqaradi (``bulk_sending``).
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from html import escape
+from typing import Dict, List
+
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from tortoise.expressions import F
+from tortoise.transactions import in_transaction
+
+from loader import bot
+from middlewares.outgoing import bulk_sending
+from models.broadcast import Broadcast
+from models.broadcast_outbox import BroadcastOutbox
+from models.user import User
+
+logger = logging.getLogger(__name__)
+
+ENQUEUE_BATCH = 1000
+SEND_BATCH = 200
+SEND_CONCURRENCY = 25
+PROGRESS_INTERVAL = 5  # soniya
+
+_workers: Dict[int, asyncio.Task] = {}
+
+
+# ---------------------------------------------------------------------------
+# Ommaviy API
+# ---------------------------------------------------------------------------
+
+async def start_broadcast(admin_chat_id: int, from_chat_id: int, message_id: int) -> Broadcast:
+    """Yangi reklama yaratadi, progress xabarini yuboradi va workerni ishga tushiradi."""
+    broadcast = await Broadcast.create(
+        admin_chat_id=admin_chat_id,
+        from_chat_id=from_chat_id,
+        message_id=message_id,
+        status="running",
+    )
+    progress = await bot.send_message(admin_chat_id, _progress_text(broadcast, 0.0))
+    broadcast.progress_message_id = progress.message_id
+    await broadcast.save(update_fields=["progress_message_id"])
+
+    _spawn(broadcast)
+    return broadcast
+
+
+async def resume_broadcasts() -> int:
+    """Ishga tushganda tugallanmagan reklamalarni davom ettiradi."""
+    unfinished = await Broadcast.filter(status="running")
+    for broadcast in unfinished:
+        logger.info(f"Reklama #{broadcast.id} davom ettirilmoqda")
+        _spawn(broadcast)
+    return len(unfinished)
+
+
+async def cancel_broadcast(broadcast_id: int) -> bool:
+    """Reklamani to'xtatadi — qolgan qabul qiluvchilarga yuborilmaydi."""
+    updated = await Broadcast.filter(id=broadcast_id, status="running").update(status="cancelled")
+    task = _workers.get(broadcast_id)
+    if task is not None:
+        task.cancel()
+    return bool(updated)
+
+
+async def stop_workers() -> None:
+    """Shutdown: workerlar to'xtatiladi, holat DB da qoladi (keyingi ishga tushishda davom etadi)."""
+    tasks = list(_workers.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+
+def _spawn(broadcast: Broadcast) -> None:
+    if broadcast.id in _workers and not _workers[broadcast.id].done():
+        return
+    task = asyncio.create_task(_run(broadcast))
+    _workers[broadcast.id] = task
+    task.add_done_callback(lambda done: _forget_worker(broadcast.id, done))
+
+
+def _forget_worker(broadcast_id: int, task: asyncio.Task) -> None:
+    # Shu orada qayta ishga tushirilgan worker ro'yxatdan o'chirilmasin
+    if _workers.get(broadcast_id) is task:
+        del _workers[broadcast_id]
+
+
+async def _run(broadcast: Broadcast) -> None:
+    try:
+        if not broadcast.enqueued:
+            await _enqueue_recipients(broadcast)
+        await _deliver(broadcast)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.exception(f"Reklama #{broadcast.id} xatoligi: {e}")
+        await _fail(broadcast, e)
+        return
+
+    # /reklama_stop shu orada bosilgan bo'lsa "cancelled" saqlanib qoladi
+    finished_at = datetime.now(timezone.utc)
+    if not await Broadcast.filter(id=broadcast.id, status="running").update(status="done", finished_at=finished_at):
+        logger.info(f"Reklama #{broadcast.id} to'xtatilgan, yakuniy holat o'zgartirilmadi")
+        return
+    broadcast.status = "done"
+    broadcast.finished_at = finished_at
+    await _update_progress(broadcast, rate=0.0, final=True)
+    logger.info(
+        f"Reklama #{broadcast.id} tugadi: {broadcast.delivered} yetkazildi, "
+        f"{broadcast.blocked} bloklagan, {broadcast.failed} xatolik"
+    )
+
+
+async def _fail(broadcast: Broadcast, error: Exception) -> None:
+    """Worker yiqildi: holat "failed" bo'ladi (resume qilinmaydi) va adminga xabar beriladi."""
+    try:
+        updated = await Broadcast.filter(id=broadcast.id, status="running").update(
+            status="failed", finished_at=datetime.now(timezone.utc)
+        )
+    except Exception as e:
+        logger.error(f"Reklama #{broadcast.id} holatini saqlab bo'lmadi: {e}")
+        updated = 0
+    if not updated:
+        return
+    broadcast.status = "failed"
+
+    done = broadcast.delivered + broadcast.blocked + broadcast.failed
+    try:
+        await bot.send_message(
+            broadcast.admin_chat_id,
+            f"❌ <b>Reklama #{broadcast.id} xatolik bilan to'xtadi</b>\n\n"
+            f"Yuborildi: {done}/{broadcast.total or 0}\n"
+            f"Xatolik: {escape(str(error)[:200])}",
+        )
+    except Exception as e:
+        logger.warning(f"Reklama #{broadcast.id} xatoligi haqida adminga yozib bo'lmadi: {e}")
+
+
+async def _enqueue_recipients(broadcast: Broadcast) -> None:
+    """Foydalanuvchilarni keyset pagination bilan outbox'ga ko'chiradi."""
+    while True:
+        rows = await User.filter(id__gt=broadcast.last_user_id).order_by("id").limit(ENQUEUE_BATCH).values_list(
+            "id", "telegram_id"
+        )
+        if not rows:
+            break
+
+        await BroadcastOutbox.bulk_create(
+            [BroadcastOutbox(broadcast_id=broadcast.id, telegram_id=telegram_id) for _, telegram_id in rows],
+            ignore_conflicts=True,
+        )
+        broadcast.last_user_id = rows[-1][0]
+        await broadcast.save(update_fields=["last_user_id"])
+
+    broadcast.total = await BroadcastOutbox.filter(broadcast_id=broadcast.id).count()
+    broadcast.enqueued = True
+    await broadcast.save(update_fields=["total", "enqueued"])
+
+
+async def _deliver(broadcast: Broadcast) -> None:
+    semaphore = asyncio.Semaphore(SEND_CONCURRENCY)
+    started = time.monotonic()
+    sent_this_run = 0
+    last_progress = 0.0
+    cursor = 0
+
+    async def send(row) -> tuple:
+        row_id, chat_id = row
+        async with semaphore:
+            try:
+                await bot.copy_message(
+                    chat_id=chat_id,
+                    from_chat_id=broadcast.from_chat_id,
+                    message_id=broadcast.message_id,
+                )
+                return row_id, "delivered", None
+            except TelegramForbiddenError:
+                return row_id, "blocked", None
+            except TelegramBadRequest as e:
+                return row_id, "failed", str(e)[:255]
+            except Exception as e:
+                logger.warning(f"Reklama #{broadcast.id} → {chat_id}: {e}")
+                return row_id, "failed", str(e)[:255]
+
+    while True:
+        rows = await BroadcastOutbox.filter(
+            broadcast_id=broadcast.id, status="pending", id__gt=cursor
+        ).order_by("id").limit(SEND_BATCH).values_list("id", "telegram_id")
+        if not rows:
+            break
+        cursor = rows[-1][0]
+
+        with bulk_sending():
+            results = await asyncio.gather(*(send(row) for row in rows))
+
+        await _record(broadcast, results)
+        sent_this_run += len(results)
+
+        now = time.monotonic()
+        if now - last_progress >= PROGRESS_INTERVAL:
+            last_progress = now
+            await _update_progress(broadcast, rate=sent_this_run / max(now - started, 1e-6))
+
+
+async def _record(broadcast: Broadcast, results: List[tuple]) -> None:
+    by_status: Dict[str, List[int]] = {"delivered": [], "blocked": [], "failed": []}
+    errors = []
+    for row_id, status, error in results:
+        by_status[status].append(row_id)
+        if error:
+            errors.append((row_id, error))
+
+    async with in_transaction() as conn:
+        for status, ids in by_status.items():
+            if ids:
+                await BroadcastOutbox.filter(id__in=ids).using_db(conn).update(status=status)
+        for row_id, error in errors:
+            await BroadcastOutbox.filter(id=row_id).using_db(conn).update(error=error)
+
+        await Broadcast.filter(id=broadcast.id).using_db(conn).update(
+            delivered=F("delivered") + len(by_status["delivered"]),
+            blocked=F("blocked") + len(by_status["blocked"]),
+            failed=F("failed") + len(by_status["failed"]),
+        )
+    broadcast.delivered += len(by_status["delivered"])
+    broadcast.blocked += len(by_status["blocked"])
+    broadcast.failed += len(by_status["failed"])
+
+
+# ---------------------------------------------------------------------------
+# Progress xabari
+# ---------------------------------------------------------------------------
+
+def _progress_text(broadcast: Broadcast, rate: float, final: bool = False) -> str:
+    done = broadcast.delivered + broadcast.blocked + broadcast.failed
+    total = broadcast.total or 0
+    percent = (done / total * 100) if total else 0.0
+
+    if final:
+        header = "✅ <b>REKLAMA YUBORILDI</b>"
+    elif not broadcast.enqueued:
+        header = "⏳ <b>Reklama tayyorlanmoqda...</b>"
+    else:
+        header = "⏳ <b>Reklama yuborilmoqda...</b>"
+
+    lines = [
+        header,
+        "",
+        "━━━━━━━━━━━━━━━━━━━━",
+        f"✅ Yetkazildi: {broadcast.delivered} ta",
+        f"🚫 Bloklagan: {broadcast.blocked} ta",
+        f"❌ Xatolik: {broadcast.failed} ta",
+        f"📊 Jami: {done}/{total} ({percent:.0f}%)",
+    ]
+    if not final and rate > 0:
+        remaining = max(total - done, 0)
+        eta = int(remaining / rate)
+        lines.append(f"⚡ Tezlik: {rate:.1f} xabar/s")
+        lines.append(f"⏱ Qoldi: ~{eta // 60} daq {eta % 60} s")
+    lines.append("━━━━━━━━━━━━━━━━━━━━")
+    return "\n".join(lines)
+
+
+async def _update_progress(broadcast: Broadcast, rate: float, final: bool = False) -> None:
+    if not broadcast.progress_message_id:
+        return
+    try:
+        await bot.edit_message_text(
+            _progress_text(broadcast, rate, final),
+            chat_id=broadcast.admin_chat_id,
+            message_id=broadcast.progress_message_id,
+        )
+    except TelegramBadRequest:
+        # "message is not modified" yoki xabar o'chirilgan
+        pass
+    except Exception as e:
+        logger.warning(f"Reklama #{broadcast.id} progress xabari: {e}")
+
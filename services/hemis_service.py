@@ -1,15 +1,20 @@
 import logging
-import requests
 import re
-import time
 import asyncio
-from datetime import datetime
+from datetime import date
 from bs4 import BeautifulSoup
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, Hashable, List, Tuple, Optional, Union
+
+import aiohttp
+from yarl import URL
+
+from data.config import HEMIS_RATE, HEMIS_BURST
+from utils.rate_limit import Priority, PriorityRateLimiter
 
 # ---------------------------------------------------------------------------
 # URLs
 # ---------------------------------------------------------------------------
+HEMIS_ORIGIN  = "https://student.ukiu.uz"
 LOGIN_URL     = "https://student.ukiu.uz/dashboard/login"
 CAPTCHA_URL   = "https://student.ukiu.uz/dashboard/captcha"
 TIMETABLE_URL = "https://student.ukiu.uz/education/time-table"
@@ -22,63 +27,160 @@ logger = logging.getLogger(__name__)
 # ---------------------------------------------------------------------------
 # Rate limiter
 # ---------------------------------------------------------------------------
-_hemis_lock        = asyncio.Lock()
-_last_request_time = 0.0
-_MIN_INTERVAL      = 2.0  # soniya
+# Barcha chiquvchi HEMIS so'rovlari shu navbatdan o'tadi: captcha/login kabi
+# interaktiv so'rovlar fon yangilanishlaridan oldin, foydalanuvchilar esa
+# navbatma-navbat xizmat qilinadi. Statistikasi: ``hemis_limiter.stats()``.
+hemis_limiter = PriorityRateLimiter(rate=HEMIS_RATE, burst=HEMIS_BURST, name="hemis")
+
+
+# ---------------------------------------------------------------------------
+# Connection pool
+# ---------------------------------------------------------------------------
+_POOL_LIMIT = 20
+_TIMEOUT    = aiohttp.ClientTimeout(total=15)
+_connector: Optional[aiohttp.TCPConnector] = None
+
+
+def _get_connector() -> aiohttp.TCPConnector:
+    """Barcha HEMIS sessiyalari uchun umumiy keep-alive TCP connector."""
+    global _connector
+    if _connector is None or _connector.closed:
+        _connector = aiohttp.TCPConnector(
+            limit=_POOL_LIMIT,
+            limit_per_host=_POOL_LIMIT,
+            ttl_dns_cache=300,
+        )
+    return _connector
+
+
+async def close_connector() -> None:
+    """Bot to'xtaganda umumiy connector'ni yopadi."""
+    global _connector
+    if _connector is not None and not _connector.closed:
+        await _connector.close()
+    _connector = None
+
+
+class HemisSessionExpiredError(Exception):
+    """HEMIS sessiyasi tugagan — so'rov login sahifasiga yo'naltirildi."""
+    pass
+
 
+class HemisUnavailableError(Exception):
+    """HEMIS javob bermadi (timeout, tarmoq xatoligi yoki 200 bo'lmagan status).
 
-def _wait():
-    """Kerak bo'lsa minimal interval kutadi."""
-    global _last_request_time
-    elapsed = time.time() - _last_request_time
-    if elapsed < _MIN_INTERVAL:
-        time.sleep(_MIN_INTERVAL - elapsed)
-    _last_request_time = time.time()
+    Bo'sh ro'yxat qaytarilmaydi — aks holda "jadval bo'sh" bilan farqlab
+    bo'lmaydi va ``replace=True`` saqlangan darslarni o'chirib yuboradi.
+    """
+    pass
 
 
-def _get(session: requests.Session, url: str, **kwargs) -> requests.Response:
-    _wait()
-    return session.get(url, **kwargs)
+class HemisResponse:
+    """To'liq o'qib bo'lingan HEMIS javobi.
 
+    aiohttp javobi ``async with`` blokidan chiqqach yopiladi, shuning uchun
+    parserlar ishlatadigan maydonlarni shu yerda saqlab qo'yamiz.
+    """
 
-def _post(session: requests.Session, url: str, **kwargs) -> requests.Response:
-    _wait()
-    return session.post(url, **kwargs)
+    __slots__ = ("status_code", "url", "headers", "content", "encoding")
+
+    def __init__(self, status_code: int, url: str, headers, content: bytes, encoding: str):
+        self.status_code = status_code
+        self.url = url
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+
+async def _request(
+    session: aiohttp.ClientSession,
+    method: str,
+    url: str,
+    priority: Priority = Priority.INTERACTIVE,
+    user_key: Hashable = None,
+    **kwargs,
+) -> HemisResponse:
+    await hemis_limiter.acquire(priority, user_key)
+    async with session.request(method, url, **kwargs) as response:
+        content = await response.read()
+        return HemisResponse(
+            status_code=response.status,
+            url=str(response.url),
+            headers=response.headers,
+            content=content,
+            encoding=response.charset or "utf-8",
+        )
+
+
+async def _get(session: aiohttp.ClientSession, url: str, **kwargs) -> HemisResponse:
+    return await _request(session, "GET", url, **kwargs)
+
+
+async def _post(session: aiohttp.ClientSession, url: str, **kwargs) -> HemisResponse:
+    return await _request(session, "POST", url, **kwargs)
 
 
 # ---------------------------------------------------------------------------
 # Session
 # ---------------------------------------------------------------------------
 
-def create_session() -> requests.Session:
-    session = requests.Session()
-    session.headers.update({
-        "User-Agent":                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Accept":                    "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language":           "uz,ru;q=0.9,en;q=0.8",
-        "Accept-Encoding":           "gzip, deflate, br",
-        "Connection":                "keep-alive",
-        "Upgrade-Insecure-Requests": "1",
-        "Sec-Fetch-Dest":            "document",
-        "Sec-Fetch-Mode":            "navigate",
-        "Sec-Fetch-Site":            "none",
-        "Sec-Fetch-User":            "?1",
-        "Cache-Control":             "max-age=0",
-    })
+_HEADERS = {
+    "User-Agent":                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept":                    "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language":           "uz,ru;q=0.9,en;q=0.8",
+    "Accept-Encoding":           "gzip, deflate",
+    "Upgrade-Insecure-Requests": "1",
+    "Sec-Fetch-Dest":            "document",
+    "Sec-Fetch-Mode":            "navigate",
+    "Sec-Fetch-Site":            "none",
+    "Sec-Fetch-User":            "?1",
+    "Cache-Control":             "max-age=0",
+}
+
+
+def create_session(cookies: Optional[Dict[str, str]] = None) -> aiohttp.ClientSession:
+    """Yangi HEMIS sessiyasi (o'z cookie jar'i bilan, umumiy connector ustida).
+
+    ``cookies`` berilsa — captcha bosqichida olingan cookie'lar tiklanadi.
+    Sessiyani ``async with`` bilan yoki ``await session.close()`` orqali yoping;
+    connector umumiy bo'lgani uchun u yopilmaydi.
+    """
+    session = aiohttp.ClientSession(
+        connector=_get_connector(),
+        connector_owner=False,
+        timeout=_TIMEOUT,
+        headers=_HEADERS,
+        cookie_jar=aiohttp.CookieJar(),
+    )
+    if cookies:
+        session.cookie_jar.update_cookies(cookies, response_url=URL(HEMIS_ORIGIN))
     return session
 
 
+def get_session_cookies(session: aiohttp.ClientSession) -> Dict[str, str]:
+    """Sessiya cookie'larini oddiy dict ko'rinishida qaytaradi (FSM state uchun)."""
+    return {cookie.key: cookie.value for cookie in session.cookie_jar}
+
+
 # ---------------------------------------------------------------------------
 # Captcha
 # ---------------------------------------------------------------------------
 
-def get_hemis_captcha(
-    session: requests.Session,
+async def get_hemis_captcha(
+    session: aiohttp.ClientSession,
+    priority: Priority = Priority.INTERACTIVE,
+    user_key: Hashable = None,
 ) -> Tuple[Optional[str], Optional[bytes], Optional[Dict]]:
     try:
         logger.info("Login sahifasi yuklanmoqda...")
-        response = _get(session, LOGIN_URL, timeout=15)
-        response.raise_for_status()
+        response = await _get(session, LOGIN_URL, priority=priority, user_key=user_key)
+        if response.status_code >= 400:
+            logger.error(f"Login sahifasi xatoligi: {response.status_code}")
+            return None, None, None
 
         csrf = None
         for pattern in [
@@ -96,19 +198,21 @@ def get_hemis_captcha(
             return None, None, None
 
         logger.info(f"CSRF token olindi: {csrf[:20]}...")
-        time.sleep(1.5)
+        await asyncio.sleep(1.5)
 
         logger.info("Captcha yuklanmoqda...")
-        captcha_response = _get(session, CAPTCHA_URL, timeout=15)
-        captcha_response.raise_for_status()
+        captcha_response = await _get(session, CAPTCHA_URL, priority=priority, user_key=user_key)
+        if captcha_response.status_code >= 400:
+            logger.error(f"Captcha xatoligi: {captcha_response.status_code}")
+            return None, None, None
         logger.info(f"Captcha olindi: {len(captcha_response.content)} bytes")
 
-        return csrf, captcha_response.content, session.cookies.get_dict()
+        return csrf, captcha_response.content, get_session_cookies(session)
 
-    except requests.exceptions.Timeout:
+    except asyncio.TimeoutError:
         logger.error("HEMIS so'rovi timeout")
         return None, None, None
-    except requests.exceptions.RequestException as e:
+    except aiohttp.ClientError as e:
         logger.error(f"Tarmoq xatoligi (captcha): {e}")
         return None, None, None
     except Exception as e:
@@ -120,17 +224,21 @@ def get_hemis_captcha(
 # Login
 # ---------------------------------------------------------------------------
 
-def hemis_login(
-    session: requests.Session,
+async def hemis_login(
+    session: aiohttp.ClientSession,
     csrf: str,
     login: str,
     password: str,
     captcha_code: str,
+    priority: Priority = Priority.INTERACTIVE,
+    user_key: Hashable = None,
 ) -> Tuple[bool, Optional[str]]:
     try:
-        response = _post(
+        response = await _post(
             session,
             LOGIN_URL,
+            priority=priority,
+            user_key=user_key,
             data={
                 "_csrf-frontend":              csrf,
                 "FormStudentLogin[login]":     login,
@@ -139,16 +247,15 @@ def hemis_login(
             },
             headers={
                 "Referer":      LOGIN_URL,
-                "Origin":       "https://student.ukiu.uz",
+                "Origin":       HEMIS_ORIGIN,
                 "Content-Type": "application/x-www-form-urlencoded",
             },
             allow_redirects=True,
-            timeout=15,
         )
-    except requests.exceptions.Timeout:
+    except asyncio.TimeoutError:
         logger.error("Login so'rovi timeout")
         return False, "Server javob bermadi. Qaytadan urinib ko'ring."
-    except requests.exceptions.RequestException as e:
+    except aiohttp.ClientError as e:
         logger.error(f"Login tarmoq xatoligi: {e}")
         return False, "Tarmoq xatoligi. Qaytadan urinib ko'ring."
 
@@ -168,28 +275,35 @@ def hemis_login(
 # Jadval
 # ---------------------------------------------------------------------------
 
-def fetch_schedule(session: requests.Session, week_id: str = None) -> List[Dict]:
+async def fetch_schedule(
+    session: aiohttp.ClientSession,
+    week_id: str = None,
+    priority: Priority = Priority.INTERACTIVE,
+    user_key: Hashable = None,
+) -> List[Dict]:
     url = f"{TIMETABLE_URL}?week={week_id}" if week_id else TIMETABLE_URL
     logger.info(f"Jadval yuklanmoqda: {url}")
 
     try:
-        response = _get(session, url, allow_redirects=True, timeout=15)
-    except requests.exceptions.Timeout:
+        response = await _get(session, url, priority=priority, user_key=user_key, allow_redirects=True)
+    except asyncio.TimeoutError as e:
         logger.error("Jadval so'rovi timeout")
-        return []
-    except requests.exceptions.RequestException as e:
+        raise HemisUnavailableError("Jadval so'rovi timeout") from e
+    except aiohttp.ClientError as e:
         logger.error(f"Jadval tarmoq xatoligi: {e}")
-        return []
+        raise HemisUnavailableError(f"Jadval tarmoq xatoligi: {e}") from e
 
     if "login" in response.url.lower():
-        logger.error("Session tugagan — login sahifasiga yo'naltirildi")
-        return []
+        logger.warning("Session tugagan — login sahifasiga yo'naltirildi")
+        raise HemisSessionExpiredError()
 
     if response.status_code != 200:
         logger.error(f"Jadval sahifasi xatoligi: {response.status_code}")
-        return []
+        raise HemisUnavailableError(f"Jadval sahifasi xatoligi: {response.status_code}")
 
     soup = BeautifulSoup(response.text, "html.parser")
+    _harvest_week_options(soup)
+
     days = soup.select("div.box.box-success.sh")
     logger.info(f"{len(days)} ta kun topildi")
 
@@ -234,9 +348,13 @@ def fetch_schedule(session: requests.Session, week_id: str = None) -> List[Dict]
 # Yordamchi funksiyalar
 # ---------------------------------------------------------------------------
 
-def get_student_group(session: requests.Session) -> Optional[str]:
+async def get_student_group(
+    session: aiohttp.ClientSession,
+    priority: Priority = Priority.INTERACTIVE,
+    user_key: Hashable = None,
+) -> Optional[str]:
     try:
-        response = _get(session, DASHBOARD_URL, timeout=15)
+        response = await _get(session, DASHBOARD_URL, priority=priority, user_key=user_key)
         if response.status_code != 200:
             return None
 
@@ -257,9 +375,13 @@ def get_student_group(session: requests.Session) -> Optional[str]:
         return None
 
 
-def check_login_status(session: requests.Session) -> bool:
+async def check_login_status(
+    session: aiohttp.ClientSession,
+    priority: Priority = Priority.INTERACTIVE,
+    user_key: Hashable = None,
+) -> bool:
     try:
-        response = _get(session, DASHBOARD_URL, timeout=15, allow_redirects=False)
+        response = await _get(session, DASHBOARD_URL, priority=priority, user_key=user_key, allow_redirects=False)
 
         if response.status_code in [301, 302, 303, 307, 308]:
             if "login" in response.headers.get("Location", "").lower():
@@ -271,35 +393,80 @@ def check_login_status(session: requests.Session) -> bool:
         return False
 
 
-def get_current_week_id(session: requests.Session) -> Optional[str]:
-    try:
-        response = _get(session, TIMETABLE_URL, timeout=15)
-    except Exception as e:
-        logger.error(f"get_current_week_id xatoligi: {e}")
-        return None
+# ---------------------------------------------------------------------------
+# Hafta tanlash (<select>) — hafta ID ↔ sana
+# ---------------------------------------------------------------------------
+
+_MONTHS = {
+    "yanvar": 1,   "fevral": 2,   "mart": 3,     "aprel": 4,
+    "may": 5,      "iyun": 6,     "iyul": 7,     "avgust": 8,
+    "sentabr": 9,  "sentyabr": 9, "oktabr": 10,  "oktyabr": 10,
+    "noyabr": 11,  "dekabr": 12,
+}
+
+WeekOption = Tuple[str, date, date]
 
-    soup    = BeautifulSoup(response.text, "html.parser")
-    options = soup.select("select option")
-    now     = datetime.now()
+# Jadval sahifasi yuklanganda topilgan haftalar shu funksiyalarga beriladi
+# (masalan, services/week_calendar.py indeksni yangilaydi).
+_week_option_listeners: List[Callable[[List[WeekOption]], None]] = []
 
-    months = {
-        "yanvar": 1,  "fevral": 2,  "mart": 3,   "aprel": 4,
-        "may": 5,     "iyun": 6,    "iyul": 7,    "avgust": 8,
-        "sentabr": 9, "oktabr": 10, "noyabr": 11, "dekabr": 12,
-    }
 
-    for opt in options:
-        matches = re.findall(r'(\d{1,2})\s*(\w+)', opt.text.lower().strip())
+def add_week_options_listener(callback: Callable[[List[WeekOption]], None]) -> None:
+    if callback not in _week_option_listeners:
+        _week_option_listeners.append(callback)
+
+
+def _nearest_year(month: int, day: int, today: date) -> date:
+    """Yilsiz sanani bugunga eng yaqin yil bilan to'ldiradi (o'quv yili chegarasi uchun)."""
+    candidates = []
+    for year in (today.year - 1, today.year, today.year + 1):
+        try:
+            candidates.append(date(year, month, day))
+        except ValueError:
+            continue
+    return min(candidates, key=lambda d: abs((d - today).days))
+
+
+def parse_week_options(page: Union[str, BeautifulSoup], today: Optional[date] = None) -> List[WeekOption]:
+    """Jadval sahifasidagi ``<select>`` dan (week_id, boshlanish, tugash) ro'yxati."""
+    today = today or date.today()
+    soup = BeautifulSoup(page, "html.parser") if isinstance(page, str) else page
+
+    weeks = []
+    for opt in soup.select("select option"):
+        week_id = (opt.get("value") or "").strip()
+        if not week_id.isdigit():
+            continue
+
+        matches = re.findall(r'(\d{1,2})\s*([^\W\d_]+)', opt.text.lower().strip())
         if len(matches) < 2:
             continue
 
+        start_month = _MONTHS.get(matches[0][1])
+        end_month = _MONTHS.get(matches[1][1])
+        if not start_month or not end_month:
+            continue
+
         try:
-            start = datetime(now.year, months.get(matches[0][1], now.month), int(matches[0][0]))
-            end   = datetime(now.year, months.get(matches[1][1], now.month), int(matches[1][0]))
+            start = _nearest_year(start_month, int(matches[0][0]), today)
+            end = date(start.year, end_month, int(matches[1][0]))
         except ValueError:
             continue
+        if end < start:
+            # dekabr → yanvar
+            end = date(start.year + 1, end.month, end.day)
+
+        weeks.append((week_id, start, end))
+
+    return weeks
 
-        if start <= now <= end:
-            return opt.get("value")
 
-    return None
\ No newline at end of file
+def _harvest_week_options(soup: BeautifulSoup) -> List[WeekOption]:
+    weeks = parse_week_options(soup)
+    if weeks:
+        for callback in _week_option_listeners:
+            try:
+                callback(weeks)
+            except Exception as e:
+                logger.error(f"Hafta indeksini yangilashda xatolik: {e}")
+    return weeks
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from models.hemis_session import HemisSession
+from services.hemis_service import create_session, get_session_cookies
+
+logger = logging.getLogger(__name__)
+
+
+class HemisSessionPool:
+    """Foydalanuvchilarning avtorizatsiyadan o'tgan HEMIS sessiyalari.
+
+    Har bir foydalanuvchi uchun bitta ``aiohttp.ClientSession`` xotirada
+    saqlanadi (LRU, ``max_sessions`` tagacha, ``idle_ttl`` soniya ishlatilmasa
+    yopiladi). Cookie'lar ``hemis_sessions`` jadvaliga yoziladi, shuning uchun
+    bot qayta ishga tushganda ham qayta login talab qilinmaydi.
+
+    Sessiya yaroqliligi oldindan tekshirilmaydi — buni chaqiruvchi faqat
+    so'rov login sahifasiga yo'naltirilganda qiladi.
+
+    ``get()`` dan olingan sessiya faqat shu foydalanuvchining ``lock()`` i
+    ichida ishlatiladi. Qulf band bo'lsa sessiya ishlatilayotgan hisoblanadi:
+    pooldan chiqarilgan (LRU, idle, almashtirilgan) bunday sessiya darhol
+    emas, qulf bo'shaganda yopiladi. Qulflar faqat kimdir ushlab/kutib
+    turganda mavjud — foydalanuvchilar soni bilan o'smaydi.
+    """
+
+    def __init__(self, max_sessions: int = 500, idle_ttl: float = 1800):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        # telegram_id -> (session, oxirgi ishlatilgan vaqt)
+        self._sessions: "OrderedDict[int, Tuple[aiohttp.ClientSession, float]]" = OrderedDict()
+        # telegram_id -> DB ga oxirgi yozilgan cookie'lar
+        self._saved: Dict[int, Dict[str, str]] = {}
+        # telegram_id -> [qulf, ushlab/kutib turganlar soni]
+        self._locks: Dict[int, list] = {}
+        # telegram_id -> pooldan chiqarilgan, qulf bo'shashini kutayotgan sessiyalar
+        self._retired: Dict[int, List[aiohttp.ClientSession]] = {}
+
+    @asynccontextmanager
+    async def lock(self, telegram_id: int) -> AsyncIterator[None]:
+        """Bitta foydalanuvchi uchun parallel qayta login bo'lmasligi uchun qulf."""
+        entry = self._locks.get(telegram_id)
+        if entry is None:
+            entry = self._locks[telegram_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[telegram_id]
+                for session in self._retired.pop(telegram_id, ()):
+                    await session.close()
+
+    async def get(self, telegram_id: int) -> Optional[aiohttp.ClientSession]:
+        """Saqlangan sessiyani qaytaradi (xotiradan yoki DB dagi cookie'lardan)."""
+        await self._evict_idle()
+
+        entry = self._sessions.get(telegram_id)
+        if entry is not None:
+            self._sessions[telegram_id] = (entry[0], time.monotonic())
+            self._sessions.move_to_end(telegram_id)
+            return entry[0]
+
+        row = await HemisSession.get_or_none(telegram_id=telegram_id)
+        if row is None or not row.cookies:
+            return None
+
+        session = create_session(row.cookies)
+        self._saved[telegram_id] = dict(row.cookies)
+        await self._put(telegram_id, session)
+        return session
+
+    async def store(self, telegram_id: int, session: aiohttp.ClientSession) -> None:
+        """Muvaffaqiyatli login qilingan sessiya cookie'larini saqlaydi.
+
+        Berilgan sessiya chaqiruvchida qoladi (u o'zi yopadi) — pool cookie'lardan
+        o'zining nusxasini yaratadi.
+        """
+        cookies = get_session_cookies(session)
+        if not cookies:
+            return
+
+        await HemisSession.update_or_create(
+            telegram_id=telegram_id,
+            defaults={"cookies": cookies},
+        )
+        self._saved[telegram_id] = cookies
+
+        entry = self._sessions.pop(telegram_id, None)
+        if entry is not None and entry[0] is not session:
+            await self._retire(telegram_id, entry[0])
+        await self._put(telegram_id, create_session(cookies))
+
+    async def sync(self, telegram_id: int) -> None:
+        """Server cookie'larni yangilagan bo'lsa, ularni DB ga yozib qo'yadi."""
+        entry = self._sessions.get(telegram_id)
+        if entry is None:
+            return
+        cookies = get_session_cookies(entry[0])
+        if cookies and cookies != self._saved.get(telegram_id):
+            await HemisSession.filter(telegram_id=telegram_id).update(cookies=cookies)
+            self._saved[telegram_id] = cookies
+
+    async def discard(self, telegram_id: int) -> None:
+        """Sessiyani yopadi va saqlangan cookie'larni o'chiradi."""
+        entry = self._sessions.pop(telegram_id, None)
+        if entry is not None:
+            await self._retire(telegram_id, entry[0])
+        self._saved.pop(telegram_id, None)
+        await HemisSession.filter(telegram_id=telegram_id).delete()
+
+    async def close(self) -> None:
+        """Barcha ochiq sessiyalarni yopadi (cookie'lar DB da qoladi)."""
+        while self._sessions:
+            _, (session, _) = self._sessions.popitem()
+            await session.close()
+        while self._retired:
+            _, sessions = self._retired.popitem()
+            for session in sessions:
+                await session.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "open_sessions": len(self._sessions),
+            "retired_sessions": sum(len(sessions) for sessions in self._retired.values()),
+            "locks": len(self._locks),
+        }
+
+    async def _put(self, telegram_id: int, session: aiohttp.ClientSession) -> None:
+        self._sessions[telegram_id] = (session, time.monotonic())
+        self._sessions.move_to_end(telegram_id)
+        while len(self._sessions) > self.max_sessions:
+            await self._evict(next(iter(self._sessions)))
+
+    async def _evict_idle(self) -> None:
+        deadline = time.monotonic() - self.idle_ttl
+        while self._sessions:
+            telegram_id, (_, used_at) = next(iter(self._sessions.items()))
+            if used_at > deadline:
+                break
+            await self._evict(telegram_id)
+
+    async def _evict(self, telegram_id: int) -> None:
+        session, _ = self._sessions.pop(telegram_id)
+        self._saved.pop(telegram_id, None)
+        await self._retire(telegram_id, session)
+
+    async def _retire(self, telegram_id: int, session: aiohttp.ClientSession) -> None:
+        """Pooldan chiqarilgan sessiyani yopadi; qulf band bo'lsa — qulf bo'shaganda."""
+        if telegram_id in self._locks:
+            self._retired.setdefault(telegram_id, []).append(session)
+        else:
+            await session.close()
+
+
+hemis_sessions = HemisSessionPool()
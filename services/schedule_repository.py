@@ -0,0 +1,187 @@
+"""Jadvalni DB ga yozish: bitta (group, week) to'plami — bitta tranzaksiya
+
+Har bir (group, week) uchun saqlangan darslarning kontent xeshi
+``ScheduleVersion`` jadvalida turadi. Yangilashda avval xeshlar solishtiriladi:
+o'zgarish bo'lmasa DB ga umuman yozilmaydi, bo'lsa faqat farq qilgan qatorlar
+qo'shiladi / yangilanadi / o'chiriladi. Xesh keshlar uchun versiya belgisi
+sifatida ham ishlatilishi mumkin (``get_week_version``).
+
+PostgreSQL rejimida yozish bitta ``INSERT ... ON CONFLICT`` so'rovi bilan
+asyncpg orqali bajariladi (``utils.db.postgres``).
+"""
+
+import hashlib
+import json
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from tortoise.transactions import in_transaction
+
+from models.group import Group
+from models.schedule import Schedule
+from models.schedule_version import ScheduleVersion
+from models.week import Week
+from utils.db.postgres import db
+
+logger = logging.getLogger(__name__)
+
+# Schedule.Meta.unique_together ga mos ustunlar (ON CONFLICT uchun)
+_CONFLICT_COLUMNS = ("group_id", "week_id", "day", "pair_number")
+_UPDATE_FIELDS = ("subject", "teacher", "room", "lesson_type", "lesson_time")
+
+LessonKey = Tuple[str, int]
+
+
+def _dedupe(lessons: Iterable[dict]) -> Dict[LessonKey, dict]:
+    """(day, pair_number) bo'yicha takrorlarni olib tashlaydi — oxirgisi qoladi."""
+    unique: Dict[LessonKey, dict] = {}
+    for item in lessons:
+        unique[(item["day"], int(item["pair_number"]))] = item
+    return unique
+
+
+def _values(item: dict) -> Tuple[Optional[str], ...]:
+    return tuple(item.get(field) for field in _UPDATE_FIELDS)
+
+
+def _row_values(schedule: Schedule) -> Tuple[Optional[str], ...]:
+    return tuple(getattr(schedule, field) for field in _UPDATE_FIELDS)
+
+
+def content_hash(lessons: Dict[LessonKey, Tuple[Optional[str], ...]]) -> str:
+    """Normallashtirilgan darslar ro'yxatining sha256 xeshi (tartibga bog'liq emas)."""
+    normalized = sorted(
+        [day, pair, *("" if v is None else str(v) for v in values)]
+        for (day, pair), values in lessons.items()
+    )
+    payload = json.dumps(normalized, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def get_week_schedule(group: Group, week: Week, using_db=None) -> List[Schedule]:
+    query = Schedule.filter(group=group, week=week)
+    if using_db is not None:
+        query = query.using_db(using_db)
+    return await query.order_by("id")
+
+
+async def get_week_version(group: Group, week: Week, using_db=None) -> Optional[str]:
+    """Saqlangan jadvalning kontent xeshi (hali yozilmagan bo'lsa None)."""
+    query = ScheduleVersion.filter(group=group, week=week)
+    if using_db is not None:
+        query = query.using_db(using_db)
+    version = await query.first()
+    return version.content_hash if version else None
+
+
+async def save_week_schedule(
+    group: Group,
+    week: Week,
+    lessons: Iterable[dict],
+    replace: bool = False,
+) -> List[Schedule]:
+    """HEMIS dan kelgan haftalik jadvalni bitta tranzaksiyada saqlaydi.
+
+    ``replace=True`` bo'lsa HEMIS javobida yo'q darslar o'chiriladi (bo'sh
+    ro'yxat — darssiz hafta, hammasi o'chadi), aks holda ular saqlanib qoladi.
+    HEMIS nosozligi bu yerga yetib kelmaydi — ``fetch_schedule``
+    ``HemisUnavailableError`` ko'taradi. Kontent xeshi o'zgarmagan bo'lsa hech
+    narsa yozilmaydi. Xesh tranzaksiya ichida o'qiladi — bir vaqtdagi ikki
+    yangilashdan faqat birinchisi yozadi. Saqlangan qatorlar qaytariladi.
+    """
+    incoming = _dedupe(lessons)
+    incoming_hash = content_hash({key: _values(item) for key, item in incoming.items()})
+
+    if db.enabled:
+        return await _save_week_schedule_pg(group, week, incoming, incoming_hash, replace)
+
+    async with in_transaction() as conn:
+        if await get_week_version(group, week, using_db=conn) == incoming_hash:
+            logger.debug(f"Jadval o'zgarmagan: group={group.id} week={week.week_number}")
+            return await get_week_schedule(group, week, using_db=conn)
+
+        existing = {
+            (row.day, row.pair_number): row
+            for row in await get_week_schedule(group, week, using_db=conn)
+        }
+
+        to_insert = [key for key in incoming if key not in existing]
+        to_update = []
+        for key, row in existing.items():
+            item = incoming.get(key)
+            if item is not None and _row_values(row) != _values(item):
+                for field in _UPDATE_FIELDS:
+                    setattr(row, field, item.get(field))
+                to_update.append(row)
+        to_delete = [row.id for key, row in existing.items() if key not in incoming] if replace else []
+
+        if to_delete:
+            await Schedule.filter(id__in=to_delete).using_db(conn).delete()
+
+        if to_update:
+            await Schedule.bulk_update(to_update, fields=list(_UPDATE_FIELDS), using_db=conn)
+
+        if to_insert:
+            await Schedule.bulk_create(
+                [
+                    Schedule(
+                        group=group,
+                        week=week,
+                        day=day,
+                        pair_number=pair_number,
+                        subject=incoming[(day, pair_number)]["subject"],
+                        teacher=incoming[(day, pair_number)].get("teacher"),
+                        room=incoming[(day, pair_number)].get("room"),
+                        lesson_type=incoming[(day, pair_number)].get("lesson_type"),
+                        lesson_time=incoming[(day, pair_number)].get("lesson_time"),
+                    )
+                    for day, pair_number in to_insert
+                ],
+                on_conflict=_CONFLICT_COLUMNS,
+                update_fields=_UPDATE_FIELDS,
+                using_db=conn,
+            )
+
+        schedules = await get_week_schedule(group, week, using_db=conn)
+
+        # Xesh DB dagi haqiqiy holatni aks ettiradi (replace=False da eski qatorlar ham)
+        stored_hash = content_hash({(s.day, s.pair_number): _row_values(s) for s in schedules})
+        await ScheduleVersion.update_or_create(
+            group=group,
+            week=week,
+            defaults={"content_hash": stored_hash},
+            using_db=conn,
+        )
+
+    logger.info(
+        f"Jadval saqlandi: group={group.id} week={week.week_number} "
+        f"+{len(to_insert)} ~{len(to_update)} -{len(to_delete)}"
+    )
+    return schedules
+
+
+async def _save_week_schedule_pg(
+    group: Group,
+    week: Week,
+    incoming: Dict[LessonKey, dict],
+    incoming_hash: str,
+    replace: bool,
+) -> List[Schedule]:
+    rows, changed = await db.upsert_week_schedule(
+        group.id,
+        week.id,
+        [(day, pair_number, *_values(item)) for (day, pair_number), item in incoming.items()],
+        replace=replace,
+        content_hash=incoming_hash,
+        # Xesh DB dagi haqiqiy holatdan, o'sha tranzaksiyada yoziladi
+        version=lambda rows: content_hash(
+            {(row["day"], row["pair_number"]): tuple(row[field] for field in _UPDATE_FIELDS) for row in rows}
+        ),
+    )
+    schedules = [Schedule(**dict(row)) for row in rows]
+
+    if changed:
+        logger.info(f"Jadval saqlandi (pg): group={group.id} week={week.week_number} {len(schedules)} ta dars")
+    else:
+        logger.debug(f"Jadval o'zgarmagan (pg): group={group.id} week={week.week_number}")
+    return schedules
@@ -1,19 +1,31 @@
 import logging
-import time
-import requests
-from typing import List, Optional
-from datetime import datetime, date, timedelta
+import aiohttp
+from typing import List
+from datetime import date
 from models.schedule import Schedule
 from models.group import Group
 from models.week import Week
 from schemas.language import LanguageEnum
-from services.hemis_service import fetch_schedule, create_session, get_hemis_captcha, hemis_login, get_current_week_id
+from services.hemis_service import (
+    fetch_schedule,
+    create_session,
+    get_hemis_captcha,
+    hemis_login,
+    check_login_status,
+    HemisSessionExpiredError,
+)
+from services.hemis_session_pool import hemis_sessions
+from services.schedule_repository import save_week_schedule
+from services.week_calendar import week_calendar
+from utils.rate_limit import Priority
+from utils.singleflight import SingleFlight
 
 # make it explicit which symbols we intend to expose when importing from
 # the module; this prevents accidental `ImportError` if the name is omitted
 # or moved later on.
 __all__ = [
     "get_current_week",
+    "get_week",
     "get_or_fetch_schedule",
     "format_schedule_message",
     "NeedsHemisLoginError",
@@ -21,114 +33,26 @@ __all__ = [
 
 logger = logging.getLogger(__name__)
 
-# Cache for the auto-detected week ID to avoid repeated HEMIS fetches
-_CACHED_WEEK_ID: Optional[str] = None
-_CACHED_WEEK_ID_TIME: Optional[float] = None
-_WEEK_ID_CACHE_TTL_SECONDS = 3600  # Cache for 1 hour
-
-
-def _get_fallback_week_id() -> str:
-    """Calculate a fallback week ID based on current date if HEMIS is unavailable.
-    
-    This uses a simple heuristic: HEMIS week IDs seem to increment sequentially.
-    In the current system, week 10844 is known. We calculate approximate week
-    offsets based on the number of weeks since a reference date.
-    
-    Returns:
-        str: A reasonable fallback week ID.
-    """
-    # Reference: week 10844 was active around early March 2026
-    # This is a rough estimate; in production you'd want a more precise mapping
-    return "10844"
-
+# Bir (group, week) uchun parallel HEMIS so'rovlari bittaga birlashtiriladi.
+# Statistika: ``schedule_flights.stats()`` (executed / collapsed).
+schedule_flights = SingleFlight(name="schedule_fetch")
 
 class NeedsHemisLoginError(Exception):
     """Raised when schedule is missing and we need the user to login to HEMIS to fetch it."""
     pass
 
 async def get_current_week() -> Week:
-    """Get or create current week by auto-detecting the week ID from HEMIS.
-    
-    This function attempts to auto-detect the week ID by:
-    1. Checking the in-memory cache (refreshes every 1 hour)
-    2. If cache miss, returns the hardcoded fallback
-    
-    Auto-detection is not performed on every call because it requires an
-    authenticated session, which is not available at the time this function
-    is called (it's called before user credentials are available).
-    
-    To refresh the detected week ID, the user should re-authenticate via HEMIS
-    login flow, which will update the cache.
-    
-    Returns:
-        Week: The current week object from database (get_or_create).
+    """Joriy hafta ``Week`` yozuvi.
+
+    Hafta ID si ``week_calendar`` indeksidan sana bo'yicha topiladi — HEMIS
+    so'rovi ham, DB ga yozish ham kerak emas (yozuv xotirada keshlanadi).
     """
-    global _CACHED_WEEK_ID, _CACHED_WEEK_ID_TIME
-    
-    try:
-        # Check if we have a valid cached week ID
-        current_time = time.time()
-        if _CACHED_WEEK_ID and _CACHED_WEEK_ID_TIME:
-            age = current_time - _CACHED_WEEK_ID_TIME
-            if age < _WEEK_ID_CACHE_TTL_SECONDS:
-                logger.info(f"Using cached week ID: {_CACHED_WEEK_ID} (age: {age:.0f}s)")
-                week, _ = await Week.get_or_create(
-                    week_number=_CACHED_WEEK_ID,
-                    defaults={"start_date": datetime.today().date(), "end_date": datetime.today().date()}
-                )
-                return week
-        
-        # No valid cache, use fallback
-        week_id = _get_fallback_week_id()
-        logger.info(f"Using fallback week ID: {week_id}")
-        
-        week, _ = await Week.get_or_create(
-            week_number=week_id,
-            defaults={"start_date": datetime.today().date(), "end_date": datetime.today().date()}
-        )
-        return week
-        
-    except Exception as e:
-        logger.error(f"Error in get_current_week: {e}; using hardcoded fallback")
-        # Last resort: create/fetch with fallback
-        week, _ = await Week.get_or_create(
-            week_number="10844",
-            defaults={"start_date": datetime.today().date(), "end_date": datetime.today().date()}
-        )
-        return week
+    return await week_calendar.get_current_week()
 
 
-def update_cached_week_id(authenticated_session: requests.Session) -> bool:
-    """Update the cached week ID using an authenticated session.
-    
-    This should be called after successful HEMIS login to refresh the
-    auto-detected week ID for the next 1 hour.
-    
-    Args:
-        authenticated_session (requests.Session): An AUTHENTICATED session
-            (i.e., user has already logged in to HEMIS).
-    
-    Returns:
-        bool: True if week ID was successfully detected and cached, False otherwise.
-    """
-    global _CACHED_WEEK_ID, _CACHED_WEEK_ID_TIME
-    
-    try:
-        logger.info("Attempting to update cached week ID with authenticated session...")
-        week_id = get_current_week_id(authenticated_session)
-        
-        if week_id:
-            _CACHED_WEEK_ID = week_id
-            _CACHED_WEEK_ID_TIME = time.time()
-            logger.info(f"Week ID cache updated: {week_id}")
-            return True
-        else:
-            logger.warning("Failed to detect week ID even with authenticated session")
-            return False
-            
-    except Exception as e:
-        logger.error(f"Error updating week ID cache: {e}")
-        return False
+async def get_week(week_id) -> Week:
+    """Hafta ID bo'yicha ``Week`` yozuvi (haqiqiy sanalar bilan)."""
+    return await week_calendar.get_week(week_id)
 
 
 def get_prev_week_id(current_week_id: str) -> str:
@@ -172,9 +96,8 @@ def get_next_week_id(current_week_id: str) -> str:
 def calculate_week_date_range(week_id: str) -> tuple[date, date]:
     """Calculate the start and end dates for a given HEMIS week ID.
     
-    Uses week 10844 (early March 2026) as reference point.
-    Each week increment equals 7 days.
-    Week 10844 starts on Monday, March 9, 2026.
+    Dates come from the ``week_calendar`` index harvested from HEMIS;
+    unknown weeks are extrapolated from the nearest known one (7 days per ID).
     
     Args:
         week_id (str): HEMIS week ID as string.
@@ -183,20 +106,7 @@ def calculate_week_date_range(week_id: str) -> tuple[date, date]:
         tuple: (start_date, end_date) as date objects.
     """
     try:
-        # Reference point: week 10844 starts on Monday, March 9, 2026
-        reference_week_id = 10844
-        reference_start_date = date(2026, 3, 9)
-        
-        current_week_num = int(week_id)
-        week_offset = current_week_num - reference_week_id
-        
-        # Calculate start date (Monday of that week)
-        start_date = reference_start_date + timedelta(weeks=week_offset)
-        # End date is Saturday (6 days after start)
-        end_date = start_date + timedelta(days=5)
-        
-        return start_date, end_date
-        
+        return week_calendar.date_range(week_id)
     except (ValueError, TypeError):
         logger.warning(f"Cannot calculate date range for week ID '{week_id}'")
         # Return empty dates if parsing fails
@@ -265,64 +175,125 @@ def format_week_date_range(week_id: str, language: LanguageEnum = LanguageEnum.U
         return f"{start_str} — {end_str}"
 
 
-async def get_or_fetch_schedule(group: Group, week: Week, force_update: bool = False, session=None, user=None):
+async def _auto_login(session: aiohttp.ClientSession, user, priority: Priority = Priority.INTERACTIVE) -> None:
+    """Saqlangan HEMIS login/parol bilan captcha'siz kirishga urinadi."""
+    csrf, captcha_bytes, cookies = await get_hemis_captcha(
+        session, priority=priority, user_key=user.telegram_id
+    )
 
-    schedules = await Schedule.filter(group=group, week=week).all()
+    if not csrf:
+        raise NeedsHemisLoginError()
 
-    if force_update or not schedules:
+    # captcha bypass (HEMIS ba'zi serverlarda ishlaydi)
+    captcha_code = "0000"
 
-        if not session:
+    success, _ = await hemis_login(
+        session,
+        csrf,
+        user.hemis_login,
+        user.hemis_password,
+        captcha_code,
+        priority=priority,
+        user_key=user.telegram_id,
+    )
 
-            if not user or not user.hemis_login or not user.hemis_password:
-                raise NeedsHemisLoginError()
+    if not success:
+        raise NeedsHemisLoginError()
 
-            # 🔥 avtomatik login qilamiz
-            session = create_session()
 
-            csrf, captcha_bytes, cookies = get_hemis_captcha(session)
+async def _fetch_with_saved_session(user, week_id: str, priority: Priority) -> List[dict]:
+    """Foydalanuvchining saqlangan HEMIS sessiyasi orqali jadvalni oladi.
 
-            # captcha bypass (HEMIS ba'zi serverlarda ishlaydi)
-            captcha_code = "0000"
-
-            success, _ = hemis_login(
-                session,
-                csrf,
-                user.hemis_login,
-                user.hemis_password,
-                captcha_code
-            )
-
-            if not success:
-                raise NeedsHemisLoginError()
+    Sessiya yaroqli bo'lsa — bitta HEMIS so'rovi. Faqat so'rov login sahifasiga
+    yo'naltirilganda ``check_login_status`` bilan tekshiriladi va kerak bo'lsa
+    saqlangan login/parol bilan qayta kiriladi.
+    """
+    user_key = user.telegram_id
+
+    async with hemis_sessions.lock(user_key):
+        session = await hemis_sessions.get(user_key)
+
+        if session is not None:
+            try:
+                hemis_data = await fetch_schedule(session, week_id, priority=priority, user_key=user_key)
+                await hemis_sessions.sync(user_key)
+                return hemis_data
+            except HemisSessionExpiredError:
+                if await check_login_status(session, priority=priority, user_key=user_key):
+                    try:
+                        return await fetch_schedule(session, week_id, priority=priority, user_key=user_key)
+                    except HemisSessionExpiredError:
+                        pass
+                logger.info(f"HEMIS sessiyasi eskirgan: {user_key}")
+                await hemis_sessions.discard(user_key)
+
+        # 🔥 avtomatik login qilamiz
+        async with create_session() as session:
+            await _auto_login(session, user, priority)
+            hemis_data = await fetch_schedule(session, week_id, priority=priority, user_key=user_key)
+            await hemis_sessions.store(user_key, session)
+            return hemis_data
+
+
+async def get_or_fetch_schedule(
+    group: Group,
+    week: Week,
+    force_update: bool = False,
+    session=None,
+    user=None,
+    priority: Priority = Priority.INTERACTIVE,
+):
 
-        hemis_data = fetch_schedule(session, str(week.week_number))
+    schedules = await Schedule.filter(group=group, week=week).all()
 
-        if force_update and schedules:
-            await Schedule.filter(group=group, week=week).delete()
+    if force_update or not schedules:
 
-        new_schedules = []
+        if session is None and (not user or not user.hemis_login or not user.hemis_password):
+            raise NeedsHemisLoginError()
+
+        # Majburiy yangilash oddiy (DB bo'sh bo'lgandagi) so'rovga qo'shilib
+        # ketmasin — u HEMIS ga borishi shart. Oddiy so'rov esa ketayotgan
+        # majburiy yangilash natijasini kutishi mumkin.
+        key = (group.id, week.id, True)
+        if not force_update and not schedule_flights.in_flight(key):
+            key = (group.id, week.id, False)
+        joined = schedule_flights.in_flight(key)
+        if joined:
+            logger.debug(f"Jadval so'rovi birlashtirildi: group={group.id} week={week.week_number}")
+
+        def refresh():
+            return _refresh_schedule(group, week, force_update, session, user, priority)
+
+        try:
+            return await schedule_flights.do(key, refresh)
+        except NeedsHemisLoginError:
+            if not joined:
+                raise
+            # Birlashtirilgan so'rov boshqa foydalanuvchining loginini ishlatgan —
+            # o'z sessiyamiz/login ma'lumotlarimiz bilan bir marta qayta urinamiz
+            logger.debug(f"Birlashtirilgan so'rovda login kerak bo'ldi, o'zimiz yuklaymiz: group={group.id}")
+            return await schedule_flights.do(key, refresh)
 
-        for item in hemis_data:
+    return schedules
 
-            schedule, _ = await Schedule.get_or_create(
-                group=group,
-                week=week,
-                day=item["day"],
-                pair_number=item["pair_number"],
-                defaults={
-                    "subject": item["subject"],
-                    "teacher": item.get("teacher"),
-                    "room": item.get("room"),
-                    "lesson_type": item.get("lesson_type"),
-                    "lesson_time": item.get("lesson_time")
-                }
-            )
 
-            new_schedules.append(schedule)
+async def _refresh_schedule(group: Group, week: Week, force_update: bool, session, user, priority: Priority):
+    """HEMIS dan jadvalni olib DB ga yozadi (``schedule_flights`` ichida chaqiriladi)."""
 
-        return new_schedules
+    if session is not None:
+        hemis_data = await fetch_schedule(
+            session,
+            str(week.week_number),
+            priority=priority,
+            user_key=user.telegram_id if user else None,
+        )
+    else:
+        try:
+            hemis_data = await _fetch_with_saved_session(user, str(week.week_number), priority)
+        except HemisSessionExpiredError:
+            raise NeedsHemisLoginError()
 
-    return schedules
+    return await save_week_schedule(group, week, hemis_data, replace=force_update)
 
 
 async def format_schedule_message(schedules: List[Schedule]) -> str:
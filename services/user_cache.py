@@ -0,0 +1,104 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from tortoise.signals import post_delete, post_save
+
+from models.user import User
+from utils.db.write_queue import write_queue
+
+logger = logging.getLogger(__name__)
+
+
+class UserCache:
+    """Foydalanuvchilar (guruhi bilan) uchun identity-map kesh.
+
+    ``get`` foydalanuvchini bitta JOIN so'rovi bilan (``select_related("group")``)
+    yuklaydi va ``ttl`` soniya davomida xotirada saqlaydi (LRU, ``max_size``
+    tagacha). Bitta foydalanuvchi uchun hamma handler'lar bitta obyektni
+    oladi — handler uni o'zgartirib saqlasa, kesh ham yangilangan bo'ladi.
+
+    Boshqa ``User`` obyekti orqali ``save()`` / ``delete()`` qilinsa keshdagi
+    nusxa Tortoise signallari orqali o'chiriladi. Signal chiqarmaydigan
+    ommaviy yozuvlar (``User.filter().update()``, ``User.all().delete()``)
+    dan keyin ``invalidate`` / ``clear`` qo'lda chaqiriladi; boshqa jarayon
+    yozuvlarini TTL tuzatadi. Topilmagan foydalanuvchilar keshlanmaydi.
+    """
+
+    def __init__(self, max_size: int = 5000, ttl: float = 300):
+        self.max_size = max_size
+        self.ttl = ttl
+        # telegram_id -> (user, muddati tugash vaqti)
+        self._users: "OrderedDict[int, Tuple[User, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, telegram_id: int) -> Optional[User]:
+        entry = self._users.get(telegram_id)
+        if entry is not None:
+            if entry[1] > time.monotonic():
+                self._users.move_to_end(telegram_id)
+                self.hits += 1
+                return entry[0]
+            del self._users[telegram_id]
+
+        self.misses += 1
+        user = await User.filter(telegram_id=telegram_id).select_related("group").first()
+        if user is not None:
+            self.put(user)
+        return user
+
+    def put(self, user: User) -> None:
+        """Yangi yaratilgan yoki yangilangan foydalanuvchini keshga yozadi."""
+        self._users[user.telegram_id] = (user, time.monotonic() + self.ttl)
+        self._users.move_to_end(user.telegram_id)
+        while len(self._users) > self.max_size:
+            self._users.popitem(last=False)
+
+    async def save(self, user: User, update_fields: List[str]) -> None:
+        """Keshdagi ``user`` ga kiritilgan o'zgarishlarni ``write_queue`` orqali saqlaydi.
+
+        Yozuv xato bersa, xotiradagi obyekt DB dan farq qiladi — u keshdan
+        o'chiriladi (keyingi ``get`` DB dan qayta yuklaydi) va xato qaytariladi.
+        """
+        try:
+            await write_queue.submit(lambda: user.save(update_fields=update_fields))
+        except Exception:
+            self.invalidate(user.telegram_id)
+            raise
+
+    def forget_copy(self, user: User) -> None:
+        """``user`` keshdagidan boshqa obyekt bo'lsa, keshdagi nusxa eskirgan — o'chiriladi."""
+        entry = self._users.get(user.telegram_id)
+        if entry is not None and entry[0] is not user:
+            del self._users[user.telegram_id]
+
+    def invalidate(self, telegram_id: int) -> None:
+        self._users.pop(telegram_id, None)
+
+    def clear(self) -> None:
+        self._users.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "name": "user_cache",
+            "size": len(self._users),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+user_cache = UserCache()
+
+
+@post_save(User)
+async def _user_saved(sender, instance: User, created, using_db, update_fields) -> None:
+    user_cache.forget_copy(instance)
+
+
+@post_delete(User)
+async def _user_deleted(sender, instance: User, using_db) -> None:
+    user_cache.invalidate(instance.telegram_id)
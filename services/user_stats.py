@@ -0,0 +1,129 @@
+"""Admin statistikasi: SQL agregatlar (foydalanuvchilar xotiraga yuklanmaydi)"""
+
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from tortoise.expressions import Q
+from tortoise.functions import Count
+
+from models.daily_stats import DailyStats
+from models.user import User
+from utils.db.postgres import db
+
+logger = logging.getLogger(__name__)
+
+USERS_PAGE_SIZE = 20
+
+# Kunlar bot foydalanuvchilari vaqti bo'yicha (scheduler ham shu zonada), server zonasidan qat'i nazar
+TASHKENT = ZoneInfo("Asia/Tashkent")
+
+
+def _local_today() -> date:
+    return datetime.now(TASHKENT).date()
+
+
+def _local_midnight_utc(day: date) -> datetime:
+    """Toshkent vaqtidagi kun boshlanishi (UTC da) — created_at UTC da saqlanadi."""
+    return datetime.combine(day, time.min, tzinfo=TASHKENT).astimezone(timezone.utc)
+
+
+def _not_empty(field: str) -> Q:
+    return Q(**{f"{field}__isnull": False}) & ~Q(**{field: ""})
+
+
+async def get_user_stats() -> Dict[str, int]:
+    """Bitta agregat so'rov: jami, bugun/7/30 kun ichida qo'shilganlar, telefon/username borlar."""
+    now = datetime.now(timezone.utc)
+    today = _local_midnight_utc(_local_today())
+
+    if db.enabled:
+        return await db.user_stats(today, now - timedelta(days=7), now - timedelta(days=30))
+
+    rows = await User.annotate(
+        total=Count("id"),
+        today=Count("id", _filter=Q(created_at__gte=today)),
+        week=Count("id", _filter=Q(created_at__gte=now - timedelta(days=7))),
+        month=Count("id", _filter=Q(created_at__gte=now - timedelta(days=30))),
+        with_phone=Count("id", _filter=_not_empty("phone_number")),
+        with_username=Count("id", _filter=_not_empty("username")),
+        hemis_linked=Count("id", _filter=_not_empty("hemis_login")),
+        reminders=Count("id", _filter=Q(reminder_enabled=True)),
+    ).values(
+        "total", "today", "week", "month", "with_phone", "with_username", "hemis_linked", "reminders"
+    )
+    return rows[0] if rows else {}
+
+
+async def get_daily_history(days: int = 7) -> List[DailyStats]:
+    """Oxirgi ``days`` ta tugagan kun bo'yicha rollup.
+
+    ``DailyStats`` da yo'q kunlar bitta agregat so'rov bilan hisoblanib saqlanadi,
+    keyingi chaqiruvlarda faqat rollup jadvali o'qiladi.
+    """
+    today = _local_today()
+    wanted = [today - timedelta(days=offset) for offset in range(days, 0, -1)]
+
+    stored = {row.day: row for row in await DailyStats.filter(day__in=wanted)}
+    missing = [day for day in wanted if day not in stored]
+
+    if missing:
+        for row in await _compute_rollups(missing):
+            stored[row.day] = row
+
+    return [stored[day] for day in wanted]
+
+
+async def _compute_rollups(days: List[date]) -> List[DailyStats]:
+    bounds: Dict[date, Tuple[datetime, datetime]] = {
+        day: (_local_midnight_utc(day), _local_midnight_utc(day + timedelta(days=1))) for day in days
+    }
+
+    aggregates = {}
+    for idx, (start, end) in enumerate(bounds.values()):
+        aggregates[f"new_{idx}"] = Count("id", _filter=Q(created_at__gte=start, created_at__lt=end))
+        aggregates[f"total_{idx}"] = Count("id", _filter=Q(created_at__lt=end))
+
+    rows = await User.annotate(**aggregates).values(*aggregates.keys())
+    counts = rows[0] if rows else {}
+
+    rollups = [
+        DailyStats(day=day, new_users=counts.get(f"new_{idx}", 0), total_users=counts.get(f"total_{idx}", 0))
+        for idx, day in enumerate(bounds)
+    ]
+    await DailyStats.bulk_create(rollups, ignore_conflicts=True)
+    return rollups
+
+
+async def rollup_daily_stats() -> None:
+    """Kechagi kun uchun rollup (har kuni yarim tundan keyin chaqiriladi)."""
+    try:
+        history = await get_daily_history(days=1)
+        logger.info(f"Kunlik statistika saqlandi: {history[0]}")
+    except Exception as e:
+        logger.error(f"Kunlik statistika xatoligi: {e}", exc_info=True)
+
+
+async def get_users_page(
+    after_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    limit: int = USERS_PAGE_SIZE,
+) -> Tuple[List[User], bool, bool]:
+    """Keyset pagination (``User.id`` bo'yicha).
+
+    Qaytaradi: (foydalanuvchilar, oldingi sahifa bormi, keyingi sahifa bormi).
+    """
+    if before_id is not None:
+        rows = await User.filter(id__lt=before_id).order_by("-id").limit(limit + 1)
+        has_prev = len(rows) > limit
+        users = list(reversed(rows[:limit]))
+        has_next = True
+    else:
+        query = User.filter(id__gt=after_id) if after_id is not None else User.all()
+        rows = await query.order_by("id").limit(limit + 1)
+        has_next = len(rows) > limit
+        users = rows[:limit]
+        has_prev = after_id is not None
+
+    return users, has_prev, has_next
@@ -0,0 +1,192 @@
+"""HEMIS hafta ID ↔ sana indeksi
+
+HEMIS jadval sahifasidagi ``<select>`` har safar yuklanganda (istalgan
+foydalanuvchi sessiyasi orqali) haftalar ro'yxati shu indeksga tushadi va
+``Week`` jadvaliga haqiqiy sanalar bilan yoziladi. Ishga tushganda indeks
+DB dan o'qiladi, keyingi qidiruvlar xotirada O(1):
+
+- ``week_calendar.week_id_for(date)``  — sana → hafta ID
+- ``week_calendar.date_range(week_id)`` — hafta ID → (dushanba, shanba)
+
+Indeksda yo'q haftalar eng yaqin ma'lum haftadan (har hafta +1 ID, +7 kun)
+hisoblab topiladi.
+"""
+
+import asyncio
+import logging
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from models.week import Week
+from services.hemis_service import WeekOption, add_week_options_listener
+
+logger = logging.getLogger(__name__)
+
+# Indeks bo'sh bo'lganda ishlatiladigan tayanch: 10844-hafta 2026-yil 9-martdan boshlanadi
+_REFERENCE_WEEK_ID = 10844
+_REFERENCE_START = date(2026, 3, 9)
+
+
+def _monday(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+class WeekCalendar:
+    def __init__(self):
+        self._ranges: Dict[int, Tuple[date, date]] = {}
+        self._by_monday: Dict[date, int] = {}
+        self._rows: Dict[int, Week] = {}
+        self._dirty: Set[int] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        # Sanalar o'zgarganda chaqiriladi (masalan, hafta tugmalari keshini tozalash)
+        self._listeners: List[Callable[[], None]] = []
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def _notify(self) -> None:
+        for callback in self._listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Hafta indeksi listener xatoligi: {e}")
+
+    # ------------------------------------------------------------------
+    # Xotiradagi qidiruvlar
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    def week_id_for(self, day: Optional[date] = None) -> int:
+        """Sana tushadigan hafta ID si (yakshanba — o'sha haftaning davomi)."""
+        monday = _monday(day or date.today())
+        week_id = self._by_monday.get(monday)
+        if week_id is not None:
+            return week_id
+        anchor_id, anchor_start = self._anchor(monday=monday)
+        return anchor_id + (monday - _monday(anchor_start)).days // 7
+
+    def date_range(self, week_id) -> Tuple[date, date]:
+        """Hafta boshlanish (dushanba) va tugash (shanba) sanalari."""
+        week_id = int(week_id)
+        known = self._ranges.get(week_id)
+        if known is not None:
+            return known
+        anchor_id, anchor_start = self._anchor(week_id=week_id)
+        start = _monday(anchor_start) + timedelta(weeks=week_id - anchor_id)
+        return start, start + timedelta(days=5)
+
+    def _anchor(self, week_id: Optional[int] = None, monday: Optional[date] = None) -> Tuple[int, date]:
+        """Ekstrapolyatsiya uchun eng yaqin ma'lum hafta."""
+        if not self._ranges:
+            return _REFERENCE_WEEK_ID, _REFERENCE_START
+        if week_id is not None:
+            nearest = min(self._ranges, key=lambda known: abs(known - week_id))
+        else:
+            nearest = min(self._ranges, key=lambda known: abs((self._ranges[known][0] - monday).days))
+        return nearest, self._ranges[nearest][0]
+
+    # ------------------------------------------------------------------
+    # Indeksni to'ldirish
+    # ------------------------------------------------------------------
+
+    def observe(self, weeks: Iterable[WeekOption]) -> None:
+        """HEMIS ``<select>`` dan kelgan haftalarni indeksga qo'shadi.
+
+        Xotira darhol yangilanadi, DB ga yozish fon vazifasida bajariladi.
+        Tugagan haftalar faqat xotirada qoladi — ``tasks/cleanup.py`` ularning
+        ``Week`` yozuvlarini o'chiradi, qayta yaratish shart emas.
+        """
+        cutoff = _monday(date.today())
+        changed = False
+        for week_id, start, end in weeks:
+            week_id = int(week_id)
+            if self._ranges.get(week_id) == (start, end):
+                continue
+            self._set(week_id, start, end)
+            if end >= cutoff:
+                self._dirty.add(week_id)
+            changed = True
+
+        if not changed:
+            return
+        self._notify()
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self.flush())
+
+    def _set(self, week_id: int, start: date, end: date) -> None:
+        old = self._ranges.get(week_id)
+        if old is not None and self._by_monday.get(_monday(old[0])) == week_id:
+            del self._by_monday[_monday(old[0])]
+        self._ranges[week_id] = (start, end)
+        self._by_monday[_monday(start)] = week_id
+
+    async def load(self) -> None:
+        """Ishga tushganda indeksni ``Week`` jadvalidan o'qiydi."""
+        rows = await Week.filter(start_date__isnull=False, end_date__isnull=False).order_by("id")
+        for week in rows:
+            # Eski yozuvlarda start_date == end_date == yaratilgan kun (haqiqiy sana emas)
+            if week.end_date > week.start_date:
+                self._set(int(week.week_number), week.start_date, week.end_date)
+            self._rows.setdefault(int(week.week_number), week)
+        self._notify()
+        logger.info(f"Hafta indeksi yuklandi: {len(self._ranges)} ta hafta")
+
+    async def flush(self) -> None:
+        """Yangi/o'zgargan haftalarni ``Week`` jadvaliga yozadi."""
+        async with self._lock:
+            while self._dirty:
+                week_id = self._dirty.pop()
+                start, end = self._ranges[week_id]
+                try:
+                    updated = await Week.filter(week_number=week_id).update(start_date=start, end_date=end)
+                    if not updated:
+                        self._rows[week_id] = await Week.create(
+                            week_number=week_id, start_date=start, end_date=end
+                        )
+                    elif week_id in self._rows:
+                        self._rows[week_id].start_date = start
+                        self._rows[week_id].end_date = end
+                except Exception as e:
+                    logger.error(f"Hafta {week_id} ni saqlashda xatolik: {e}")
+
+    # ------------------------------------------------------------------
+    # Week yozuvlari
+    # ------------------------------------------------------------------
+
+    async def get_week(self, week_id) -> Week:
+        """Hafta ID bo'yicha ``Week`` yozuvi (xotirada keshlanadi, kerak bo'lsa yaratiladi)."""
+        week_id = int(week_id)
+        week = self._rows.get(week_id)
+        if week is not None:
+            return week
+
+        async with self._lock:
+            week = self._rows.get(week_id)
+            if week is None:
+                start, end = self.date_range(week_id)
+                week = await Week.filter(week_number=week_id).order_by("id").first()
+                if week is None:
+                    week = await Week.create(week_number=week_id, start_date=start, end_date=end)
+                self._rows[week_id] = week
+        return week
+
+    async def get_current_week(self) -> Week:
+        return await self.get_week(self.week_id_for())
+
+    def forget(self, week_ids: Iterable[int]) -> None:
+        """O'chirilgan ``Week`` yozuvlarini keshdan chiqaradi (sanalar indeksda qoladi)."""
+        for week_id in week_ids:
+            self._rows.pop(int(week_id), None)
+
+
+week_calendar = WeekCalendar()
+add_week_options_listener(week_calendar.observe)
@@ -0,0 +1,55 @@
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+from aiogram.types import FSInputFile
+
+from data.config import ADMINS, BACKUP_SEND
+from loader import bot
+from utils.db.backup import backup_database
+
+logger = logging.getLogger(__name__)
+
+
+async def send_backup_files(chat_id: int, paths: List[Path]) -> None:
+    """Backup fayllarini (bo'laklarini) ketma-ket yuboradi."""
+    total_mb = sum(path.stat().st_size for path in paths) / (1024 * 1024)
+    for index, path in enumerate(paths, start=1):
+        part = f"\n🧩 <b>Bo'lak:</b> {index}/{len(paths)}" if len(paths) > 1 else ""
+        await bot.send_document(
+            chat_id,
+            document=FSInputFile(path),
+            caption=f"""
+💾 <b>BAZA BACKUP</b>
+
+━━━━━━━━━━━━━━━━━━━━
+📁 <b>Fayl nomi:</b> {path.name}
+📊 <b>Hajmi:</b> {total_mb:.2f} MB (siqilgan){part}
+🕐 <b>Vaqt:</b> {datetime.now().strftime("%d.%m.%Y %H:%M:%S")}
+━━━━━━━━━━━━━━━━━━━━
+
+✅ Backup muvaffaqiyatli yaratildi!
+""",
+            parse_mode="HTML",
+        )
+
+
+async def scheduled_backup() -> None:
+    """Kunlik avtomatik backup: BACKUP_DIR ga yoziladi, eskilari BACKUP_KEEP bo'yicha o'chiriladi.
+
+    ``BACKUP_SEND=true`` bo'lsa fayllar adminlarga ham yuboriladi.
+    """
+    try:
+        paths = await backup_database()
+    except Exception as e:
+        logger.error(f"Avtomatik backup xatoligi: {e}", exc_info=True)
+        return
+
+    if not BACKUP_SEND:
+        return
+    for admin in ADMINS:
+        try:
+            await send_backup_files(int(admin), paths)
+        except Exception as e:
+            logger.warning(f"Backup adminga yuborilmadi ({admin}): {e}")
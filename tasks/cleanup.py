@@ -3,6 +3,7 @@ from datetime import date
 from models.schedule import Schedule
 from models.week import Week
 from services.schedule_service import get_current_week
+from services.week_calendar import week_calendar
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +40,7 @@ async def delete_old_schedules() -> None:
             deleted_schedules += count
 
             await week.delete()
+            week_calendar.forget([week.week_number])
             deleted_weeks += 1
 
             logger.info(
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from models.hemis_session import HemisSession
+from models.user import User
+from services.hemis_service import hemis_limiter
+from services.schedule_service import (
+    NeedsHemisLoginError,
+    get_current_week,
+    get_next_week_id,
+    get_or_fetch_schedule,
+    get_week,
+)
+from utils.rate_limit import Priority
+
+logger = logging.getLogger(__name__)
+
+# Bir vaqtda nechta guruh ishlanadi (HEMIS tezligini baribir rate limiter belgilaydi)
+PREWARM_CONCURRENCY = 4
+# Bitta guruh uchun nechta foydalanuvchi hisobi sinab ko'riladi
+MAX_CANDIDATES_PER_GROUP = 3
+
+
+async def _collect_candidates() -> Dict[int, List[User]]:
+    """HEMIS ga ulangan foydalanuvchilarni guruh bo'yicha yig'adi.
+
+    Saqlangan sessiyasi borlar birinchi turadi — ular uchun login kerak emas.
+    """
+    users = await User.filter(
+        group_id__isnull=False,
+        hemis_login__isnull=False,
+        hemis_password__isnull=False,
+    ).prefetch_related("group")
+    with_session = set(await HemisSession.all().values_list("telegram_id", flat=True))
+
+    candidates: Dict[int, List[User]] = defaultdict(list)
+    for user in sorted(users, key=lambda u: u.telegram_id not in with_session):
+        if user.hemis_login and user.hemis_password:
+            candidates[user.group_id].append(user)
+    return candidates
+
+
+async def _prewarm_group(users: List[User], weeks, report: dict) -> None:
+    group = users[0].group
+
+    for week in weeks:
+        for user in users[:MAX_CANDIDATES_PER_GROUP]:
+            try:
+                await get_or_fetch_schedule(
+                    group, week, force_update=True, user=user, priority=Priority.BACKGROUND
+                )
+                report["weeks_fetched"] += 1
+                break
+            except NeedsHemisLoginError:
+                continue
+            except Exception as e:
+                logger.warning(f"Prewarm {group.name} / {week.week_number}: {e}")
+                continue
+        else:
+            report["failed"].append(f"{group.name}:{week.week_number}")
+
+
+async def prewarm_schedules() -> dict:
+    """HEMIS ga ulangan har bir guruh uchun joriy va keyingi hafta jadvalini oldindan yuklaydi.
+
+    Tungi tinch soatda chaqiriladi — ertalabki birinchi bosishda jadval DB dan o'qiladi.
+    So'rovlar ``Priority.BACKGROUND`` bilan ketadi, foydalanuvchilar navbatini band qilmaydi.
+    """
+    started = time.monotonic()
+    report = {"groups": 0, "weeks_fetched": 0, "failed": []}
+
+    try:
+        current = await get_current_week()
+        following = await get_week(get_next_week_id(str(current.week_number)))
+        weeks = [current, following]
+
+        candidates = await _collect_candidates()
+        report["groups"] = len(candidates)
+
+        semaphore = asyncio.Semaphore(PREWARM_CONCURRENCY)
+
+        async def run(users):
+            async with semaphore:
+                await _prewarm_group(users, weeks, report)
+
+        await asyncio.gather(*(run(users) for users in candidates.values()))
+    except Exception as e:
+        logger.error(f"Prewarm xatoligi: {e}", exc_info=True)
+
+    report["duration"] = round(time.monotonic() - started, 1)
+    expected = report["groups"] * 2
+    report["coverage"] = (report["weeks_fetched"] / expected) if expected else 0.0
+
+    logger.info(
+        f"Prewarm tugadi: {report['groups']} guruh, "
+        f"{report['weeks_fetched']}/{expected} hafta ({report['coverage']:.0%}), "
+        f"{report['duration']}s, xatolik: {len(report['failed'])} ta"
+    )
+    if report["failed"]:
+        logger.warning(f"Prewarm muvaffaqiyatsiz: {', '.join(report['failed'][:20])}")
+    logger.info(f"HEMIS navbati: {hemis_limiter.stats()}")
+
+    return report
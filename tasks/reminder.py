@@ -1,12 +1,20 @@
+import asyncio
 import logging
+import time
+from collections import defaultdict
 from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+from aiogram.exceptions import TelegramForbiddenError
 
 from loader import bot
+from middlewares.outgoing import bulk_sending
 from models.user import User
-from models.week import Week
 from models.schedule import Schedule
 from schemas.language import LanguageEnum
-from services.schedule_service import get_current_week, format_schedule_message
+from services.schedule_service import get_week, format_schedule_message
+from services.week_calendar import week_calendar
+from utils.db.postgres import db
 from utils.i18n import get_text
 
 logger = logging.getLogger(__name__)
@@ -38,76 +46,130 @@ def _get_tomorrow_day_name() -> str | None:
     return WEEKDAY_MAP.get(tomorrow.weekday())
 
 
-async def send_daily_reminders() -> None:
+# Tezlikni loader.outgoing_limiter boshqaradi; bu faqat bir vaqtdagi so'rovlar soni
+REMINDER_CONCURRENCY = 20
+
+
+async def send_daily_reminders() -> dict:
     """reminder_enabled=True bo'lgan barcha foydalanuvchilarga
     ertangi dars jadvalini yuboradi.
 
     Har kuni soat 20:00 da chaqirilishi kerak.
+
+    Bosqichlar:
+    1. load   — foydalanuvchilar va ertangi barcha darslar (2 ta so'rov)
+    2. render — har bir (guruh, til) uchun matn bir marta tayyorlanadi
+    3. send   — parallel yuborish, fon ustuvorligida (``bulk_sending``)
     """
+    report = {"users": 0, "sent": 0, "skipped": 0, "failed": 0, "blocked": 0, "timings": {}}
+    tomorrow = date.today() + timedelta(days=1)
     tomorrow_name = _get_tomorrow_day_name()
 
     if tomorrow_name is None:
         logger.info("Ertaga dam olish kuni — eslatma yuborilmaydi.")
-        return
+        return report
 
+    # 1. load ---------------------------------------------------------------
+    started = phase_started = time.monotonic()
     try:
-        week = await get_current_week()
+        week = await get_week(week_calendar.week_id_for(tomorrow))
     except Exception as e:
         logger.error(f"Haftani olishda xatolik: {e}")
-        return
+        return report
 
-    users = await User.filter(
-        reminder_enabled=True
-    ).prefetch_related("group").all()
+    if db.enabled:
+        users, lessons = await _load_pg(week.id, tomorrow_name)
+    else:
+        users, lessons = await _load(week, tomorrow_name)
+    report["users"] = len(users)
 
     if not users:
         logger.info("Eslatma yoqilgan foydalanuvchi topilmadi.")
-        return
+        return report
 
-    sent = 0
-    failed = 0
+    lessons_by_group: Dict[int, List[Schedule]] = defaultdict(list)
+    for schedule in lessons:
+        lessons_by_group[schedule.group_id].append(schedule)
+    report["timings"]["load"] = time.monotonic() - phase_started
 
+    # 2. render -------------------------------------------------------------
+    phase_started = time.monotonic()
+    texts: Dict[Tuple[int, str], str] = {}
+    jobs: List[Tuple[int, str]] = []
     for user in users:
-        try:
-            await _send_reminder_to_user(user, week, tomorrow_name)
-            sent += 1
-        except Exception as e:
-            logger.warning(
-                f"Foydalanuvchi {user.telegram_id} ga eslatma yuborishda xatolik: {e}"
-            )
-            failed += 1
+        lessons = lessons_by_group.get(user["group_id"])
+        if not lessons:
+            # Ertaga dars yo'q — spam bo'lmasligi uchun yubormaymiz
+            report["skipped"] += 1
+            continue
+        key = (user["group_id"], user["language"] or LanguageEnum.UZ)
+        if key not in texts:
+            texts[key] = await _render_reminder(lessons, tomorrow_name, key[1])
+        jobs.append((user["telegram_id"], texts[key]))
+    report["timings"]["render"] = time.monotonic() - phase_started
+
+    # 3. send ---------------------------------------------------------------
+    phase_started = time.monotonic()
+    semaphore = asyncio.Semaphore(REMINDER_CONCURRENCY)
+
+    async def deliver(chat_id: int, text: str) -> None:
+        async with semaphore:
+            try:
+                await bot.send_message(chat_id=chat_id, text=text, parse_mode="HTML")
+                report["sent"] += 1
+            except TelegramForbiddenError:
+                report["blocked"] += 1
+            except Exception as e:
+                logger.warning(f"Foydalanuvchi {chat_id} ga eslatma yuborishda xatolik: {e}")
+                report["failed"] += 1
+
+    with bulk_sending():
+        await asyncio.gather(*(deliver(chat_id, text) for chat_id, text in jobs))
+    send_time = report["timings"]["send"] = time.monotonic() - phase_started
+    report["timings"]["total"] = time.monotonic() - started
+
+    logger.info(
+        f"Eslatmalar yuborildi: {report['sent']} ta. Xatolik: {report['failed']} ta, "
+        f"bloklagan: {report['blocked']} ta, darssiz: {report['skipped']} ta. "
+        f"{len(texts)} ta matn, {report['sent'] / send_time if send_time else 0:.1f} xabar/s. "
+        f"Vaqt: " + ", ".join(f"{name}={value:.2f}s" for name, value in report["timings"].items())
+    )
+    return report
 
-    logger.info(f"Eslatmalar yuborildi: {sent} ta. Xatolik: {failed} ta.")
 
+async def _load(week, day_name: str) -> Tuple[List[dict], List[Schedule]]:
+    users = await User.filter(
+        reminder_enabled=True,
+        group_id__isnull=False,
+    ).values("telegram_id", "group_id", "language")
+    if not users:
+        return users, []
 
-async def _send_reminder_to_user(user, week, tomorrow_name: str) -> None:
-    """Bitta foydalanuvchiga ertangi dars jadvalini yuboradi."""
-    language = getattr(user, "language", LanguageEnum.UZ)
+    lessons = await Schedule.filter(
+        week=week,
+        day=day_name,
+        group_id__in={user["group_id"] for user in users},
+    ).order_by("group_id", "pair_number")
+    return users, lessons
 
-    if not user.group:
-        return
 
-    schedules = await Schedule.filter(
-        group=user.group,
-        week=week,
-        day=tomorrow_name
-    ).order_by("pair_number").all()
+async def _load_pg(week_id: int, day_name: str) -> Tuple[List[dict], List[Schedule]]:
+    """PostgreSQL: bitta ulanishda ikkita tayyor (prepared) so'rov."""
+    user_rows, lesson_rows = await db.reminder_batch(week_id, day_name)
+    users = [
+        {"telegram_id": row["telegram_id"], "group_id": row["group_id"], "language": LanguageEnum(row["language"])}
+        for row in user_rows
+    ]
+    return users, [Schedule(**dict(row)) for row in lesson_rows]
 
-    if not schedules:
-        # Ertaga dars yo'q — xabar yubormaslik yoki yuborish?
-        # Hozircha yubormaymiz (spam bo'lmasligi uchun)
-        return
 
+async def _render_reminder(schedules: List[Schedule], tomorrow_name: str, language: LanguageEnum) -> str:
+    """Bitta (guruh, til) uchun eslatma matni."""
     schedule_text = await format_schedule_message(schedules)
 
-    text = (
+    return (
         f"🔔 <b>{get_text('reminder_title', language)}</b>\n\n"
         f"📅 <b>{tomorrow_name}</b>\n\n"
         f"{schedule_text}"
     )
 
-    await bot.send_message(
-        chat_id=user.telegram_id,
-        text=text,
-        parse_mode="HTML"
-    )
\ No newline at end of file
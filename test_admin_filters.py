@@ -0,0 +1,43 @@
+"""Admin callback'lari: ma'lumot chiqaradigan tugmalar faqat adminlarga ishlaydi.
+
+    python -m pytest -q test_admin_filters.py
+"""
+
+import asyncio
+
+import pytest
+from aiogram.types import CallbackQuery, User
+
+from data.config import ADMINS
+from handlers.users import admin
+
+PROTECTED = ["admin_export", "admin_export_csv", "admin_backup"]
+
+
+def _callback(user_id, data):
+    return CallbackQuery(
+        id="1", from_user=User(id=user_id, is_bot=False, first_name="Ali"), chat_instance="c", data=data
+    )
+
+
+def _matching_handlers(event):
+    async def run():
+        matched = []
+        for handler in admin.router.callback_query.handlers:
+            passed, _ = await handler.check(event)
+            if passed:
+                matched.append(handler.callback.__name__)
+        return matched
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("data", PROTECTED)
+def test_non_admin_cannot_trigger(data):
+    stranger = max(int(admin_id) for admin_id in ADMINS) + 1
+    assert _matching_handlers(_callback(stranger, data)) == []
+
+
+@pytest.mark.parametrize("data", PROTECTED)
+def test_admin_can_trigger(data):
+    assert len(_matching_handlers(_callback(int(ADMINS[0]), data))) == 1
@@ -0,0 +1,106 @@
+"""SQLite onlayn backup: tiklanadigan nusxa, bo'laklash va eskilarini tozalash.
+
+    python -m pytest -q test_backup.py
+"""
+
+import asyncio
+import gzip
+import sqlite3
+
+import pytest
+
+from utils.db import backup
+from utils.db.backup import backup_database, create_backup, prune_backups
+
+
+@pytest.fixture(params=["gz", "zst"])
+def codec(request, monkeypatch):
+    if request.param == "gz":
+        monkeypatch.setattr(backup, "zstandard", None)
+    elif backup.zstandard is None:
+        pytest.skip("zstandard o'rnatilmagan")
+    return request.param
+
+
+def _database(path, rows=2000):
+    with sqlite3.connect(path) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, full_name TEXT)")
+        conn.executemany("INSERT INTO users (full_name) VALUES (?)", [(f"User {n} " * 5,) for n in range(rows)])
+    return path
+
+
+def _decompress(paths, codec):
+    data = b"".join(path.read_bytes() for path in paths)
+    if codec == "gz":
+        return gzip.decompress(data)
+    return backup.zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+def test_backup_restores_to_same_data(tmp_path, codec):
+    db_path = _database(tmp_path / "bot.db")
+    # Ochiq ulanishdagi yozuv WAL da — nusxaga baribir tushishi kerak
+    writer = sqlite3.connect(db_path)
+    writer.execute("INSERT INTO users (full_name) VALUES ('oxirgi')")
+    writer.commit()
+
+    paths = create_backup(db_path, tmp_path / "backups")
+    writer.close()
+    assert len(paths) == 1 and paths[0].name.endswith(f".db.{codec}")
+
+    restored = tmp_path / "restored.db"
+    restored.write_bytes(_decompress(paths, codec))
+    with sqlite3.connect(restored) as conn:
+        assert conn.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+        assert conn.execute("SELECT count(*) FROM users").fetchone() == (2001,)
+
+
+def test_path_with_uri_characters(tmp_path, codec):
+    # "#" va "?" URI da fragment/so'rov boshlanishi — yo'l kodlanmasa boshqa fayl ochiladi
+    db_path = _database(tmp_path / "kiuf #1?.db", rows=10)
+    paths = create_backup(db_path, tmp_path / "backups")
+
+    restored = tmp_path / "restored.db"
+    restored.write_bytes(_decompress(paths, codec))
+    with sqlite3.connect(restored) as conn:
+        assert conn.execute("SELECT count(*) FROM users").fetchone() == (10,)
+
+
+def test_large_backup_is_split_into_parts(tmp_path, codec):
+    db_path = _database(tmp_path / "bot.db", rows=20000)
+    paths = create_backup(db_path, tmp_path / "backups", part_size=4096)
+
+    assert len(paths) > 1
+    assert [path.name.rsplit(".", 1)[1] for path in paths] == [f"part{n:02d}" for n in range(1, len(paths) + 1)]
+    assert all(path.stat().st_size <= 4096 for path in paths)
+    restored = tmp_path / "restored.db"
+    restored.write_bytes(_decompress(paths, codec))
+    with sqlite3.connect(restored) as conn:
+        assert conn.execute("SELECT count(*) FROM users").fetchone() == (20000,)
+
+
+def test_prune_keeps_newest_sets(tmp_path):
+    for stamp in ("20260101_000000", "20260102_000000", "20260103_000000"):
+        (tmp_path / f"kiuf_bot_{stamp}.db.gz.part01").write_bytes(b"x")
+        (tmp_path / f"kiuf_bot_{stamp}.db.gz.part02").write_bytes(b"x")
+    (tmp_path / "notes.txt").write_text("boshqa fayl")
+
+    assert prune_backups(tmp_path, keep=2) == 2
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "kiuf_bot_20260102_000000.db.gz.part01",
+        "kiuf_bot_20260102_000000.db.gz.part02",
+        "kiuf_bot_20260103_000000.db.gz.part01",
+        "kiuf_bot_20260103_000000.db.gz.part02",
+        "notes.txt",
+    ]
+
+
+def test_missing_database_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        create_backup(tmp_path / "yoq.db", tmp_path / "backups")
+
+
+def test_backup_database_refuses_postgres(tmp_path, monkeypatch):
+    monkeypatch.setattr(backup, "DB_ENGINE", "postgres")
+    with pytest.raises(RuntimeError, match="pg_dump"):
+        asyncio.run(backup_database(tmp_path / "bot.db", tmp_path))
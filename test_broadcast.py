@@ -0,0 +1,183 @@
+"""Reklama outbox'i: qolgan joyidan davom etish, takror yubormaslik va natijalar.
+
+    python -m pytest -q test_broadcast.py
+
+Telegram ga hech narsa ketmaydi — ``services.broadcast.bot`` soxta bot bilan almashtiriladi.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.methods import CopyMessage
+
+from services import broadcast as broadcast_service
+
+BLOCKED, BROKEN = 1003, 1004
+
+
+@pytest.fixture
+def fake_bot(monkeypatch):
+    async def copy_message(chat_id, from_chat_id, message_id):
+        method = CopyMessage(chat_id=chat_id, from_chat_id=from_chat_id, message_id=message_id)
+        if chat_id == BLOCKED:
+            raise TelegramForbiddenError(method, "bot was blocked by the user")
+        if chat_id == BROKEN:
+            raise TelegramBadRequest(method, "chat not found")
+        return SimpleNamespace(message_id=1)
+
+    bot = SimpleNamespace(
+        copy_message=AsyncMock(side_effect=copy_message),
+        send_message=AsyncMock(return_value=SimpleNamespace(message_id=77)),
+        edit_message_text=AsyncMock(),
+    )
+    monkeypatch.setattr(broadcast_service, "bot", bot)
+    monkeypatch.setattr(broadcast_service, "ENQUEUE_BATCH", 2)
+    monkeypatch.setattr(broadcast_service, "SEND_BATCH", 2)
+    return bot
+
+
+async def _users(count=5):
+    from models.user import User
+
+    return [await User.create(telegram_id=1000 + n, full_name=f"User {n}") for n in range(1, count + 1)]
+
+
+async def _wait_workers():
+    await asyncio.gather(*list(broadcast_service._workers.values()))
+
+
+def _sent_to(bot):
+    return sorted(call.kwargs["chat_id"] for call in bot.copy_message.await_args_list)
+
+
+def test_broadcast_delivers_and_classifies_results(run_db, fake_bot):
+    from models.broadcast_outbox import BroadcastOutbox
+
+    async def scenario():
+        await _users()
+        broadcast = await broadcast_service.start_broadcast(admin_chat_id=1, from_chat_id=1, message_id=10)
+        await _wait_workers()
+        await broadcast.refresh_from_db()
+        statuses = dict(await BroadcastOutbox.all().values_list("telegram_id", "status"))
+        return broadcast, statuses
+
+    broadcast, statuses = run_db(scenario)
+    assert broadcast.status == "done" and broadcast.progress_message_id == 77
+    assert (broadcast.total, broadcast.delivered, broadcast.blocked, broadcast.failed) == (5, 3, 1, 1)
+    assert statuses[BLOCKED] == "blocked" and statuses[BROKEN] == "failed"
+    assert _sent_to(fake_bot) == [1001, 1002, 1003, 1004, 1005]
+    # Oxirgi progress xabari yakuniy matn bilan
+    assert "REKLAMA YUBORILDI" in fake_bot.edit_message_text.await_args.args[0]
+
+
+def test_resume_continues_without_resending(run_db, fake_bot):
+    from models.broadcast import Broadcast
+    from models.broadcast_outbox import BroadcastOutbox
+
+    async def scenario():
+        users = await _users()
+        # To'xtab qolgan holat: 1-3 outbox'da (1 yetkazilgan), lekin kursor faqat 2-gacha saqlangan
+        broadcast = await Broadcast.create(
+            admin_chat_id=1, from_chat_id=1, message_id=10, status="running",
+            last_user_id=users[1].id, delivered=1,
+        )
+        await BroadcastOutbox.create(broadcast=broadcast, telegram_id=1001, status="delivered")
+        await BroadcastOutbox.create(broadcast=broadcast, telegram_id=1002)
+        await BroadcastOutbox.create(broadcast=broadcast, telegram_id=1003)
+
+        resumed = await broadcast_service.resume_broadcasts()
+        await _wait_workers()
+        await broadcast.refresh_from_db()
+        return resumed, broadcast, await BroadcastOutbox.filter(broadcast=broadcast).count()
+
+    resumed, broadcast, rows = run_db(scenario)
+    assert resumed == 1 and rows == 5
+    assert _sent_to(fake_bot) == [1002, 1003, 1004, 1005]
+    assert (broadcast.status, broadcast.total, broadcast.delivered) == ("done", 5, 3)
+
+
+def test_finished_and_cancelled_broadcasts_are_not_resumed(run_db, fake_bot):
+    from models.broadcast import Broadcast
+
+    async def scenario():
+        await _users(2)
+        done = await Broadcast.create(admin_chat_id=1, from_chat_id=1, message_id=10, status="done")
+        running = await Broadcast.create(admin_chat_id=1, from_chat_id=1, message_id=11, status="running")
+        cancelled = await broadcast_service.cancel_broadcast(running.id)
+        return await broadcast_service.resume_broadcasts(), cancelled, await broadcast_service.cancel_broadcast(done.id)
+
+    assert run_db(scenario) == (0, True, False)
+    fake_bot.copy_message.assert_not_awaited()
+
+
+def test_crashed_worker_marks_failed_and_notifies_admin(run_db, fake_bot, monkeypatch):
+    from models.broadcast import Broadcast
+
+    async def broken(broadcast):
+        raise RuntimeError("database <locked>")
+
+    monkeypatch.setattr(broadcast_service, "_deliver", broken)
+
+    async def scenario():
+        await _users(2)
+        broadcast = await broadcast_service.start_broadcast(admin_chat_id=1, from_chat_id=1, message_id=10)
+        await _wait_workers()
+        await broadcast.refresh_from_db()
+        return broadcast, await broadcast_service.resume_broadcasts()
+
+    broadcast, resumed = run_db(scenario)
+    assert broadcast.status == "failed" and broadcast.finished_at is not None
+    assert resumed == 0
+    chat_id, text = fake_bot.send_message.await_args.args
+    assert chat_id == 1 and "xatolik bilan to'xtadi" in text
+    assert "&lt;locked&gt;" in text
+
+
+def test_stop_during_last_batch_keeps_cancelled(run_db, fake_bot, monkeypatch):
+    from models.broadcast import Broadcast
+
+    async def deliver_then_stopped(broadcast):
+        # /reklama_stop DB ni yangiladi, lekin worker allaqachon oxirgi partiyani tugatgan
+        await Broadcast.filter(id=broadcast.id).update(status="cancelled")
+
+    monkeypatch.setattr(broadcast_service, "_deliver", deliver_then_stopped)
+
+    async def scenario():
+        await _users(2)
+        broadcast = await broadcast_service.start_broadcast(admin_chat_id=1, from_chat_id=1, message_id=10)
+        await _wait_workers()
+        await broadcast.refresh_from_db()
+        return broadcast
+
+    broadcast = run_db(scenario)
+    assert broadcast.status == "cancelled" and broadcast.finished_at is None
+    fake_bot.edit_message_text.assert_not_awaited()
+
+
+def test_finished_worker_does_not_unregister_its_replacement(run_db, fake_bot, monkeypatch):
+    from models.broadcast import Broadcast
+
+    release = asyncio.Event()
+
+    async def slow(broadcast):
+        await release.wait()
+
+    monkeypatch.setattr(broadcast_service, "_run", slow)
+
+    async def scenario():
+        broadcast = await Broadcast.create(admin_chat_id=1, from_chat_id=1, message_id=10, status="running")
+        broadcast_service._spawn(broadcast)
+        old = broadcast_service._workers[broadcast.id]
+        replacement = asyncio.create_task(asyncio.sleep(0))
+        broadcast_service._workers[broadcast.id] = replacement
+        release.set()
+        await old
+        kept = broadcast_service._workers.get(broadcast.id) is replacement
+        await replacement
+        broadcast_service._workers.pop(broadcast.id, None)
+        return kept
+
+    assert run_db(scenario)
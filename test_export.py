@@ -0,0 +1,96 @@
+"""Oqimli eksport: xlsx/csv.gz fayllari, keyset bo'laklari va xatoda tozalash.
+
+    python -m pytest -q test_export.py
+"""
+
+import asyncio
+import csv
+import gzip
+import os
+
+import openpyxl
+import pytest
+
+from utils import pgtoexcel
+from utils.pgtoexcel import stream_export
+
+HEADINGS = ["ID", "Ism"]
+
+
+async def _chunks(count, size=100):
+    for start in range(0, count, size):
+        yield [[n, f"User {n}"] for n in range(start, min(start + size, count))]
+        await asyncio.sleep(0)
+
+
+def test_xlsx_export_roundtrip():
+    filepath, count = asyncio.run(stream_export(_chunks(250), HEADINGS, fmt="xlsx", widths=[8, 20]))
+    try:
+        sheet = openpyxl.load_workbook(filepath, read_only=True)["Data"]
+        rows = list(sheet.values)
+    finally:
+        os.remove(filepath)
+
+    assert filepath.endswith(".xlsx") and count == 250
+    assert rows[0] == tuple(HEADINGS)
+    assert rows[1:] == [(n, f"User {n}") for n in range(250)]
+
+
+def test_csv_gz_export_roundtrip():
+    filepath, count = asyncio.run(stream_export(_chunks(250), HEADINGS, fmt="csv"))
+    try:
+        with gzip.open(filepath, "rt", encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.reader(f))
+    finally:
+        os.remove(filepath)
+
+    assert filepath.endswith(".csv.gz") and count == 250
+    assert rows[0] == HEADINGS and rows[-1] == ["249", "User 249"]
+
+
+def test_source_error_removes_temp_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(pgtoexcel.tempfile, "tempdir", str(tmp_path))
+
+    async def broken():
+        yield [[1, "Ali"]]
+        raise ConnectionError("DB uzildi")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(stream_export(broken(), HEADINGS, fmt="csv"))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_writer_error_does_not_hang(monkeypatch, tmp_path):
+    monkeypatch.setattr(pgtoexcel.tempfile, "tempdir", str(tmp_path))
+    monkeypatch.setattr(pgtoexcel, "_QUEUE_CHUNKS", 1)
+
+    def broken_writer(rows, headings, filepath, widths=None):
+        next(iter(rows))
+        raise OSError("disk to'ldi")
+
+    monkeypatch.setitem(pgtoexcel._WRITERS, "csv", broken_writer)
+
+    async def run():
+        return await asyncio.wait_for(stream_export(_chunks(5000, size=10), HEADINGS, fmt="csv"), timeout=10)
+
+    with pytest.raises(OSError, match="disk"):
+        asyncio.run(run())
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_admin_export_rows_cover_every_user(run_db, monkeypatch):
+    from handlers.users import admin
+
+    monkeypatch.setattr(admin, "EXPORT_CHUNK", 3)
+
+    async def scenario():
+        from models.user import User
+
+        await User.bulk_create([User(telegram_id=1000 + n, full_name=None if n == 2 else f"User {n}") for n in range(1, 8)])
+        return [chunk async for chunk in admin._iter_user_rows()]
+
+    chunks = run_db(scenario)
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    rows = [row for chunk in chunks for row in chunk]
+    assert [row[1] for row in rows] == list(range(1001, 1008))
+    assert rows[1][2] == "N/A" and rows[0][3] == "N/A"
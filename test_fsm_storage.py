@@ -0,0 +1,140 @@
+"""FSM storage: DatabaseStorage (TTL, tozalash) va Redis backend.
+
+    python -m pytest -q test_fsm_storage.py
+
+Redis testlari ``fakeredis`` bilan ishlaydi (requirements-dev.txt); paket
+o'rnatilmagan bo'lsa o'tkazib yuboriladi.
+"""
+
+import asyncio
+import sys
+
+import pytest
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from utils.fsm_storage import (
+    COMPRESS_MIN,
+    DatabaseStorage,
+    create_redis_storage,
+    create_storage,
+    pack_data,
+    purge_expired_states,
+    unpack_data,
+)
+
+KEY = StorageKey(bot_id=1, chat_id=42, user_id=42)
+COOKIES = {"cookies": {"PHPSESSID": "x" * 400, "_csrf-frontend": "y" * 200}, "week_id": "10850"}
+
+
+class Form(StatesGroup):
+    captcha = State()
+
+
+def test_pack_data_roundtrip_and_compression():
+    small = {"week_id": "10850"}
+    assert unpack_data(pack_data(small)) == small
+    assert pack_data({}) is None and unpack_data(None) == {}
+
+    packed = pack_data(COOKIES)
+    assert packed[:1] == b"z" and len(packed) < COMPRESS_MIN
+    assert unpack_data(packed) == COOKIES
+
+
+def test_database_storage_set_get(run_db):
+    async def scenario():
+        storage = DatabaseStorage(ttl=3600)
+        await storage.set_state(KEY, Form.captcha)
+        await storage.set_data(KEY, COOKIES)
+        other = StorageKey(bot_id=1, chat_id=7, user_id=7)
+        return (
+            await storage.get_state(KEY),
+            await storage.get_data(KEY),
+            await storage.get_state(other),
+            await storage.get_data(other),
+        )
+
+    state, data, other_state, other_data = run_db(scenario)
+    assert state == Form.captcha.state
+    assert data == COOKIES
+    assert other_state is None and other_data == {}
+
+
+def test_database_storage_clear_deletes_row(run_db):
+    from models.fsm_state import FSMState
+
+    async def scenario():
+        storage = DatabaseStorage(ttl=3600)
+        await storage.set_state(KEY, Form.captcha)
+        await storage.set_data(KEY, {"a": 1})
+        await storage.set_state(KEY, None)
+        await storage.set_data(KEY, {})
+        return await FSMState.all().count()
+
+    assert run_db(scenario) == 0
+
+
+def test_expired_state_is_hidden_and_purged(run_db):
+    from models.fsm_state import FSMState
+
+    async def scenario():
+        expired = DatabaseStorage(ttl=-1)
+        await expired.set_state(KEY, Form.captcha)
+        await expired.set_data(KEY, {"a": 1})
+
+        live_key = StorageKey(bot_id=1, chat_id=7, user_id=7)
+        await DatabaseStorage(ttl=3600).set_state(live_key, Form.captcha)
+
+        seen = (await expired.get_state(KEY), await expired.get_data(KEY))
+        purged = await purge_expired_states()
+        return seen, purged, await FSMState.all().values_list("key", flat=True)
+
+    seen, purged, keys = run_db(scenario)
+    assert seen == (None, {})
+    assert purged == 1
+    assert len(keys) == 1 and ":7:7" in keys[0]
+
+
+def test_expired_data_does_not_resurrect(run_db):
+    async def scenario():
+        await DatabaseStorage(ttl=-1).set_data(KEY, {"old": True})
+        storage = DatabaseStorage(ttl=3600)
+        await storage.set_state(KEY, Form.captcha)
+        return await storage.get_data(KEY)
+
+    assert run_db(scenario) == {}
+
+
+def test_create_storage_backends():
+    assert isinstance(create_storage("memory"), MemoryStorage)
+    assert isinstance(create_storage("db"), DatabaseStorage)
+
+
+def test_redis_backend_without_package_fails_clearly(monkeypatch):
+    monkeypatch.setitem(sys.modules, "redis.asyncio", None)
+    monkeypatch.setitem(sys.modules, "aiogram.fsm.storage.redis", None)
+
+    with pytest.raises(RuntimeError, match="FSM_STORAGE=redis"):
+        create_storage("redis")
+
+
+def test_redis_backend_set_get_with_ttl():
+    fakeredis = pytest.importorskip("fakeredis")
+    from data.config import FSM_TTL
+
+    async def scenario():
+        redis = fakeredis.FakeAsyncRedis()
+        storage = create_redis_storage(redis)
+        await storage.set_state(KEY, Form.captcha)
+        await storage.set_data(KEY, COOKIES)
+
+        result = (await storage.get_state(KEY), await storage.get_data(KEY))
+        ttls = [await redis.ttl(key) for key in await redis.keys("*")]
+        await storage.close()
+        return result, ttls
+
+    (state, data), ttls = asyncio.run(scenario())
+    assert state == Form.captcha.state
+    assert data == COOKIES
+    assert len(ttls) == 2 and all(0 < ttl <= FSM_TTL for ttl in ttls)
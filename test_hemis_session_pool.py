@@ -0,0 +1,101 @@
+"""HemisSessionPool: ishlatilayotgan sessiyalar yopilmasligi va qulflar o'smasligi.
+
+    python -m pytest -q test_hemis_session_pool.py
+"""
+
+import asyncio
+
+from services.hemis_service import close_connector, create_session
+from services.hemis_session_pool import HemisSessionPool
+
+
+def _scenario(fn):
+    """Pool va umumiy connector har bir test oxirida yopiladi."""
+
+    async def run():
+        pool = HemisSessionPool(max_sessions=1)
+        try:
+            return await fn(pool)
+        finally:
+            await pool.close()
+            await close_connector()
+
+    return run
+
+
+async def _login(pool, telegram_id):
+    source = create_session({"PHPSESSID": f"session-{telegram_id}"})
+    await pool.store(telegram_id, source)
+    await source.close()
+
+
+def test_overflow_defers_closing_session_in_use(run_db):
+    async def scenario(pool):
+        await _login(pool, 1)
+        async with pool.lock(1):
+            session = await pool.get(1)
+            await _login(pool, 2)  # max_sessions=1 — 1-foydalanuvchi pooldan chiqadi
+            in_use_closed = session.closed
+            retired = pool.stats()["retired_sessions"]
+        return in_use_closed, retired, session.closed, pool.stats()
+
+    in_use_closed, retired, closed_after, stats = run_db(_scenario(scenario))
+    assert not in_use_closed and retired == 1
+    assert closed_after
+    assert stats == {"open_sessions": 1, "retired_sessions": 0, "locks": 0}
+
+
+def test_overflow_closes_idle_session_immediately(run_db):
+    async def scenario(pool):
+        await _login(pool, 1)
+        session = await pool.get(1)
+        await _login(pool, 2)
+        return session.closed
+
+    assert run_db(_scenario(scenario))
+
+
+def test_store_replacing_session_in_use_defers_close(run_db):
+    async def scenario(pool):
+        await _login(pool, 1)
+        async with pool.lock(1):
+            session = await pool.get(1)
+            # Boshqa handler (captcha orqali qayta login) shu paytda yangi sessiya saqlaydi
+            await _login(pool, 1)
+            closed_inside = session.closed
+        return closed_inside, session.closed
+
+    assert run_db(_scenario(scenario)) == (False, True)
+
+
+def test_evicted_session_is_reloaded_from_db(run_db):
+    async def scenario(pool):
+        await _login(pool, 1)
+        await _login(pool, 2)
+        session = await pool.get(1)
+        return session is not None and not session.closed
+
+    assert run_db(_scenario(scenario))
+
+
+def test_locks_do_not_accumulate_and_still_serialize(run_db):
+    async def scenario(pool):
+        for telegram_id in range(100):
+            async with pool.lock(telegram_id):
+                pass
+        after_many = pool.stats()["locks"]
+
+        order = []
+
+        async def worker(name):
+            async with pool.lock(1):
+                order.append(f"{name}+")
+                await asyncio.sleep(0.01)
+                order.append(f"{name}-")
+
+        await asyncio.gather(worker("a"), worker("b"))
+        return after_many, order, pool.stats()["locks"]
+
+    after_many, order, after_all = run_db(_scenario(scenario))
+    assert after_many == 0 and after_all == 0
+    assert order == ["a+", "a-", "b+", "b-"]
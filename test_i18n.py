@@ -0,0 +1,65 @@
+"""Tarjima kataloglari: to'liqlik, tashqi kataloglar va zaxira til.
+
+    python -m pytest -q test_i18n.py
+"""
+
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+from schemas.language import LanguageEnum
+from utils import i18n
+from utils.i18n import LANGUAGES, TRANSLATIONS, compile_catalogs, get_text, load_catalogs
+
+ROOT = Path(__file__).parent
+# get_text("kalit", ...) va _show_text_page(callback, "kalit")
+USED_KEY_RE = re.compile(r"""(?:get_text\(|_show_text_page\(\w+,)\s*["'](\w+)["']""")
+
+
+@pytest.fixture(autouse=True)
+def restore_catalogs():
+    yield
+    load_catalogs(None)
+
+
+def test_shipped_translations_are_complete():
+    catalogs = compile_catalogs(TRANSLATIONS)
+    assert set(catalogs) == {*LANGUAGES, LanguageEnum.UNKNOWN}
+
+
+def test_every_key_used_in_code_is_translated():
+    used = {}
+    for path in ROOT.rglob("*.py"):
+        if path.name.startswith("test_") or ".git" in path.parts:
+            continue
+        for key in USED_KEY_RE.findall(path.read_text(encoding="utf-8")):
+            used.setdefault(key, str(path.relative_to(ROOT)))
+    missing = {key: path for key, path in used.items() if key not in TRANSLATIONS}
+    assert used and not missing, missing
+
+
+def test_missing_language_fails_compilation():
+    broken = {**TRANSLATIONS, "new_key": {"uz": "Yangi", "en": "New"}}
+    with pytest.raises(ValueError, match=r"new_key\[ru\]"):
+        compile_catalogs(broken)
+
+
+def test_external_catalog_overrides_and_extra_keys(tmp_path):
+    (tmp_path / "en.json").write_text(json.dumps({"btn_back": "← Go back", "promo": "Sale"}), encoding="utf-8")
+    with pytest.raises(ValueError, match=r"promo\[uz\].*promo\[ru\]"):
+        load_catalogs(tmp_path)
+
+    for language, text in (("uz", "Chegirma"), ("ru", "Скидка")):
+        (tmp_path / f"{language}.json").write_text(json.dumps({"promo": text}), encoding="utf-8")
+    load_catalogs(tmp_path)
+    assert get_text("btn_back", LanguageEnum.EN) == "← Go back"
+    assert get_text("btn_back", LanguageEnum.UZ) == "⬅️ Orqaga"
+    assert get_text("promo", LanguageEnum.RU) == "Скидка"
+
+
+def test_unknown_language_and_key_fall_back():
+    load_catalogs(None)
+    assert get_text("btn_back", LanguageEnum.UNKNOWN) == get_text("btn_back", i18n.FALLBACK_LANGUAGE)
+    assert get_text("yoq_kalit", LanguageEnum.UZ) == "yoq_kalit"
@@ -0,0 +1,76 @@
+"""Inline klaviaturalar keshi: til bo'yicha bitta obyekt, profil variantlari va tozalash.
+
+    python -m pytest -q test_keyboards.py
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from keyboards.inline import menu
+from schemas.language import LanguageEnum
+from services.week_calendar import week_calendar
+from utils.i18n import LANGUAGES
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    menu.clear_keyboard_cache()
+    yield
+    menu.clear_keyboard_cache()
+
+
+def _buttons(markup):
+    return [(button.text, button.callback_data) for row in markup.inline_keyboard for button in row]
+
+
+def test_keyboards_are_built_once_per_language():
+    uz = menu.get_main_menu_keyboard(LanguageEnum.UZ)
+    assert menu.get_main_menu_keyboard(LanguageEnum.UZ) is uz
+
+    ru = menu.get_main_menu_keyboard(LanguageEnum.RU)
+    assert ru is not uz
+    assert ("📅 Расписание", "menu_schedule") in _buttons(ru)
+    assert ("📅 Dars jadvali", "menu_schedule") in _buttons(uz)
+
+
+def test_profile_keyboard_variants():
+    guest = menu.get_profile_menu_keyboard(LanguageEnum.EN, None)
+    linked = SimpleNamespace(hemis_login="370211100001", reminder_enabled=False)
+    reminded = SimpleNamespace(hemis_login="370211100001", reminder_enabled=True)
+    # HEMIS ulanmagan — eslatma tugmasi umuman ko'rinmaydi
+    unlinked = SimpleNamespace(hemis_login=None, reminder_enabled=True)
+
+    assert [data for _, data in _buttons(guest)] == ["connect_hemis", "back_to_menu"]
+    assert menu.get_profile_menu_keyboard(LanguageEnum.EN, unlinked) is guest
+    assert [data for _, data in _buttons(menu.get_profile_menu_keyboard(LanguageEnum.EN, linked))] == [
+        "disconnect_hemis", "reminder_enable", "back_to_menu",
+    ]
+    assert [data for _, data in _buttons(menu.get_profile_menu_keyboard(LanguageEnum.EN, reminded))] == [
+        "disconnect_hemis", "reminder_disable", "back_to_menu",
+    ]
+
+
+def test_prebuild_makes_first_requests_hits():
+    menu.prebuild_keyboards()
+    before = menu.keyboard_cache_stats()
+    for language in LANGUAGES:
+        menu.get_main_menu_keyboard(language)
+        menu.get_schedule_menu_keyboard(language)
+        menu.get_profile_menu_keyboard(language, None)
+    after = menu.keyboard_cache_stats()
+
+    assert after["misses"] == before["misses"]
+    assert after["hits"] - before["hits"] == 3 * len(LANGUAGES)
+
+
+def test_week_keyboard_is_cleared_when_week_index_changes():
+    menu.prebuild_keyboards()
+    markup = menu.get_week_pagination_keyboard(LanguageEnum.UZ, "10850")
+    assert [data for _, data in _buttons(markup)] == [
+        "select_week:10849", "select_week:10851", "update_schedule:10850", "menu_schedule",
+    ]
+    assert menu.get_week_pagination_keyboard(LanguageEnum.UZ, "10850") is markup
+
+    week_calendar._notify()  # observe() yangi sanalarni ko'rganda shuni chaqiradi
+    assert menu.get_week_pagination_keyboard(LanguageEnum.UZ, "10850") is not markup
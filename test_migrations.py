@@ -0,0 +1,158 @@
+"""Sxema migratsiyalari: aniq DDL, eski bazalar va parallel worker'lar.
+
+    python -m pytest -q test_migrations.py
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import sqlite3
+
+from tortoise import Tortoise
+
+from utils.db.migrations import LATEST_VERSION, MIGRATIONS, apply_migrations, get_schema_version
+from utils.db.tortoise import MODELS, sqlite_db_url
+
+
+def _init(path):
+    return Tortoise.init(db_url=sqlite_db_url(path), modules={"models": MODELS})
+
+
+def _migrate(path):
+    async def run():
+        await _init(path)
+        try:
+            return await apply_migrations()
+        finally:
+            await Tortoise.close_connections()
+
+    return asyncio.run(run())
+
+
+def _columns(path):
+    with sqlite3.connect(path) as conn:
+        tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        return {table: {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')} for table in tables}
+
+
+def test_fresh_database_matches_models(tmp_path):
+    path = tmp_path / "bot.db"
+    assert _migrate(path) == LATEST_VERSION
+
+    async def model_columns():
+        await Tortoise.init(db_url="sqlite://:memory:", modules={"models": MODELS})
+        try:
+            return {model._meta.db_table: set(model._meta.db_fields) for model in Tortoise.apps["models"].values()}
+        finally:
+            await Tortoise.close_connections()
+
+    expected = asyncio.run(model_columns())
+    actual = _columns(path)
+    for table, columns in expected.items():
+        assert actual.get(table) == columns, table
+
+
+def test_rerun_is_noop(tmp_path, caplog):
+    path = tmp_path / "bot.db"
+    _migrate(path)
+    with caplog.at_level(logging.INFO, logger="utils.db.migrations"):
+        assert _migrate(path) == LATEST_VERSION
+    assert "qo'llandi" not in caplog.text
+
+
+def test_legacy_users_table_gets_missing_columns(tmp_path):
+    path = tmp_path / "bot.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute('CREATE TABLE "groups" ("id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL, "name" VARCHAR(50))')
+        conn.execute(
+            'CREATE TABLE "users" ("id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL, '
+            '"telegram_id" BIGINT NOT NULL UNIQUE, "username" VARCHAR(255), "full_name" VARCHAR(255), '
+            "\"language\" VARCHAR(7) NOT NULL DEFAULT 'uz', "
+            '"created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, '
+            '"updated_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)'
+        )
+        conn.execute("INSERT INTO users (telegram_id, full_name) VALUES (1001, 'Ali')")
+
+    assert _migrate(path) == LATEST_VERSION
+    assert {"phone_number", "hemis_login", "hemis_password", "group_id", "reminder_enabled"} <= _columns(path)["users"]
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT full_name FROM users").fetchall() == [("Ali",)]
+
+
+def _worker(path, barrier, results):
+    """Alohida jarayon: barcha worker'lar tayyor bo'lgach bir vaqtda migratsiya qiladi."""
+    applied = []
+    handler = logging.Handler()
+    handler.emit = lambda record: applied.append(record.getMessage())
+    logging.getLogger("utils.db.migrations").addHandler(handler)
+    logging.getLogger("utils.db.migrations").setLevel(logging.INFO)
+
+    async def run():
+        await _init(path)
+        try:
+            barrier.wait()
+            return await apply_migrations()
+        finally:
+            await Tortoise.close_connections()
+
+    version = asyncio.run(run())
+    results.put((version, sum("qo'llandi" in message for message in applied)))
+
+
+def test_concurrent_workers_apply_each_version_once(tmp_path):
+    path = tmp_path / "bot.db"
+    ctx = multiprocessing.get_context("spawn")
+    barrier, results = ctx.Barrier(3), ctx.Queue()
+    workers = [ctx.Process(target=_worker, args=(path, barrier, results)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    outcomes = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=10)
+
+    assert [version for version, _ in outcomes] == [LATEST_VERSION] * 3
+    assert sum(applied for _, applied in outcomes) == len(MIGRATIONS)
+
+
+def test_failed_migration_rolls_back_version(tmp_path, monkeypatch):
+    from utils.db import migrations
+
+    async def broken(conn):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", [*MIGRATIONS, migrations.Migration(LATEST_VERSION + 1, "broken", broken)])
+    monkeypatch.setattr(migrations, "LATEST_VERSION", LATEST_VERSION + 1)
+    path = tmp_path / "bot.db"
+
+    async def run():
+        await _init(path)
+        try:
+            try:
+                await migrations.apply_migrations()
+            except RuntimeError:
+                pass
+            return await get_schema_version(Tortoise.get_connection("default"))
+        finally:
+            await Tortoise.close_connections()
+
+    assert asyncio.run(run()) == 0
+    assert "users" not in _columns(path)
+
+
+async def _indexes():
+    conn = Tortoise.get_connection("default")
+    rows = await conn.execute_query_dict(
+        "SELECT name, tbl_name FROM sqlite_master WHERE type = 'index' AND name NOT LIKE 'sqlite_autoindex%'"
+    )
+    indexes = {}
+    for row in rows:
+        columns = await conn.execute_query_dict(f"PRAGMA index_info(\"{row['name']}\")")
+        indexes[row["name"]] = (row["tbl_name"], tuple(column["name"] for column in columns))
+    return indexes
+
+
+def test_migrated_indexes_match_models(run_db):
+    """Modellarda e'lon qilingan har bir indeks migratsiyalarda ham bor (nomi va ustunlari bilan)."""
+    expected = run_db(_indexes)
+    migrated = run_db(_indexes, migrate=True)
+    assert {name: index for name, index in migrated.items() if name in expected} == expected
@@ -0,0 +1,77 @@
+"""OutgoingRateLimitMiddleware: qaysi metodlar chat limitiga kiradi, flood'dan keyin qayta yuborish.
+
+    python -m pytest -q test_outgoing.py
+"""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (
+    AnswerCallbackQuery,
+    CopyMessage,
+    DeleteMessage,
+    EditMessageText,
+    SendChatAction,
+    SendMessage,
+    SendPhoto,
+)
+
+from middlewares.outgoing import OutgoingRateLimitMiddleware
+
+
+def _send(middleware, method, make_request=None):
+    make_request = make_request or AsyncMock(return_value=True)
+    return asyncio.run(middleware(make_request, None, method)), make_request
+
+
+@pytest.mark.parametrize(
+    "method",
+    [
+        SendChatAction(chat_id=42, action="typing"),
+        EditMessageText(chat_id=42, message_id=1, text="..."),
+        DeleteMessage(chat_id=42, message_id=1),
+        AnswerCallbackQuery(callback_query_id="1"),
+    ],
+    ids=lambda method: type(method).__name__,
+)
+def test_non_sending_methods_bypass_chat_budget(method):
+    middleware = OutgoingRateLimitMiddleware()
+    _, make_request = _send(middleware, method)
+
+    make_request.assert_awaited_once()
+    assert middleware.stats()["chats"] == 0
+
+
+@pytest.mark.parametrize(
+    "method",
+    [
+        SendMessage(chat_id=42, text="salom"),
+        SendPhoto(chat_id=42, photo="file-id"),
+        CopyMessage(chat_id=42, from_chat_id=1, message_id=1),
+    ],
+    ids=lambda method: type(method).__name__,
+)
+def test_sending_methods_use_chat_budget(method):
+    middleware = OutgoingRateLimitMiddleware()
+    _send(middleware, method)
+    assert middleware.stats()["chats"] == 1
+
+
+def test_chat_actions_do_not_delay_messages():
+    middleware = OutgoingRateLimitMiddleware(chat_rate=0.001, chat_burst=1)
+    for _ in range(5):
+        _send(middleware, SendChatAction(chat_id=42, action="typing"))
+    # Chat bucket'i to'la — xabar kutmasdan ketadi
+    assert middleware._chat_bucket(42).delay() == 0
+
+
+def test_retry_after_is_retried():
+    method = SendMessage(chat_id=42, text="salom")
+    make_request = AsyncMock(side_effect=[TelegramRetryAfter(method, "flood", retry_after=0), True])
+    middleware = OutgoingRateLimitMiddleware(chat_burst=5)
+
+    result, _ = _send(middleware, method, make_request)
+    assert result is True
+    assert make_request.await_count == 2 and middleware.stats()["retries"] == 1
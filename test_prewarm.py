@@ -0,0 +1,62 @@
+"""Tungi prewarm: guruh bo'yicha bitta foydalanuvchi, sessiyalilar birinchi, xatolar hisobotda.
+
+    python -m pytest -q test_prewarm.py
+
+HEMIS ga so'rov ketmaydi — ``tasks.prewarm.get_or_fetch_schedule`` soxta funksiya.
+"""
+
+from unittest.mock import AsyncMock
+
+from services.hemis_service import HemisUnavailableError
+from services.schedule_service import NeedsHemisLoginError
+from tasks import prewarm
+from utils.rate_limit import Priority
+
+
+def test_prewarm_fetches_each_group_week_once(run_db, monkeypatch):
+    from models.group import Group
+    from models.hemis_session import HemisSession
+    from models.user import User
+    from models.week import Week
+
+    calls = []
+
+    async def fake_fetch(group, week, force_update, user, priority):
+        calls.append((group.name, week.week_number, user.telegram_id, force_update, priority))
+        if user.telegram_id == 2002:  # sessiyasi eskirgan — login kerak
+            raise NeedsHemisLoginError()
+        if group.name == "AT-23" and week.week_number == 10851:
+            raise HemisUnavailableError("502")
+
+    monkeypatch.setattr(prewarm, "get_or_fetch_schedule", fake_fetch)
+
+    async def scenario():
+        current, following = await Week.create(week_number=10850), await Week.create(week_number=10851)
+        monkeypatch.setattr(prewarm, "get_current_week", AsyncMock(return_value=current))
+        monkeypatch.setattr(prewarm, "get_week", AsyncMock(return_value=following))
+
+        groups = {name: await Group.create(name=name) for name in ("AT-21", "AT-22", "AT-23")}
+        hemis = {"hemis_login": "login", "hemis_password": "parol"}
+        await User.create(telegram_id=1001, group=groups["AT-21"], **hemis)
+        await User.create(telegram_id=1002, group=groups["AT-21"], **hemis)
+        await User.create(telegram_id=2001, group=groups["AT-22"], **hemis)
+        await User.create(telegram_id=2002, group=groups["AT-22"], **hemis)
+        await User.create(telegram_id=3001, group=groups["AT-23"], **hemis)
+        await User.create(telegram_id=4001, group=await Group.create(name="AT-24"))  # HEMIS ulanmagan
+        await HemisSession.create(telegram_id=1002, cookies={})
+        await HemisSession.create(telegram_id=2002, cookies={})
+        return await prewarm.prewarm_schedules()
+
+    report = run_db(scenario)
+    assert (report["groups"], report["weeks_fetched"]) == (3, 5)
+    assert report["failed"] == ["AT-23:10851"]
+    assert report["coverage"] == 5 / 6
+
+    by_group = {}
+    for name, week, telegram_id, force_update, priority in calls:
+        assert force_update and priority == Priority.BACKGROUND
+        by_group.setdefault((name, week), []).append(telegram_id)
+    # Saqlangan sessiyasi bor foydalanuvchi birinchi sinaladi
+    assert by_group[("AT-21", 10850)] == [1002]
+    assert by_group[("AT-22", 10850)] == [2002, 2001]
+    assert ("AT-24", 10850) not in by_group
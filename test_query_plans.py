@@ -0,0 +1,110 @@
+"""Tez-tez ishlaydigan so'rovlar uchun EXPLAIN QUERY PLAN testlari.
+
+Har bir so'rov indeks orqali bajarilishi kerak — jadvalni to'liq skanerlash
+(``SCAN <table>`` indeks'siz) test xatosi hisoblanadi. Baza production dagi
+kabi ``apply_migrations`` bilan quriladi, ya'ni migratsiyalardagi indekslar
+tekshiriladi. Yangi model/indeks o'zgarishidan keyin ishga tushiring:
+
+    python -m pytest -q test_query_plans.py
+    # yoki
+    python test_query_plans.py
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from tortoise import Tortoise
+
+# "SCAN users" — to'liq skanerlash; "SCAN users USING INDEX ..." — indeks bo'yicha
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+def hot_queries():
+    from models.broadcast_outbox import BroadcastOutbox
+    from models.schedule import Schedule
+    from models.user import User
+    from models.week import Week
+
+    now = datetime.now(timezone.utc)
+    return {
+        "schedule by group+week": Schedule.filter(group_id=1, week_id=1),
+        "schedule by group+week+day ordered": Schedule.filter(
+            group_id=1, week_id=1, day="Dushanba"
+        ).order_by("pair_number"),
+        "reminder lessons": Schedule.filter(
+            week_id=1, day="Dushanba", group_id__in=[1, 2, 3]
+        ).order_by("group_id", "pair_number"),
+        "cleanup schedules by week": Schedule.filter(week_id=1),
+        "reminder users": User.filter(reminder_enabled=True, group_id__isnull=False).values(
+            "telegram_id", "group_id", "language"
+        ),
+        "user by telegram_id": User.filter(telegram_id=123),
+        "users created range": User.filter(created_at__gte=now - timedelta(days=1), created_at__lt=now),
+        "users keyset page": User.filter(id__gt=100).order_by("id").limit(21),
+        "week by number": Week.filter(week_number=10844).order_by("id"),
+        "old weeks": Week.filter(week_number__lt=10844),
+        "broadcast pending batch": BroadcastOutbox.filter(
+            broadcast_id=1, status="pending", id__gt=0
+        ).order_by("id").limit(200),
+    }
+
+
+async def explain_all():
+    conn = Tortoise.get_connection("default")
+    plans = {}
+    for name, query in hot_queries().items():
+        rows = await conn.execute_query_dict(f"EXPLAIN QUERY PLAN {query.sql()}")
+        plans[name] = [row["detail"] for row in rows]
+    return plans
+
+
+@pytest.fixture
+def plans(run_db):
+    return run_db(explain_all, migrate=True)
+
+
+def test_full_scan_pattern():
+    assert FULL_SCAN.match("SCAN users")
+    assert not FULL_SCAN.match("SCAN users USING INDEX idx_users_created_at")
+    assert not FULL_SCAN.match("SCAN users USING COVERING INDEX idx_users_reminde_1d3b5a")
+    assert not FULL_SCAN.match("SEARCH users USING INDEX sqlite_autoindex_users_1 (telegram_id=?)")
+
+
+def test_hot_queries_use_indexes(plans):
+    full_scans = {
+        name: details
+        for name, details in plans.items()
+        if any(FULL_SCAN.match(detail) for detail in details)
+    }
+    assert not full_scans, f"To'liq jadval skanerlash: {full_scans}"
+
+
+def test_schedule_day_order_uses_index_order(plans):
+    details = plans["schedule by group+week+day ordered"]
+    assert not any("TEMP B-TREE" in detail for detail in details), details
+
+
+if __name__ == "__main__":
+    import asyncio
+    import os
+
+    os.environ.setdefault("BOT_TOKEN", "123456:TEST-TOKEN-aaaaaaaaaaaaaaaaaaaaaaaaaaaaa")
+    os.environ.setdefault("ADMINS", "1")
+
+    async def main():
+        from utils.db.migrations import apply_migrations
+        from utils.db.tortoise import MODELS
+
+        await Tortoise.init(db_url="sqlite://:memory:", modules={"models": MODELS})
+        try:
+            await apply_migrations()
+            return await explain_all()
+        finally:
+            await Tortoise.close_connections()
+
+    for name, details in asyncio.run(main()).items():
+        print(f"{name}:")
+        for detail in details:
+            marker = "  !!" if FULL_SCAN.match(detail) else "    "
+            print(f"{marker} {detail}")
@@ -0,0 +1,159 @@
+"""TokenBucket va PriorityRateLimiter: ustuvorlik, round-robin, statistika, bekor qilish.
+
+    python -m pytest -q test_rate_limit.py
+
+Vaqt soxta soat bilan boshqariladi: ``asyncio.sleep(delay)`` soatni ``delay`` ga
+suradi va haqiqatda faqat bitta qadam (``sleep(0)``) kutadi.
+"""
+
+import asyncio
+
+import pytest
+
+from utils.rate_limit import Priority, PriorityRateLimiter, TokenBucket
+
+_real_sleep = asyncio.sleep
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.now += max(0.0, delay)
+        await _real_sleep(0)
+
+    def __getattr__(self, name):
+        # ``asyncio`` modulining qolgan qismi (Future, Task, get_running_loop, ...)
+        return getattr(asyncio, name)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("utils.rate_limit.time", clock)
+    monkeypatch.setattr("utils.rate_limit.asyncio", clock)
+    return clock
+
+
+def _drain(limiter, order, requests):
+    """``requests`` — (label, priority, key); hammasi bitta tsiklda navbatga turadi."""
+
+    async def one(label, priority, key):
+        await limiter.acquire(priority, key)
+        order.append(label)
+
+    async def scenario():
+        await limiter.acquire()  # bucket bo'shaydi — qolganlar navbatda kutadi
+        await asyncio.gather(*(one(*request) for request in requests))
+
+    asyncio.run(scenario())
+
+
+def test_token_bucket_refill_and_refund(clock):
+    bucket = TokenBucket(rate=2, burst=2)
+    assert bucket.consume() and bucket.consume()
+    assert not bucket.consume()
+    assert bucket.delay() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert bucket.consume()
+
+    bucket.refund()
+    bucket.refund()
+    assert bucket.delay(2) == 0.0  # burst dan oshmaydi
+    assert bucket.consume(2) and not bucket.consume()
+
+
+def test_interactive_waiters_served_before_background(clock):
+    limiter = PriorityRateLimiter(rate=1)
+    order = []
+    _drain(limiter, order, [
+        ("bg1", Priority.BACKGROUND, "prewarm"),
+        ("bg2", Priority.BACKGROUND, "prewarm"),
+        ("user", Priority.INTERACTIVE, 42),
+    ])
+    assert order == ["user", "bg1", "bg2"]
+
+
+def test_keys_are_served_round_robin(clock):
+    limiter = PriorityRateLimiter(rate=1)
+    order = []
+    _drain(limiter, order, [
+        ("a1", Priority.BACKGROUND, "a"),
+        ("a2", Priority.BACKGROUND, "a"),
+        ("a3", Priority.BACKGROUND, "a"),
+        ("b1", Priority.BACKGROUND, "b"),
+        ("c1", Priority.BACKGROUND, "c"),
+    ])
+    assert order == ["a1", "b1", "c1", "a2", "a3"]
+
+
+def test_stats_count_grants_and_waits(clock):
+    limiter = PriorityRateLimiter(rate=2, name="hemis")
+    seen = {}
+
+    async def scenario():
+        await limiter.acquire()
+        waiters = [
+            asyncio.create_task(limiter.acquire(Priority.BACKGROUND, "a")),
+            asyncio.create_task(limiter.acquire(Priority.INTERACTIVE, "b")),
+        ]
+        await _real_sleep(0)
+        seen.update(limiter.stats())
+        return await asyncio.gather(*waiters)
+
+    waits = asyncio.run(scenario())
+    assert seen["queue_depth"] == 2
+    assert seen["queue_by_priority"] == {"interactive": 1, "background": 1}
+    assert waits == [pytest.approx(1.0), pytest.approx(0.5)]
+
+    stats = limiter.stats()
+    assert stats["name"] == "hemis" and stats["queue_depth"] == 0
+    assert stats["granted"] == 3 and stats["waited"] == 2
+    assert stats["avg_wait"] == pytest.approx(0.5)
+    assert stats["max_wait"] == pytest.approx(1.0)
+    assert stats["p95_wait"] == pytest.approx(0.5)
+
+
+def test_cancelled_waiter_leaves_queue(clock):
+    limiter = PriorityRateLimiter(rate=1)
+
+    async def scenario():
+        await limiter.acquire()
+        task = asyncio.create_task(limiter.acquire(Priority.BACKGROUND, "a"))
+        await _real_sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return limiter.queue_depth, limiter.stats()["queue_by_priority"]
+
+    assert asyncio.run(scenario()) == (0, {"background": 0})
+
+
+def test_waiter_cancelled_after_grant_returns_token(clock):
+    limiter = PriorityRateLimiter(rate=1)
+
+    async def scenario():
+        await limiter.acquire()
+        task = asyncio.create_task(limiter.acquire(Priority.BACKGROUND, "a"))
+        pop_next = limiter._pop_next
+
+        def pop_and_cancel():
+            waiter = pop_next()
+            # Bekor qilish token berilgandan keyin, korutin uyg'onishidan oldin keladi
+            asyncio.get_running_loop().call_soon(task.cancel)
+            return waiter
+
+        limiter._pop_next = pop_and_cancel
+        await asyncio.gather(task, return_exceptions=True)
+        granted_at = clock.now
+        waited = await limiter.acquire()
+        return task.cancelled(), waited, clock.now - granted_at, limiter.stats()["granted"]
+
+    cancelled, waited, elapsed, granted = asyncio.run(scenario())
+    assert cancelled
+    assert waited == 0.0 and elapsed == 0.0  # qaytarilgan token darhol ishlatildi
+    assert granted == 2
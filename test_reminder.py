@@ -0,0 +1,88 @@
+"""Kunlik eslatmalar: guruh bo'yicha bir marta render, darssizlar va bloklaganlar.
+
+    python -m pytest -q test_reminder.py
+
+Telegram ga hech narsa ketmaydi — ``tasks.reminder.bot`` soxta bot bilan almashtiriladi.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError
+from aiogram.methods import SendMessage
+
+from schemas.language import LanguageEnum
+from tasks import reminder
+
+BLOCKED = 1005
+
+
+@pytest.fixture
+def fake_bot(monkeypatch):
+    async def send_message(chat_id, text, parse_mode=None):
+        if chat_id == BLOCKED:
+            raise TelegramForbiddenError(SendMessage(chat_id=chat_id, text=text), "bot was blocked by the user")
+        return SimpleNamespace(message_id=1)
+
+    bot = SimpleNamespace(send_message=AsyncMock(side_effect=send_message))
+    monkeypatch.setattr(reminder, "bot", bot)
+    monkeypatch.setattr(reminder, "_get_tomorrow_day_name", lambda: "Dushanba")
+    return bot
+
+
+def test_reminders_render_once_per_group_and_language(run_db, fake_bot, monkeypatch):
+    from models.group import Group
+    from models.schedule import Schedule
+    from models.user import User
+    from models.week import Week
+
+    renders = []
+    original = reminder._render_reminder
+
+    async def counting_render(schedules, day, language):
+        renders.append(language)
+        return await original(schedules, day, language)
+
+    monkeypatch.setattr(reminder, "_render_reminder", counting_render)
+
+    async def scenario():
+        week = await Week.create(week_number=10850)
+        monkeypatch.setattr(reminder, "get_week", AsyncMock(return_value=week))
+        busy, free = await Group.create(name="AT-21"), await Group.create(name="AT-22")
+        await Schedule.create(group=busy, week=week, day="Dushanba", pair_number=2, subject="Fizika", lesson_time="10:00")
+        await Schedule.create(group=busy, week=week, day="Dushanba", pair_number=1, subject="Matematika", lesson_time="08:30")
+        await Schedule.create(group=busy, week=week, day="Seshanba", pair_number=1, subject="Tarix")
+
+        users = [
+            (1001, busy, LanguageEnum.UZ, True),
+            (1002, busy, LanguageEnum.UZ, True),
+            (1003, busy, LanguageEnum.RU, True),
+            (1004, free, LanguageEnum.UZ, True),   # ertaga darsi yo'q
+            (BLOCKED, busy, LanguageEnum.UZ, True),
+            (1006, busy, LanguageEnum.UZ, False),  # eslatma o'chirilgan
+            (1007, None, LanguageEnum.UZ, True),   # guruhsiz
+        ]
+        for telegram_id, group, language, enabled in users:
+            await User.create(telegram_id=telegram_id, group=group, language=language, reminder_enabled=enabled)
+        return await reminder.send_daily_reminders()
+
+    report = run_db(scenario)
+    assert {key: report[key] for key in ("users", "sent", "skipped", "blocked", "failed")} == {
+        "users": 5, "sent": 3, "skipped": 1, "blocked": 1, "failed": 0,
+    }
+    assert sorted(renders) == [LanguageEnum.RU, LanguageEnum.UZ]
+
+    texts = {call.kwargs["chat_id"]: call.kwargs["text"] for call in fake_bot.send_message.await_args_list}
+    assert sorted(texts) == [1001, 1002, 1003, BLOCKED]
+    assert texts[1001] is texts[1002]
+    assert "Расписание на завтра" in texts[1003]
+    assert texts[1001].index("Matematika") < texts[1001].index("Fizika")
+    assert "Tarix" not in texts[1001]
+
+
+def test_no_reminders_on_day_off(fake_bot, monkeypatch):
+    monkeypatch.setattr(reminder, "_get_tomorrow_day_name", lambda: None)
+    assert asyncio.run(reminder.send_daily_reminders())["users"] == 0
+    fake_bot.send_message.assert_not_awaited()
@@ -0,0 +1,189 @@
+"""Jadvalni saqlash: farq bo'yicha yozish va HEMIS nosozligida ma'lumot yo'qolmasligi.
+
+    python -m pytest -q test_schedule_repository.py
+"""
+
+import asyncio
+
+import aiohttp
+import pytest
+
+from services import hemis_service
+from services.hemis_service import HemisResponse, HemisUnavailableError
+
+LESSONS = [
+    {"day": "Dushanba", "pair_number": 1, "subject": "1-juftlik Matematika", "room": "101"},
+    {"day": "Dushanba", "pair_number": 2, "subject": "2-juftlik Fizika", "room": "202"},
+    {"day": "Seshanba", "pair_number": 1, "subject": "1-juftlik Tarix", "room": "303"},
+]
+
+
+async def _group_week():
+    from models.group import Group
+    from models.week import Week
+
+    return await Group.create(name="AT-21"), await Week.create(week_number=10850)
+
+
+async def _rows(group, week):
+    from services.schedule_repository import get_week_schedule
+
+    return sorted((s.day, s.pair_number, s.subject) for s in await get_week_schedule(group, week))
+
+
+def test_replace_deletes_missing_lessons(run_db):
+    from services.schedule_repository import save_week_schedule
+
+    async def scenario():
+        group, week = await _group_week()
+        await save_week_schedule(group, week, LESSONS)
+        await save_week_schedule(group, week, LESSONS[:2], replace=True)
+        return await _rows(group, week)
+
+    rows = run_db(scenario)
+    assert [(day, pair) for day, pair, _ in rows] == [("Dushanba", 1), ("Dushanba", 2)]
+
+
+def test_replace_with_empty_week_clears_schedule(run_db):
+    from services.schedule_repository import content_hash, get_week_version, save_week_schedule
+
+    async def scenario():
+        group, week = await _group_week()
+        await save_week_schedule(group, week, LESSONS)
+        # Bayram yoki HEMIS da o'chirilgan jadval — eski darslar qolmasligi kerak
+        await save_week_schedule(group, week, [], replace=True)
+        return await _rows(group, week), await get_week_version(group, week)
+
+    rows, version = run_db(scenario)
+    assert rows == []
+    assert version == content_hash({})
+
+
+def _fake_get(outcome):
+    async def fake_get(session, url, **kwargs):
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return HemisResponse(outcome, hemis_service.TIMETABLE_URL, {}, b"<html></html>", "utf-8")
+
+    return fake_get
+
+
+@pytest.mark.parametrize(
+    "outcome",
+    [asyncio.TimeoutError(), aiohttp.ClientConnectionError("reset"), 500, 502],
+    ids=["timeout", "network", "http-500", "http-502"],
+)
+def test_fetch_schedule_raises_when_hemis_unavailable(monkeypatch, outcome):
+    monkeypatch.setattr(hemis_service, "_get", _fake_get(outcome))
+
+    with pytest.raises(HemisUnavailableError):
+        asyncio.run(hemis_service.fetch_schedule(None, "10850"))
+
+
+def test_forced_refresh_during_outage_keeps_schedule(run_db, monkeypatch):
+    from services.schedule_repository import save_week_schedule
+    from services.schedule_service import get_or_fetch_schedule
+
+    monkeypatch.setattr(hemis_service, "_get", _fake_get(aiohttp.ClientConnectionError("reset")))
+
+    async def scenario():
+        group, week = await _group_week()
+        await save_week_schedule(group, week, LESSONS)
+        with pytest.raises(HemisUnavailableError):
+            await get_or_fetch_schedule(group, week, force_update=True, session=object())
+        return await _rows(group, week)
+
+    assert len(run_db(scenario)) == len(LESSONS)
+
+
+def test_upsert_updates_in_place_and_dedupes_payload(run_db):
+    from models.schedule import Schedule
+    from services.schedule_repository import save_week_schedule
+
+    async def scenario():
+        group, week = await _group_week()
+        await save_week_schedule(group, week, LESSONS)
+        ids = dict(await Schedule.filter(day="Dushanba").values_list("pair_number", "id"))
+
+        moved = dict(LESSONS[0], room="105")
+        # Takroriy (day, pair_number) — oxirgisi qoladi; replace=False da Seshanba saqlanadi
+        await save_week_schedule(group, week, [LESSONS[0], moved, LESSONS[1]])
+        rows = await Schedule.filter(group=group, week=week).order_by("day", "pair_number").values_list(
+            "id", "day", "pair_number", "room"
+        )
+        return ids, rows
+
+    ids, rows = run_db(scenario)
+    assert rows == [
+        (ids[1], "Dushanba", 1, "105"),
+        (ids[2], "Dushanba", 2, "202"),
+        (rows[2][0], "Seshanba", 1, "303"),
+    ]
+
+
+def test_unchanged_payload_skips_writes(run_db, monkeypatch):
+    from services import schedule_repository
+    from services.schedule_repository import content_hash, get_week_version, save_week_schedule
+
+    writes = []
+    original = schedule_repository.ScheduleVersion.update_or_create
+    monkeypatch.setattr(
+        schedule_repository.ScheduleVersion,
+        "update_or_create",
+        lambda *args, **kwargs: writes.append(1) or original(*args, **kwargs),
+    )
+
+    async def scenario():
+        group, week = await _group_week()
+        await save_week_schedule(group, week, LESSONS)
+        first = await get_week_version(group, week)
+        # Tartib boshqacha, mazmun bir xil — xesh o'zgarmaydi, yozuv yo'q
+        rows = await save_week_schedule(group, week, list(reversed(LESSONS)), replace=True)
+        return first, await get_week_version(group, week), len(rows)
+
+    first, second, rows = run_db(scenario)
+    assert first == second and rows == len(LESSONS)
+    assert len(writes) == 1
+
+    assert content_hash({("Dushanba", 1): ("A", None)}) == content_hash({("Dushanba", 1): ("A", "")})
+    assert content_hash({("Dushanba", 1): ("A",)}) != content_hash({("Dushanba", 1): ("B",)})
+
+
+def test_version_tracks_stored_rows_after_partial_update(run_db):
+    from services.schedule_repository import content_hash, get_week_version, save_week_schedule
+
+    async def scenario():
+        group, week = await _group_week()
+        await save_week_schedule(group, week, LESSONS)
+        # replace=False: Seshanba qatori DB da qoladi, xesh ham uni hisobga oladi
+        await save_week_schedule(group, week, LESSONS[:2])
+        return await get_week_version(group, week)
+
+    version = run_db(scenario)
+    expected = content_hash(
+        {(item["day"], item["pair_number"]): (item["subject"], None, item["room"], None, None) for item in LESSONS}
+    )
+    assert version == expected
+
+
+def test_concurrent_identical_refreshes_write_once(run_db, monkeypatch):
+    from models.schedule_version import ScheduleVersion
+    from services.schedule_repository import save_week_schedule
+
+    writes = []
+    original = ScheduleVersion.update_or_create
+    monkeypatch.setattr(
+        ScheduleVersion, "update_or_create", lambda *args, **kwargs: writes.append(1) or original(*args, **kwargs)
+    )
+
+    async def scenario():
+        group, week = await _group_week()
+        # Ikki foydalanuvchi bir vaqtda yangiladi: ikkinchisi birinchining xeshini ko'radi
+        await asyncio.gather(
+            save_week_schedule(group, week, LESSONS, replace=True),
+            save_week_schedule(group, week, LESSONS, replace=True),
+        )
+        return len(await _rows(group, week))
+
+    assert run_db(scenario) == len(LESSONS)
+    assert len(writes) == 1
@@ -0,0 +1,175 @@
+"""SingleFlight: parallel so'rovlarni birlashtirish va bekor qilish semantikasi.
+
+    python -m pytest -q test_singleflight.py
+"""
+
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+
+class Work:
+    """Chaqiruvlar sonini sanaydigan, ``release`` kutadigan ish."""
+
+    def __init__(self, result="ok", error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_calls_collapse_into_one():
+    async def scenario():
+        flights, work = SingleFlight(), Work()
+        callers = [asyncio.create_task(flights.do("k", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        work.release.set()
+        return await asyncio.gather(*callers), work.calls, flights
+
+    results, calls, flights = asyncio.run(scenario())
+    assert results == ["ok"] * 5
+    assert calls == 1
+    assert flights.stats()["executed"] == 1 and flights.stats()["collapsed"] == 4
+    assert not flights.in_flight("k")
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def scenario():
+        flights, work = SingleFlight(), Work()
+        leader = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+        work.release.set()
+        return await follower, work
+
+    result, work = asyncio.run(scenario())
+    assert result == "ok"
+    assert not work.cancelled and work.calls == 1
+
+
+def test_last_waiter_cancelled_stops_work_and_frees_key():
+    async def scenario():
+        flights, work = SingleFlight(), Work()
+        caller = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0)
+        return flights, work
+
+    flights, work = asyncio.run(scenario())
+    assert work.cancelled
+    assert not flights.in_flight("k")
+
+
+def test_error_reaches_every_caller_and_frees_key():
+    async def scenario():
+        flights, work = SingleFlight(), Work(error=RuntimeError("hemis"))
+        callers = [asyncio.create_task(flights.do("k", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        work.release.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+
+        again = Work(result="retry")
+        again.release.set()
+        return results, await flights.do("k", again)
+
+    results, retried = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert retried == "retry"
+
+
+def test_forced_refresh_does_not_join_regular_fetch(run_db, monkeypatch):
+    from services import schedule_service
+
+    calls = []
+    release = asyncio.Event()
+
+    async def fake_refresh(group, week, force_update, session, user, priority):
+        calls.append(force_update)
+        await release.wait()
+        return [force_update]
+
+    monkeypatch.setattr(schedule_service, "_refresh_schedule", fake_refresh)
+
+    async def scenario():
+        from models.group import Group
+        from models.week import Week
+
+        group, week = await Group.create(name="AT-21"), await Week.create(week_number=10850)
+        fetch = schedule_service.get_or_fetch_schedule
+        regular = asyncio.create_task(fetch(group, week, session=object()))
+        await asyncio.sleep(0.01)
+        forced = asyncio.create_task(fetch(group, week, force_update=True, session=object()))
+        await asyncio.sleep(0.01)
+        # Oddiy so'rov ketayotgan majburiy yangilashga qo'shiladi
+        joined = asyncio.create_task(fetch(group, week, session=object()))
+        await asyncio.sleep(0.01)
+        release.set()
+        return await asyncio.gather(regular, forced, joined)
+
+    regular, forced, joined = run_db(scenario)
+    assert calls == [False, True]
+    assert (regular, forced, joined) == ([False], [True], [True])
+
+
+def test_follower_retries_with_own_credentials_when_leader_needs_login(run_db, monkeypatch):
+    from services import schedule_service
+    from services.schedule_service import NeedsHemisLoginError
+
+    calls = []
+    release = asyncio.Event()
+    captcha_session = object()
+
+    async def fake_refresh(group, week, force_update, session, user, priority):
+        calls.append(user.telegram_id)
+        if session is None:  # saqlangan login yaroqsiz
+            await release.wait()
+            raise NeedsHemisLoginError()
+        return ["ok"]
+
+    monkeypatch.setattr(schedule_service, "_refresh_schedule", fake_refresh)
+
+    async def scenario():
+        from models.group import Group
+        from models.user import User
+        from models.week import Week
+
+        group, week = await Group.create(name="AT-21"), await Week.create(week_number=10850)
+        stale = await User.create(telegram_id=1001, hemis_login="login", hemis_password="eski")
+        fresh = await User.create(telegram_id=1002)
+        fetch = schedule_service.get_or_fetch_schedule
+
+        leader = asyncio.create_task(fetch(group, week, user=stale))
+        await asyncio.sleep(0.01)
+        # Captcha dan endigina o'tgan foydalanuvchi begona so'rovga qo'shiladi
+        follower = asyncio.create_task(fetch(group, week, session=captcha_session, user=fresh))
+        await asyncio.sleep(0.01)
+        release.set()
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+
+    leader, follower = run_db(scenario)
+    assert isinstance(leader, NeedsHemisLoginError)
+    assert follower == ["ok"]
+    assert calls == [1001, 1002]
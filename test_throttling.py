@@ -0,0 +1,142 @@
+"""ThrottlingMiddleware: token bucket, narx flag'lari, xotiradan chiqarish va ogohlantirishlar.
+
+    python -m pytest -q test_throttling.py
+
+Vaqt soxta soat bilan boshqariladi (``utils.rate_limit`` va middleware ichidagi
+``time.monotonic``).
+"""
+
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.types import CallbackQuery, Chat, Message, User
+
+from middlewares.throttling import WARNING_TEXT, ThrottlingMiddleware
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("utils.rate_limit.time", clock)
+    monkeypatch.setattr("middlewares.throttling.time", clock)
+    return clock
+
+
+@pytest.fixture
+def answers(monkeypatch):
+    """``CallbackQuery.answer`` va ``Message.reply`` chaqiruvlari (Telegram ga ketmaydi)."""
+    calls = SimpleNamespace(answer=AsyncMock(), reply=AsyncMock())
+    monkeypatch.setattr(CallbackQuery, "answer", calls.answer)
+    monkeypatch.setattr(Message, "reply", calls.reply)
+    return calls
+
+
+def _user(user_id=1):
+    return User(id=user_id, is_bot=False, first_name="Ali")
+
+
+def _callback(user_id=1):
+    return CallbackQuery(id="1", from_user=_user(user_id), chat_instance="c", data="today_schedule")
+
+
+def _message(user_id=1):
+    return Message(message_id=1, date=datetime.now(), chat=Chat(id=user_id, type="private"), from_user=_user(user_id))
+
+
+def _feed(middleware, event, user_id=1, cost=None):
+    """Bitta update; handler chaqirilgan bo'lsa True."""
+    handler = AsyncMock(return_value=True)
+    data = {"event_from_user": _user(user_id)}
+    if cost is not None:
+        data["handler"] = SimpleNamespace(flags={"throttling_cost": cost})
+    return bool(asyncio.run(middleware(handler, event, data)))
+
+
+def test_burst_then_refill(clock, answers):
+    throttling = ThrottlingMiddleware(rate=2, burst=6)
+    assert [_feed(throttling, _callback()) for _ in range(7)] == [True] * 6 + [False]
+
+    clock.now += 0.5  # 2 token/s → 1 token
+    assert _feed(throttling, _callback())
+    assert not _feed(throttling, _callback())
+
+    clock.now += 10  # bucket burst dan oshmaydi
+    assert sum(_feed(throttling, _callback()) for _ in range(10)) == 6
+
+
+def test_cost_flag(clock, answers):
+    throttling = ThrottlingMiddleware(rate=2, burst=6)
+    assert _feed(throttling, _callback(), cost=4)
+    assert not _feed(throttling, _callback(), cost=4)
+    assert _feed(throttling, _callback(), cost=2)
+
+    # burst dan katta narx burst ga tenglashtiriladi — to'la bucket bilan o'tadi
+    clock.now += 10
+    assert _feed(throttling, _callback(), cost=100)
+    assert not _feed(throttling, _callback())
+
+
+def test_users_are_limited_separately(clock, answers):
+    throttling = ThrottlingMiddleware(rate=2, burst=1)
+    assert _feed(throttling, _callback(1), user_id=1)
+    assert not _feed(throttling, _callback(1), user_id=1)
+    assert _feed(throttling, _callback(2), user_id=2)
+
+
+def test_dropped_callbacks_are_always_answered_and_warnings_coalesce(clock, answers):
+    throttling = ThrottlingMiddleware(rate=1, burst=1, warn_interval=10)
+    _feed(throttling, _callback())
+    for _ in range(3):
+        assert not _feed(throttling, _callback())
+
+    assert [call.args for call in answers.answer.await_args_list] == [(WARNING_TEXT,), (None,), (None,)]
+    assert throttling.stats()["warnings"] == 1
+
+    clock.now += 10  # token qaytdi, oyna ham o'tdi
+    assert _feed(throttling, _callback())
+    assert not _feed(throttling, _callback())
+    assert answers.answer.await_args_list[-1].args == (WARNING_TEXT,)
+    assert throttling.stats()["warnings"] == 2
+
+
+def test_dropped_messages_get_one_reply_per_window(clock, answers):
+    throttling = ThrottlingMiddleware(rate=1, burst=1, warn_interval=10)
+    _feed(throttling, _message())
+    for _ in range(3):
+        assert not _feed(throttling, _message())
+    answers.reply.assert_awaited_once_with(WARNING_TEXT)
+
+
+def test_idle_users_are_evicted(clock, answers):
+    throttling = ThrottlingMiddleware(rate=2, burst=6, idle_ttl=300)
+    for user_id in range(1, 4):
+        _feed(throttling, _callback(user_id), user_id=user_id)
+    assert throttling.stats()["users"] == 3
+
+    clock.now += 301
+    _feed(throttling, _callback(9), user_id=9)
+    assert throttling.stats()["users"] == 1
+    assert throttling.stats()["evicted"] == 3
+
+
+def test_max_users_evicts_least_recently_seen(clock, answers):
+    throttling = ThrottlingMiddleware(rate=2, burst=1, max_users=2)
+    _feed(throttling, _callback(1), user_id=1)
+    _feed(throttling, _callback(2), user_id=2)
+    _feed(throttling, _callback(3), user_id=3)
+
+    assert throttling.stats()["users"] == 2
+    # 1-foydalanuvchi chiqarib yuborilgan — yangi to'la bucket oladi
+    assert _feed(throttling, _callback(1), user_id=1)
+    assert not _feed(throttling, _callback(3), user_id=3)
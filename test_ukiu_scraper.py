@@ -0,0 +1,198 @@
+"""UKIUScraper keshi: TTL, stale-while-revalidate, shartli so'rov va disk.
+
+    python -m pytest -q test_ukiu_scraper.py
+
+ukiu.uz ga so'rov ketmaydi — ``_fetch_page`` soxta javoblar bilan almashtiriladi.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from utils.ukiu_scraper import UKIUScraper
+
+PAGE = "<html><main><p>{}</p><script>x()</script></main></html>"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("utils.ukiu_scraper.time", clock)
+    return clock
+
+
+class FakeSite:
+    """``url -> javob`` jadvali; har bir so'rov (url, sarlavhalar) bilan yoziladi."""
+
+    def __init__(self, scraper):
+        self.scraper = scraper
+        self.requests = []
+        self.pages = {}
+        self.delay = 0
+
+    async def __call__(self, url, headers=None):
+        self.scraper.fetches += 1
+        self.requests.append((url, dict(headers or {})))
+        await asyncio.sleep(self.delay)
+        response = self.pages.get(url)
+        if response is None:
+            self.scraper.errors += 1
+            return None
+        status, text, etag = response
+        if status == 200 and headers and headers.get("If-None-Match") == etag:
+            return 304, "", {"etag": etag, "last_modified": None}
+        return status, text, {"etag": etag, "last_modified": None}
+
+
+def _scraper(cache_file=None, ttl=60, max_stale=3600):
+    scraper = UKIUScraper(cache_file=cache_file, ttl=ttl, max_stale=max_stale)
+    site = FakeSite(scraper)
+    scraper._fetch_page = site
+    return scraper, site
+
+
+ADMISSION = "https://ukiu.uz/uz/qabul/"
+
+
+def test_fresh_entry_is_served_from_cache(clock):
+    async def scenario():
+        scraper, site = _scraper()
+        site.pages[ADMISSION] = (200, PAGE.format("Qabul ochiq"), '"v1"')
+        texts = [await scraper.get_admission_info("uz") for _ in range(3)]
+        return texts, len(site.requests), scraper.stats()
+
+    texts, requests, stats = asyncio.run(scenario())
+    assert texts == ["Qabul ochiq"] * 3
+    assert requests == 1 and (stats["misses"], stats["hits"]) == (1, 2)
+
+
+def test_stale_entry_is_served_and_revalidated_with_etag(clock):
+    async def scenario():
+        scraper, site = _scraper()
+        site.pages[ADMISSION] = (200, PAGE.format("Qabul ochiq"), '"v1"')
+        await scraper.get_admission_info("uz")
+
+        clock.now += 120  # TTL o'tdi, max_stale ichida
+        stale = await scraper.get_admission_info("uz")
+        await asyncio.gather(*scraper._tasks)
+        fresh_again = await scraper.get_admission_info("uz")
+        return stale, fresh_again, site.requests, scraper.stats()
+
+    stale, fresh_again, requests, stats = asyncio.run(scenario())
+    assert stale == fresh_again == "Qabul ochiq"
+    assert requests[1] == (ADMISSION, {"If-None-Match": '"v1"'})
+    assert (stats["stale_hits"], stats["not_modified"], stats["hits"]) == (1, 1, 1)
+
+
+def test_changed_page_replaces_value_after_revalidation(clock):
+    async def scenario():
+        scraper, site = _scraper()
+        site.pages[ADMISSION] = (200, PAGE.format("Eski"), '"v1"')
+        await scraper.get_admission_info("uz")
+
+        site.pages[ADMISSION] = (200, PAGE.format("Yangi"), '"v2"')
+        clock.now += 7200  # max_stale dan ham eski — yangilash kutiladi
+        return await scraper.get_admission_info("uz")
+
+    assert asyncio.run(scenario()) == "Yangi"
+
+
+def test_unreachable_site_serves_old_copy_or_default(clock):
+    async def scenario():
+        scraper, site = _scraper()
+        site.pages[ADMISSION] = (200, PAGE.format("Qabul ochiq"), None)
+        await scraper.get_admission_info("uz")
+        site.pages.clear()
+        clock.now += 7200
+        return await scraper.get_admission_info("uz"), await scraper.get_address("ru"), await scraper.get_faculties("en")
+
+    assert asyncio.run(scenario()) == ("Qabul ochiq", "Город Ташкент", [])
+
+
+def test_failed_fetch_backs_off_for_retry_window(clock):
+    async def scenario():
+        scraper, site = _scraper(ttl=60, max_stale=600)
+        scraper.retry_after = 30
+        site.pages[ADMISSION] = (200, PAGE.format("Qabul ochiq"), None)
+        await scraper.get_admission_info("uz")
+        site.pages.clear()
+        clock.now += 7200  # max_stale dan o'tgan — odatda bloklovchi so'rov
+
+        first = await scraper.get_admission_info("uz")
+        after_failure = len(site.requests)
+        # Oyna ichida: ukiu.uz ga qayta so'rov yo'q, eski nusxa darhol
+        clock.now += 10
+        backed_off = [await scraper.get_admission_info("uz") for _ in range(3)]
+        during = len(site.requests)
+
+        clock.now += 30
+        site.pages[ADMISSION] = (200, PAGE.format("Yangi"), None)
+        retried = await scraper.get_admission_info("uz")
+        return first, after_failure, backed_off, during, retried, scraper.stats()["backoffs"]
+
+    first, after_failure, backed_off, during, retried, backoffs = asyncio.run(scenario())
+    assert first == "Qabul ochiq" and backed_off == ["Qabul ochiq"] * 3
+    assert during == after_failure and backoffs == 3
+    assert retried == "Yangi"
+
+
+def test_fallback_path_is_tried(clock):
+    async def scenario():
+        scraper, site = _scraper()
+        site.pages["https://ukiu.uz/en/"] = (200, PAGE.format("About KIUF"), None)
+        return await scraper.get_university_info("en"), [url for url, _ in site.requests]
+
+    text, urls = asyncio.run(scenario())
+    assert text == "About KIUF"
+    assert urls == ["https://ukiu.uz/en/about", "https://ukiu.uz/en/"]
+
+
+def test_concurrent_misses_share_one_fetch(clock):
+    async def scenario():
+        scraper, site = _scraper()
+        site.delay = 0.05
+        site.pages[ADMISSION] = (200, PAGE.format("Qabul ochiq"), None)
+        texts = await asyncio.gather(*(scraper.get_admission_info("uz") for _ in range(10)))
+        return set(texts), len(site.requests)
+
+    assert asyncio.run(scenario()) == ({"Qabul ochiq"}, 1)
+
+
+def test_prefetch_skips_fresh_pages(clock):
+    async def scenario():
+        scraper, site = _scraper()
+        for lang in ("uz", "ru", "en"):
+            site.pages[f"https://ukiu.uz/{lang}/qabul/"] = (200, PAGE.format(lang), None)
+            site.pages[f"https://ukiu.uz/{lang}/contact"] = (200, "<address>Yunusobod</address>", None)
+        first = await scraper.prefetch()
+        second = await scraper.prefetch()
+        return first, second, await scraper.get_address("en")
+
+    # 5 sahifa × 3 til; faqat qabul va manzil javob beradi
+    assert asyncio.run(scenario()) == (6, 0, "Yunusobod")
+
+
+def test_cache_survives_restart(clock, tmp_path):
+    cache_file = tmp_path / "ukiu_cache.json"
+
+    async def scenario():
+        scraper, site = _scraper(cache_file)
+        site.pages[ADMISSION] = (200, PAGE.format("Qabul ochiq"), '"v1"')
+        await scraper.get_admission_info("uz")
+        await scraper.close()  # kechiktirilgan yozuv shu yerda bajariladi
+
+        restarted, restarted_site = _scraper(cache_file)
+        return await restarted.get_admission_info("uz"), restarted_site.requests
+
+    text, requests = asyncio.run(scenario())
+    assert text == "Qabul ochiq" and requests == []
+    assert json.loads(cache_file.read_text(encoding="utf-8"))["admission:uz"]["etag"] == '"v1"'
@@ -0,0 +1,119 @@
+"""UserCache: bitta obyekt, TTL va keshni chetlab o'tgan yozuvlar.
+
+    python -m pytest -q test_user_cache.py
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from schemas.language import LanguageEnum
+from services.user_cache import UserCache, user_cache
+
+
+async def _create_user(telegram_id=1001):
+    from models.group import Group
+    from models.user import User
+
+    group = await Group.create(name="AT-21")
+    return await User.create(telegram_id=telegram_id, full_name="Ali", group=group)
+
+
+def test_second_get_returns_same_instance_with_group(run_db):
+    async def scenario():
+        cache = UserCache()
+        await _create_user()
+        first = await cache.get(1001)
+        second = await cache.get(1001)
+        return cache, first, second
+
+    cache, first, second = run_db(scenario)
+    assert first is second
+    assert first.group.name == "AT-21"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_expired_entry_is_reloaded(run_db):
+    async def scenario():
+        cache = UserCache(ttl=0)
+        await _create_user()
+        return await cache.get(1001) is not await cache.get(1001), cache.misses
+
+    reloaded, misses = run_db(scenario)
+    assert reloaded and misses == 2
+
+
+def test_save_through_other_instance_is_not_served_stale(run_db):
+    from models.user import User
+
+    async def scenario():
+        await _create_user()
+        cached = await user_cache.get(1001)
+
+        other = await User.get(telegram_id=1001)
+        other.language = LanguageEnum.RU
+        await other.save()
+
+        fresh = await user_cache.get(1001)
+        return cached, fresh
+
+    user_cache.clear()
+    cached, fresh = run_db(scenario)
+    assert fresh is not cached
+    assert fresh.language == LanguageEnum.RU
+
+
+def test_delete_through_other_instance_drops_entry(run_db):
+    from models.user import User
+
+    async def scenario():
+        await _create_user()
+        await user_cache.get(1001)
+        await (await User.get(telegram_id=1001)).delete()
+        return await user_cache.get(1001)
+
+    user_cache.clear()
+    assert run_db(scenario) is None
+
+
+def test_clean_db_clears_cache(run_db):
+    from handlers.users.admin import clean_db
+
+    async def scenario():
+        await _create_user()
+        await user_cache.get(1001)
+
+        call = SimpleNamespace(data="yes", answer=AsyncMock(), message=SimpleNamespace(edit_text=AsyncMock()))
+        await clean_db(call, SimpleNamespace(clear=AsyncMock()))
+        return await user_cache.get(1001)
+
+    user_cache.clear()
+    assert run_db(scenario) is None
+
+
+def test_failed_write_drops_mutated_entry(run_db, monkeypatch):
+    from handlers.users.language import set_language
+    from utils.db.write_queue import write_queue
+
+    async def failing_submit(fn):
+        raise RuntimeError("database is locked")
+
+    async def scenario():
+        await _create_user()
+        user = await user_cache.get(1001)
+        monkeypatch.setattr(write_queue, "submit", failing_submit)
+        call = SimpleNamespace(
+            data="lang_ru", from_user=SimpleNamespace(id=1001),
+            answer=AsyncMock(), message=SimpleNamespace(edit_text=AsyncMock()),
+        )
+        try:
+            await set_language(call, user)
+        except RuntimeError:
+            pass
+        monkeypatch.undo()
+        return user, await user_cache.get(1001)
+
+    user_cache.clear()
+    mutated, fresh = run_db(scenario)
+    assert mutated.language == LanguageEnum.RU
+    assert fresh is not mutated
+    assert fresh.language == LanguageEnum.UZ
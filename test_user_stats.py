@@ -0,0 +1,107 @@
+"""Admin statistikasi: SQL agregatlar, kunlik rollup va keyset pagination.
+
+    python -m pytest -q test_user_stats.py
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from services import user_stats
+from services.user_stats import TASHKENT, get_daily_history, get_user_stats, get_users_page
+
+
+async def _users(count):
+    from models.user import User
+
+    await User.bulk_create([User(telegram_id=1000 + n, full_name=f"User {n}") for n in range(1, count + 1)])
+    return list(await User.all().order_by("id").values_list("id", flat=True))
+
+
+def test_pages_forward_and_back_cover_every_user_once(run_db):
+    async def scenario():
+        ids = await _users(45)
+        pages, after_id = [], None
+        while True:
+            users, has_prev, has_next = await get_users_page(after_id=after_id, limit=20)
+            pages.append(([user.id for user in users], has_prev, has_next))
+            if not has_next:
+                break
+            after_id = users[-1].id
+
+        last_page_first = pages[-1][0][0]
+        back, has_prev, has_next = await get_users_page(before_id=last_page_first, limit=20)
+        return ids, pages, ([user.id for user in back], has_prev, has_next)
+
+    ids, pages, back = run_db(scenario)
+    assert [flags for _, *flags in pages] == [[False, True], [True, True], [True, False]]
+    assert [user_id for page, *_ in pages for user_id in page] == ids
+    assert back == (pages[1][0], True, True)
+
+
+def test_first_page_backwards_has_no_prev(run_db):
+    async def scenario():
+        ids = await _users(25)
+        users, has_prev, has_next = await get_users_page(before_id=ids[20], limit=20)
+        return ids, [user.id for user in users], has_prev, has_next
+
+    ids, page, has_prev, has_next = run_db(scenario)
+    assert page == ids[:20] and not has_prev and has_next
+
+
+def test_user_stats_aggregates(run_db):
+    from models.user import User
+
+    async def scenario():
+        await _users(4)
+        old = datetime.now(timezone.utc) - timedelta(days=10)
+        await User.filter(telegram_id__in=[1001, 1002]).update(created_at=old)
+        await User.filter(telegram_id=1001).update(phone_number="+998901234567", username="ali", reminder_enabled=True)
+        await User.filter(telegram_id=1002).update(phone_number="", hemis_login="370211100001")
+        return await get_user_stats()
+
+    stats = run_db(scenario)
+    assert stats["total"] == 4
+    assert (stats["today"], stats["week"], stats["month"]) == (2, 2, 4)
+    assert (stats["with_phone"], stats["with_username"], stats["hemis_linked"], stats["reminders"]) == (1, 1, 1, 1)
+
+
+def test_day_boundaries_follow_tashkent_time(run_db):
+    from models.user import User
+
+    midnight = datetime.now(TASHKENT).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    async def scenario():
+        await _users(2)
+        # 00:30 Toshkent — UTC da hali kechagi kun (19:30); 23:30 Toshkent — kecha
+        after, before = midnight + timedelta(minutes=30), midnight - timedelta(minutes=30)
+        await User.filter(telegram_id=1001).update(created_at=after.astimezone(timezone.utc))
+        await User.filter(telegram_id=1002).update(created_at=before.astimezone(timezone.utc))
+        stats = await get_user_stats()
+        history = await get_daily_history(days=1)
+        return stats, history[0]
+
+    stats, yesterday = run_db(scenario)
+    assert stats["today"] == 1
+    assert yesterday.day == (midnight - timedelta(days=1)).date()
+    assert (yesterday.new_users, yesterday.total_users) == (1, 1)
+
+
+def test_daily_history_is_computed_once_and_stored(run_db, monkeypatch):
+    from models.daily_stats import DailyStats
+    from models.user import User
+
+    async def scenario():
+        await _users(3)
+        yesterday = datetime.now(TASHKENT) - timedelta(days=1)
+        await User.filter(telegram_id=1001).update(created_at=yesterday.astimezone(timezone.utc))
+
+        first = await get_daily_history(days=3)
+        computed = []
+        original = user_stats._compute_rollups
+        monkeypatch.setattr(user_stats, "_compute_rollups", lambda days: computed.append(days) or original(days))
+        second = await get_daily_history(days=3)
+        return first, second, computed, await DailyStats.all().count()
+
+    first, second, computed, stored = run_db(scenario)
+    assert [(row.new_users, row.total_users) for row in first] == [(0, 0), (0, 0), (1, 1)]
+    assert [row.day for row in second] == [row.day for row in first]
+    assert computed == [] and stored == 3
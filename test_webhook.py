@@ -0,0 +1,110 @@
+"""Webhook server: secret token, takroriy update'lar, /health va /metrics.
+
+    python -m pytest -q test_webhook.py
+"""
+
+import asyncio
+
+from aiogram import Bot, Dispatcher
+from aiohttp.test_utils import TestClient, TestServer
+
+from data.config import WEBHOOK_PATH
+from utils.webhook import SECRET_HEADER, create_webhook_app
+
+SECRET = "s3cret-token"
+HEADERS = {SECRET_HEADER: SECRET}
+
+
+def _serve(scenario, dedupe_size=None):
+    """``scenario(client, handler, dispatcher)`` ni ishlayotgan test server bilan bajaradi."""
+
+    async def run():
+        dispatcher = Dispatcher()
+        seen = []
+
+        @dispatcher.message()
+        async def echo(message):
+            seen.append(message.message_id)
+
+        app = create_webhook_app(dispatcher, Bot("123456:TEST-TOKEN-aaaaaaaaaaaaaaaaaaaaaaaaaaaaa"))
+        handler = app["webhook_handler"]
+        handler.secret = SECRET
+        if dedupe_size is not None:
+            handler.dedupe_size = dedupe_size
+
+        async with TestClient(TestServer(app)) as client:
+            result = await scenario(client, handler)
+            await handler.drain(timeout=5)
+        return result, seen
+
+    return asyncio.run(run())
+
+
+def _update(update_id, message_id=None):
+    update = {"update_id": update_id}
+    if message_id is not None:
+        update["message"] = {
+            "message_id": message_id,
+            "date": 1760000000,
+            "chat": {"id": 42, "type": "private"},
+            "text": "salom",
+        }
+    return update
+
+
+def test_wrong_or_missing_secret_is_rejected():
+    async def scenario(client, handler):
+        missing = await client.post(WEBHOOK_PATH, json=_update(1, 1))
+        wrong = await client.post(WEBHOOK_PATH, json=_update(1, 1), headers={SECRET_HEADER: "boshqa"})
+        return missing.status, wrong.status, dict(handler.updates)
+
+    (missing, wrong, updates), seen = _serve(scenario)
+    assert missing == wrong == 401
+    assert updates["unauthorized"] == 2 and updates["accepted"] == 0
+    assert seen == []
+
+
+def test_redelivered_update_is_processed_once():
+    async def scenario(client, handler):
+        statuses = [(await client.post(WEBHOOK_PATH, json=_update(7, 70), headers=HEADERS)).status for _ in range(3)]
+        await client.post(WEBHOOK_PATH, json=_update(8, 80), headers=HEADERS)
+        return statuses, dict(handler.updates)
+
+    (statuses, updates), seen = _serve(scenario)
+    assert statuses == [200, 200, 200]
+    assert (updates["accepted"], updates["duplicate"]) == (2, 2)
+    assert sorted(seen) == [70, 80]
+
+
+def test_dedupe_window_is_bounded():
+    async def scenario(client, handler):
+        for update_id in (1, 2, 3, 1):
+            await client.post(WEBHOOK_PATH, json=_update(update_id), headers=HEADERS)
+        return len(handler._seen), dict(handler.updates)
+
+    (size, updates), _ = _serve(scenario, dedupe_size=2)
+    # 1 eng eski sifatida unutilgan — qayta qabul qilinadi
+    assert size == 2 and (updates["accepted"], updates["duplicate"]) == (4, 0)
+
+
+def test_invalid_body_is_400():
+    async def scenario(client, handler):
+        response = await client.post(WEBHOOK_PATH, data=b"not json", headers=HEADERS)
+        return response.status, handler.updates["invalid"]
+
+    assert _serve(scenario)[0] == (400, 1)
+
+
+def test_health_and_metrics():
+    async def scenario(client, handler):
+        await client.post(WEBHOOK_PATH, json=_update(1, 10), headers=HEADERS)
+        await handler.drain(timeout=5)
+        health = await (await client.get("/health")).json()
+        metrics = await (await client.get("/metrics")).text()
+        return health, metrics
+
+    (health, metrics), _ = _serve(scenario)
+    assert health["status"] == "ok" and health["mode"] == "webhook"
+    assert 'kiuf_webhook_updates_total{result="accepted"} 1' in metrics
+    assert "kiuf_webhook_processed_total 1" in metrics
+    assert "kiuf_db_writes_writes" in metrics
@@ -0,0 +1,112 @@
+"""Hafta ID ↔ sana indeksi: HEMIS ``<select>`` ni o'qish, ekstrapolyatsiya va DB.
+
+    python -m pytest -q test_week_calendar.py
+"""
+
+from datetime import date, timedelta
+
+from services.hemis_service import parse_week_options
+from services.week_calendar import WeekCalendar
+
+THIS_MONDAY = date.today() - timedelta(days=date.today().weekday())
+THIS_WEEK = ("10900", THIS_MONDAY, THIS_MONDAY + timedelta(days=5))
+LAST_WEEK = ("10899", THIS_MONDAY - timedelta(weeks=1), THIS_MONDAY - timedelta(days=2))
+
+SELECT = """
+<select name="week">
+  <option value="">Haftani tanlang</option>
+  <option value="10849">13 aprel - 18 aprel</option>
+  <option value="10850">20 aprel - 25 aprel</option>
+  <option value="10892">28 dekabr - 2 yanvar</option>
+  <option value="abc">1 may - 6 may</option>
+</select>
+"""
+
+
+def test_parse_week_options_dates_and_year_boundary():
+    weeks = parse_week_options(SELECT, today=date(2026, 4, 15))
+    assert weeks == [
+        ("10849", date(2026, 4, 13), date(2026, 4, 18)),
+        ("10850", date(2026, 4, 20), date(2026, 4, 25)),
+        ("10892", date(2025, 12, 28), date(2026, 1, 2)),
+    ]
+
+
+def test_lookups_use_index_and_extrapolate():
+    calendar = WeekCalendar()
+    calendar.observe([("10850", date(2026, 4, 20), date(2026, 4, 25))])
+
+    assert calendar.week_id_for(date(2026, 4, 22)) == 10850
+    assert calendar.week_id_for(date(2026, 4, 26)) == 10850  # yakshanba
+    assert calendar.week_id_for(date(2026, 5, 4)) == 10852
+    assert calendar.date_range(10850) == (date(2026, 4, 20), date(2026, 4, 25))
+    assert calendar.date_range(10848) == (date(2026, 4, 6), date(2026, 4, 11))
+
+
+def test_empty_index_falls_back_to_reference_week():
+    calendar = WeekCalendar()
+    assert calendar.week_id_for(date(2026, 3, 11)) == 10844
+    assert calendar.date_range(10845) == (date(2026, 3, 16), date(2026, 3, 21))
+
+
+def test_observe_notifies_only_on_change():
+    calendar = WeekCalendar()
+    calls = []
+    calendar.add_listener(lambda: calls.append(1))
+    week = ("10850", date(2026, 4, 20), date(2026, 4, 25))
+
+    calendar.observe([week])
+    calendar.observe([week])
+    assert len(calls) == 1
+
+
+def test_flush_persists_and_load_restores(run_db):
+    from models.week import Week
+
+    async def scenario():
+        calendar = WeekCalendar()
+        calendar.observe([THIS_WEEK])
+        await calendar.flush()
+        # Eski yozuv: start_date == end_date (haqiqiy sana emas) — indeksga tushmaydi
+        await Week.create(week_number=10700, start_date=date(2025, 9, 1), end_date=date(2025, 9, 1))
+
+        restored = WeekCalendar()
+        await restored.load()
+        return (
+            await Week.filter(week_number=10900).values_list("start_date", "end_date"),
+            len(restored),
+            restored.week_id_for(THIS_MONDAY + timedelta(days=1)),
+        )
+
+    rows, size, week_id = run_db(scenario)
+    assert rows == [THIS_WEEK[1:]]
+    assert size == 1 and week_id == 10900
+
+
+def test_past_weeks_stay_in_memory_but_are_not_recreated(run_db):
+    from models.week import Week
+
+    async def scenario():
+        calendar = WeekCalendar()
+        # Cleanup o'tgan haftani o'chirgan; keyingi jadval yuklanishi uni yana ko'radi
+        calendar.observe([LAST_WEEK, THIS_WEEK])
+        await calendar.flush()
+        return await Week.all().values_list("week_number", flat=True), calendar.date_range(10899)
+
+    weeks, last_range = run_db(scenario)
+    assert weeks == [10900]
+    assert last_range == LAST_WEEK[1:]
+
+
+def test_get_week_creates_row_once(run_db):
+    from models.week import Week
+
+    async def scenario():
+        calendar = WeekCalendar()
+        first = await calendar.get_week("10851")
+        second = await calendar.get_week(10851)
+        return first is second, await Week.filter(week_number=10851).count(), first.start_date
+
+    same, count, start = run_db(scenario)
+    assert same and count == 1
+    assert start == date(2026, 4, 27)  # tayanch 10844 → 2026-03-09, +7 hafta
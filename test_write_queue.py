@@ -0,0 +1,97 @@
+"""WriteQueue: yozuvlarni partiyalash, xatoni faqat egasiga qaytarish va shutdown.
+
+    python -m pytest -q test_write_queue.py
+"""
+
+import asyncio
+
+import pytest
+
+from utils.db.write_queue import WriteQueue
+
+
+async def _create(telegram_id):
+    from models.user import User
+
+    return await User.create(telegram_id=telegram_id, full_name=f"User {telegram_id}")
+
+
+async def _telegram_ids():
+    from models.user import User
+
+    return sorted(await User.all().values_list("telegram_id", flat=True))
+
+
+def test_concurrent_writes_share_one_transaction(run_db):
+    async def scenario():
+        queue = WriteQueue(max_batch=50, delay=0.05)
+        users = await asyncio.gather(*(queue.submit(lambda n=n: _create(1000 + n)) for n in range(10)))
+        await queue.stop()
+        return [user.telegram_id for user in users], queue.stats(), await _telegram_ids()
+
+    returned, stats, stored = run_db(scenario)
+    assert returned == list(range(1000, 1010))
+    assert stored == returned
+    assert (stats["batches"], stats["writes"], stats["fallbacks"]) == (1, 10, 0)
+
+
+def test_batches_are_capped_by_max_batch(run_db):
+    async def scenario():
+        queue = WriteQueue(max_batch=4, delay=0.05)
+        await asyncio.gather(*(queue.submit(lambda n=n: _create(1000 + n)) for n in range(10)))
+        await queue.stop()
+        return queue.stats()
+
+    stats = run_db(scenario)
+    assert (stats["batches"], stats["writes"]) == (3, 10)
+
+
+def test_failing_write_only_fails_its_owner(run_db):
+    async def scenario():
+        queue = WriteQueue(max_batch=50, delay=0.05)
+        # 1001 ikki marta — unique telegram_id buziladi
+        results = await asyncio.gather(
+            *(queue.submit(lambda n=n: _create(n)) for n in (1000, 1001, 1001, 1002)),
+            return_exceptions=True,
+        )
+        await queue.stop()
+        return results, queue.stats(), await _telegram_ids()
+
+    results, stats, stored = run_db(scenario)
+    errors = [result for result in results if isinstance(result, Exception)]
+    assert len(errors) == 1 and isinstance(results[2], type(errors[0]))
+    assert stored == [1000, 1001, 1002]
+    assert stats["fallbacks"] == 1
+
+
+def test_single_failing_write_raises(run_db):
+    async def scenario():
+        queue = WriteQueue(delay=0)
+
+        async def broken():
+            raise ValueError("boom")
+
+        try:
+            with pytest.raises(ValueError, match="boom"):
+                await queue.submit(broken)
+            # Worker xatodan keyin ham ishlashda davom etadi
+            return (await queue.submit(lambda: _create(1000))).telegram_id
+        finally:
+            await queue.stop()
+
+    assert run_db(scenario) == 1000
+
+
+def test_stop_waits_for_queued_writes(run_db):
+    async def scenario():
+        queue = WriteQueue(max_batch=2, delay=0.01)
+        pending = [asyncio.create_task(queue.submit(lambda n=n: _create(1000 + n))) for n in range(5)]
+        await asyncio.sleep(0)
+        await queue.stop()
+        stored = await _telegram_ids()  # stop() qaytganda hammasi commit bo'lgan
+        await asyncio.gather(*pending)
+        return queue.stats()["queued"], stored
+
+    queued, stored = run_db(scenario)
+    assert queued == 0
+    assert stored == list(range(1000, 1005))
@@ -0,0 +1,180 @@
+"""SQLite onlayn backup: backup API + siqish (zstd/gzip) + Telegram limiti bo'yicha bo'laklash
+
+``sqlite3.Connection.backup`` ishlayotgan bazadan izchil (consistent) nusxa
+oladi — Tortoise yozayotgan bo'lsa ham nusxa "yirtilmaydi". Hammasi alohida
+thread'da bajariladi, event loop bloklanmaydi.
+
+``zstandard`` o'rnatilgan bo'lsa .zst, aks holda .gz ishlatiladi (ixtiyoriy
+bog'liqlik — ``requirements-dev.txt`` da, testlar ikkala yo'lni tekshiradi).
+"""
+
+import asyncio
+import gzip
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import quote
+
+try:
+    import zstandard
+except ImportError:  # ixtiyoriy bog'liqlik
+    zstandard = None
+
+from data.config import BACKUP_DIR, BACKUP_KEEP, DB_ENGINE, DB_PATH
+
+logger = logging.getLogger(__name__)
+
+# Telegram bot API orqali yuklash limiti 50 MB — biroz zaxira bilan
+PART_SIZE = 49 * 1024 * 1024
+# Backup API har qadamda shuncha sahifa ko'chiradi (qadamlar orasida yozuvchilar ishlay oladi)
+PAGES_PER_STEP = 1024
+
+_BACKUP_RE = re.compile(r"^kiuf_bot_(\d{8}_\d{6})\.db\.(zst|gz)(\.part\d+)?$")
+
+
+class _SplitWriter:
+    """Yozilgan baytlarni ``part_size`` dan oshmaydigan fayllarga bo'lib yozadi."""
+
+    def __init__(self, base: Path, part_size: int):
+        self.base = base
+        self.part_size = part_size
+        self.paths: List[Path] = []
+        self._file = None
+        self._written = 0
+
+    def _roll(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        path = self.base.with_name(f"{self.base.name}.part{len(self.paths) + 1:02d}")
+        self.paths.append(path)
+        self._file = open(path, "wb")
+        self._written = 0
+
+    def write(self, data) -> int:
+        view = memoryview(data)
+        while view:
+            if self._file is None or self._written >= self.part_size:
+                self._roll()
+            chunk = view[: self.part_size - self._written]
+            self._file.write(chunk)
+            self._written += len(chunk)
+            view = view[len(chunk):]
+        return len(data)
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> List[Path]:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        # Bitta bo'lak bo'lsa .part01 qo'shimchasi kerak emas
+        if len(self.paths) == 1:
+            self.paths[0] = self.paths[0].rename(self.base)
+        return self.paths
+
+
+def _compress(src: Path, writer: _SplitWriter) -> None:
+    with open(src, "rb") as f:
+        if zstandard is not None:
+            zstandard.ZstdCompressor(level=10, threads=-1).copy_stream(f, writer)
+        else:
+            with gzip.GzipFile(filename=src.name, mode="wb", fileobj=writer, compresslevel=6) as gz:
+                while True:
+                    chunk = f.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    gz.write(chunk)
+
+
+def create_backup(
+    db_path: Path = DB_PATH,
+    dest_dir: Path = BACKUP_DIR,
+    part_size: int = PART_SIZE,
+) -> List[Path]:
+    """Bazaning izchil, siqilgan nusxasini yaratadi (sinxron — thread'da chaqiring).
+
+    Qaytaradi: backup fayllari ro'yxati (katta bo'lsa ``.partNN`` bo'laklari).
+    """
+    db_path = Path(db_path)
+    dest_dir = Path(dest_dir)
+    if not db_path.exists():
+        raise FileNotFoundError(f"Baza fayli topilmadi: {db_path}")
+    dest_dir.mkdir(parents=True, exist_ok=True)
+
+    suffix = "zst" if zstandard is not None else "gz"
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    base = dest_dir / f"kiuf_bot_{timestamp}.db.{suffix}"
+    # Shu soniyada yaratilgan oldingi backup qoldiqlari aralashib ketmasin
+    for stale in dest_dir.glob(f"{base.name}*"):
+        stale.unlink()
+
+    fd, snapshot = tempfile.mkstemp(prefix="kiuf_bot_snapshot_", suffix=".db", dir=dest_dir)
+    os.close(fd)
+    snapshot = Path(snapshot)
+
+    try:
+        source = sqlite3.connect(f"file:{quote(str(db_path))}?mode=ro", uri=True)
+        target = sqlite3.connect(snapshot)
+        try:
+            source.backup(target, pages=PAGES_PER_STEP)
+        finally:
+            target.close()
+            source.close()
+
+        writer = _SplitWriter(base, part_size)
+        try:
+            _compress(snapshot, writer)
+        finally:
+            paths = writer.close()
+    finally:
+        snapshot.unlink(missing_ok=True)
+
+    total = sum(path.stat().st_size for path in paths)
+    logger.info(
+        f"Backup yaratildi: {base.name} ({total / 2**20:.2f} MB, {len(paths)} ta fayl, "
+        f"asl hajm {db_path.stat().st_size / 2**20:.2f} MB)"
+    )
+    return paths
+
+
+def prune_backups(dest_dir: Path = BACKUP_DIR, keep: int = BACKUP_KEEP) -> int:
+    """Eng yangi ``keep`` ta backupdan boshqalarini o'chiradi. O'chirilgan fayllar sonini qaytaradi."""
+    dest_dir = Path(dest_dir)
+    if not dest_dir.exists():
+        return 0
+
+    sets = {}
+    for path in dest_dir.iterdir():
+        match = _BACKUP_RE.match(path.name)
+        if match:
+            sets.setdefault(match.group(1), []).append(path)
+
+    removed = 0
+    for timestamp in sorted(sets, reverse=True)[max(keep, 0):]:
+        for path in sets[timestamp]:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+async def backup_database(
+    db_path: Path = DB_PATH,
+    dest_dir: Path = BACKUP_DIR,
+    keep: Optional[int] = BACKUP_KEEP,
+) -> List[Path]:
+    """Backup yaratadi (thread'da) va eski backuplarni ``keep`` bo'yicha tozalaydi."""
+    if DB_ENGINE != "sqlite":
+        raise RuntimeError("PostgreSQL rejimida backup uchun pg_dump ishlating")
+    paths = await asyncio.to_thread(create_backup, db_path, dest_dir)
+    if keep is not None:
+        removed = await asyncio.to_thread(prune_backups, dest_dir, keep)
+        if removed:
+            logger.info(f"Eski backup fayllari o'chirildi: {removed} ta")
+    return paths
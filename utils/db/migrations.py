@@ -0,0 +1,277 @@
+"""Versiyalangan sxema migratsiyalari
+
+Bazadagi ``schema_version`` jadvali bitta butun son — qo'llangan oxirgi
+migratsiya raqamini saqlaydi. Ishga tushishda faqat shu son o'qiladi;
+u ``LATEST_VERSION`` ga teng bo'lsa hech qanday introspeksiya qilinmaydi.
+
+Qo'llanmagan migratsiyalar versiya yozuvi bilan birga bitta tranzaksiyada
+bajariladi. Bir vaqtda ishga tushgan bir nechta jarayon (worker) bitta
+versiyani ikki marta qo'llamasligi uchun tranzaksiya avval qulf oladi
+(PostgreSQL: ``pg_advisory_xact_lock``, SQLite: birinchi so'rov yozuv —
+yozish qulfi ``busy_timeout`` gacha kutiladi) va versiyani qulf ostida
+qayta o'qiydi.
+
+Yangi migratsiya qo'shish:
+1. ``MIGRATIONS`` oxiriga keyingi raqam bilan yozuv qo'shing.
+2. Qadam SQL satrlari ro'yxati yoki ``async def step(conn)`` funksiya bo'lishi mumkin.
+   Funksiya ichida ``conn.execute_query`` ishlating: SQLite da ``execute_script``
+   (sqlite3 ``executescript``) ochiq tranzaksiyani oldin COMMIT qilib yuboradi.
+   Har bir migratsiya o'z DDL ini aniq yozadi — modeldan (``generate_schemas``)
+   olinmaydi, aks holda eski migratsiya keyingi model o'zgarishlarini ham
+   qo'llab yuboradi. Dialektlar farqi ``{pk}``, ``{ts}`` kabi belgilar bilan
+   beriladi (``_TYPES``).
+3. Qadamlar idempotent bo'lsin (``IF NOT EXISTS`` va h.k.) — migratsiyalardan
+   oldingi bazalarda jadvallar allaqachon bor bo'lishi mumkin.
+"""
+
+import logging
+import time
+from typing import Awaitable, Callable, List, NamedTuple, Union
+
+from tortoise import Tortoise
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.exceptions import OperationalError
+from tortoise.transactions import in_transaction
+
+logger = logging.getLogger(__name__)
+
+Step = Union[List[str], Callable[[BaseDBAsyncClient], Awaitable[None]]]
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    step: Step
+
+
+async def _legacy_user_columns(conn: BaseDBAsyncClient) -> None:
+    """Migratsiyalardan oldingi SQLite bazalarga keyinroq qo'shilgan ustunlar."""
+    if conn.capabilities.dialect != "sqlite":
+        return
+    columns = {row["name"] for row in await conn.execute_query_dict("PRAGMA table_info(users)")}
+    if not columns:  # yangi baza — jadvalni keyingi migratsiya yaratadi
+        return
+
+    legacy = [
+        ("phone_number",      "ALTER TABLE users ADD COLUMN phone_number VARCHAR(20) NULL"),
+        ("hemis_login",       "ALTER TABLE users ADD COLUMN hemis_login VARCHAR(100) NULL"),
+        ("hemis_password",    "ALTER TABLE users ADD COLUMN hemis_password VARCHAR(100) NULL"),
+        ("group_id",          "ALTER TABLE users ADD COLUMN group_id INT REFERENCES groups (id) ON DELETE SET NULL"),
+        ("reminder_enabled",  "ALTER TABLE users ADD COLUMN reminder_enabled BOOLEAN NOT NULL DEFAULT 0"),
+    ]
+    for name, sql in legacy:
+        if name not in columns:
+            await conn.execute_query(sql)
+            logger.info(f"users jadvaliga '{name}' ustuni qo'shildi")
+
+
+# DDL dagi dialektga bog'liq turlar
+_TYPES = {
+    "sqlite": {
+        "pk": "INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL",
+        "ts": "TIMESTAMP",
+        "bool": "INT",
+        "false": "0",
+        "json": "JSON",
+        "blob": "BLOB",
+    },
+    "postgres": {
+        "pk": "SERIAL NOT NULL PRIMARY KEY",
+        "ts": "TIMESTAMPTZ",
+        "bool": "BOOL",
+        "false": "FALSE",
+        "json": "JSONB",
+        "blob": "BYTEA",
+    },
+}
+
+# PostgreSQL advisory lock kaliti (migratsiyalar uchun)
+MIGRATION_LOCK_ID = 7_461_001
+
+_BASELINE_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS "groups" (
+    "id" {pk},
+    "name" VARCHAR(50) NOT NULL UNIQUE,
+    "created_at" {ts} NOT NULL DEFAULT CURRENT_TIMESTAMP
+)""",
+    """CREATE TABLE IF NOT EXISTS "users" (
+    "id" {pk},
+    "telegram_id" BIGINT NOT NULL UNIQUE,
+    "username" VARCHAR(255),
+    "full_name" VARCHAR(255),
+    "phone_number" VARCHAR(20),
+    "language" VARCHAR(7) NOT NULL DEFAULT 'uz',
+    "reminder_enabled" {bool} NOT NULL DEFAULT {false},
+    "hemis_login" VARCHAR(100),
+    "hemis_password" VARCHAR(100),
+    "created_at" {ts} NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" {ts} NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "group_id" INT REFERENCES "groups" ("id") ON DELETE CASCADE
+)""",
+    'CREATE INDEX IF NOT EXISTS "idx_users_telegra_ab91e9" ON "users" ("telegram_id")',
+    'CREATE INDEX IF NOT EXISTS "idx_users_created_43d91f" ON "users" ("created_at")',
+    'CREATE INDEX IF NOT EXISTS "idx_users_reminde_f7cf25" ON "users" ("reminder_enabled", "group_id")',
+    """CREATE TABLE IF NOT EXISTS "weeks" (
+    "id" {pk},
+    "week_number" INT NOT NULL,
+    "start_date" DATE,
+    "end_date" DATE,
+    "created_at" {ts} NOT NULL DEFAULT CURRENT_TIMESTAMP
+)""",
+    'CREATE INDEX IF NOT EXISTS "idx_weeks_week_nu_3c3812" ON "weeks" ("week_number")',
+    """CREATE TABLE IF NOT EXISTS "schedules" (
+    "id" {pk},
+    "day" VARCHAR(20) NOT NULL,
+    "pair_number" INT NOT NULL,
+    "subject" VARCHAR(255) NOT NULL,
+    "teacher" VARCHAR(255),
+    "room" VARCHAR(100),
+    "lesson_type" VARCHAR(50),
+    "lesson_time" VARCHAR(20),
+    "created_at" {ts} NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "group_id" INT NOT NULL REFERENCES "groups" ("id") ON DELETE CASCADE,
+    "week_id" INT NOT NULL REFERENCES "weeks" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_schedules_group_i_4b2bba" UNIQUE ("group_id", "week_id", "day", "pair_number")
+)""",
+    'CREATE INDEX IF NOT EXISTS "idx_schedules_week_id_6e3342" '
+    'ON "schedules" ("week_id", "day", "group_id", "pair_number")',
+    """CREATE TABLE IF NOT EXISTS "hemis_sessions" (
+    "id" {pk},
+    "telegram_id" BIGINT NOT NULL UNIQUE,
+    "cookies" {json} NOT NULL,
+    "created_at" {ts} NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" {ts} NOT NULL DEFAULT CURRENT_TIMESTAMP
+)""",
+    """CREATE TABLE IF NOT EXISTS "schedule_versions" (
+    "id" {pk},
+    "content_hash" VARCHAR(64) NOT NULL,
+    "updated_at" {ts} NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "group_id" INT NOT NULL REFERENCES "groups" ("id") ON DELETE CASCADE,
+    "week_id" INT NOT NULL REFERENCES "weeks" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_schedule_ve_group_i_20a081" UNIQUE ("group_id", "week_id")
+)""",
+    """CREATE TABLE IF NOT EXISTS "broadcasts" (
+    "id" {pk},
+    "admin_chat_id" BIGINT NOT NULL,
+    "from_chat_id" BIGINT NOT NULL,
+    "message_id" INT NOT NULL,
+    "progress_message_id" INT,
+    "status" VARCHAR(20) NOT NULL DEFAULT 'pending',
+    "enqueued" {bool} NOT NULL DEFAULT {false},
+    "last_user_id" INT NOT NULL DEFAULT 0,
+    "total" INT NOT NULL DEFAULT 0,
+    "delivered" INT NOT NULL DEFAULT 0,
+    "blocked" INT NOT NULL DEFAULT 0,
+    "failed" INT NOT NULL DEFAULT 0,
+    "created_at" {ts} NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "finished_at" {ts}
+)""",
+    'CREATE INDEX IF NOT EXISTS "idx_broadcasts_status_ac4f51" ON "broadcasts" ("status")',
+    """CREATE TABLE IF NOT EXISTS "broadcast_outbox" (
+    "id" {pk},
+    "telegram_id" BIGINT NOT NULL,
+    "status" VARCHAR(20) NOT NULL DEFAULT 'pending',
+    "error" VARCHAR(255),
+    "broadcast_id" INT NOT NULL REFERENCES "broadcasts" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_broadcast_o_broadca_5d4468" UNIQUE ("broadcast_id", "telegram_id")
+)""",
+    'CREATE INDEX IF NOT EXISTS "idx_broadcast_o_broadca_874e18" '
+    'ON "broadcast_outbox" ("broadcast_id", "status", "id")',
+    """CREATE TABLE IF NOT EXISTS "daily_stats" (
+    "id" {pk},
+    "day" DATE NOT NULL UNIQUE,
+    "new_users" INT NOT NULL DEFAULT 0,
+    "total_users" INT NOT NULL DEFAULT 0,
+    "created_at" {ts} NOT NULL DEFAULT CURRENT_TIMESTAMP
+)""",
+]
+
+_FSM_STATES = [
+    """CREATE TABLE IF NOT EXISTS "fsm_states" (
+    "id" {pk},
+    "key" VARCHAR(255) NOT NULL UNIQUE,
+    "state" VARCHAR(255),
+    "data" {blob},
+    "expires_at" {ts} NOT NULL
+)""",
+    'CREATE INDEX IF NOT EXISTS "idx_fsm_states_expires_ca31f1" ON "fsm_states" ("expires_at")',
+]
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "legacy users columns", _legacy_user_columns),
+    Migration(2, "baseline schema: tables and indexes", _BASELINE_SCHEMA),
+    Migration(3, "fsm_states table", _FSM_STATES),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+async def get_schema_version(conn: BaseDBAsyncClient) -> int:
+    try:
+        rows = await conn.execute_query_dict("SELECT version FROM schema_version WHERE id = 1")
+    except OperationalError:  # jadval hali yo'q
+        return 0
+    return rows[0]["version"] if rows else 0
+
+
+async def _set_schema_version(conn: BaseDBAsyncClient, version: int) -> None:
+    # Faqat butun sonlar — dialektga bog'liq parametr belgilarisiz
+    await conn.execute_query(
+        f"UPDATE schema_version SET version = {int(version)}, applied_at = {int(time.time())} WHERE id = 1"
+    )
+
+
+async def _lock_schema_version(conn: BaseDBAsyncClient) -> None:
+    """Tranzaksiya ichida migratsiya qulfini oladi (boshqa worker tugashini kutadi)."""
+    dialect = conn.capabilities.dialect
+    if dialect == "postgres":
+        await conn.execute_query(f"SELECT pg_advisory_xact_lock({MIGRATION_LOCK_ID})")
+
+    await conn.execute_query(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "id INT PRIMARY KEY, version INT NOT NULL, applied_at BIGINT NOT NULL)"
+    )
+    # SQLite: yozuv bilan boshlangan tranzaksiya yozish qulfini oladi va
+    # band bo'lsa busy_timeout gacha kutadi — keyingi o'qish yangi holatni ko'radi
+    insert = "INSERT OR IGNORE INTO" if dialect == "sqlite" else "INSERT INTO"
+    conflict = "" if dialect == "sqlite" else " ON CONFLICT (id) DO NOTHING"
+    await conn.execute_query(f"{insert} schema_version (id, version, applied_at) VALUES (1, 0, 0){conflict}")
+
+
+async def _run_step(conn: BaseDBAsyncClient, step: Step) -> None:
+    if callable(step):
+        await step(conn)
+        return
+    types = _TYPES[conn.capabilities.dialect]
+    for sql in step:
+        await conn.execute_query(sql.format(**types))
+
+
+async def apply_migrations(connection_name: str = "default") -> int:
+    """Qo'llanmagan migratsiyalarni tartib bilan bajaradi. Joriy versiyani qaytaradi."""
+    current = await get_schema_version(Tortoise.get_connection(connection_name))
+    if current >= LATEST_VERSION:
+        return current
+
+    async with in_transaction(connection_name) as conn:
+        await _lock_schema_version(conn)
+        # Qulfni kutayotganda boshqa worker migratsiyalarni qo'llagan bo'lishi mumkin
+        current = await get_schema_version(conn)
+        for migration in MIGRATIONS:
+            if migration.version <= current:
+                continue
+            started = time.monotonic()
+            await _run_step(conn, migration.step)
+            await _set_schema_version(conn, migration.version)
+            current = migration.version
+            logger.info(
+                f"Migratsiya {migration.version} ({migration.description}) qo'llandi: "
+                f"{(time.monotonic() - started) * 1000:.0f} ms"
+            )
+
+    conn = Tortoise.get_connection(connection_name)
+    if conn.capabilities.dialect == "sqlite":
+        # Yangi indekslar uchun planner statistikasi
+        await conn.execute_script("PRAGMA optimize")
+    return current
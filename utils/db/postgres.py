@@ -1,24 +1,122 @@
-from typing import Union
+"""PostgreSQL (``DB_ENGINE=postgres``) — issiq yo'llar uchun asyncpg pool
 
-import asyncpg
-from asyncpg import Connection
-from asyncpg.pool import Pool
+Tortoise o'z pool'i bilan ishlaydi; bu pool xuddi shu sozlamalardan
+(data/config.py: DB_HOST, DB_POOL_MAX, ...) yaratiladi va faqat eng ko'p
+ishlatiladigan so'rovlar uchun: jadval upsert, eslatmalar, statistika.
+
+asyncpg har bir ulanishda so'rovlarni prepared statement sifatida keshlaydi,
+shuning uchun quyidagi SQL matnlari o'zgarmas konstantalar — har chaqiruvda
+faqat parametrlar yuboriladi.
+
+SQLite rejimida ``db.enabled`` False va servislar Tortoise yo'lidan boradi.
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+try:
+    import asyncpg
+    from asyncpg import Connection, Record
+    from asyncpg.pool import Pool
+except ImportError:  # ixtiyoriy bog'liqlik — faqat postgres rejimida kerak
+    asyncpg = None
+    Connection = Record = Pool = None
 
 from data import config
 
+# (day, pair_number, subject, teacher, room, lesson_type, lesson_time)
+LessonRow = Tuple[str, int, str, Optional[str], Optional[str], Optional[str], Optional[str]]
+
+SCHEDULE_COLUMNS = "id, group_id, week_id, day, pair_number, subject, teacher, room, lesson_type, lesson_time, created_at"
+
+UPSERT_SCHEDULES_SQL = """
+INSERT INTO schedules (group_id, week_id, day, pair_number, subject, teacher, room, lesson_type, lesson_time, created_at)
+SELECT $1, $2, l.day, l.pair_number, l.subject, l.teacher, l.room, l.lesson_type, l.lesson_time, now()
+FROM unnest($3::varchar[], $4::int[], $5::varchar[], $6::varchar[], $7::varchar[], $8::varchar[], $9::varchar[])
+    AS l(day, pair_number, subject, teacher, room, lesson_type, lesson_time)
+ON CONFLICT (group_id, week_id, day, pair_number) DO UPDATE SET
+    subject = EXCLUDED.subject,
+    teacher = EXCLUDED.teacher,
+    room = EXCLUDED.room,
+    lesson_type = EXCLUDED.lesson_type,
+    lesson_time = EXCLUDED.lesson_time
+WHERE (schedules.subject, schedules.teacher, schedules.room, schedules.lesson_type, schedules.lesson_time)
+    IS DISTINCT FROM
+    (EXCLUDED.subject, EXCLUDED.teacher, EXCLUDED.room, EXCLUDED.lesson_type, EXCLUDED.lesson_time)
+"""
+
+DELETE_MISSING_SCHEDULES_SQL = """
+DELETE FROM schedules
+WHERE group_id = $1 AND week_id = $2
+  AND (day, pair_number) NOT IN (SELECT * FROM unnest($3::varchar[], $4::int[]))
+"""
+
+SELECT_WEEK_SCHEDULES_SQL = f"""
+SELECT {SCHEDULE_COLUMNS} FROM schedules WHERE group_id = $1 AND week_id = $2 ORDER BY id
+"""
+
+LOCK_WEEK_SQL = "SELECT pg_advisory_xact_lock($1, $2)"
+
+SELECT_WEEK_VERSION_SQL = "SELECT content_hash FROM schedule_versions WHERE group_id = $1 AND week_id = $2"
+
+UPSERT_WEEK_VERSION_SQL = """
+INSERT INTO schedule_versions (group_id, week_id, content_hash, updated_at)
+VALUES ($1, $2, $3, now())
+ON CONFLICT (group_id, week_id) DO UPDATE SET content_hash = EXCLUDED.content_hash, updated_at = now()
+"""
+
+REMINDER_USERS_SQL = """
+SELECT telegram_id, group_id, language FROM users
+WHERE reminder_enabled AND group_id IS NOT NULL
+"""
+
+REMINDER_LESSONS_SQL = f"""
+SELECT {SCHEDULE_COLUMNS} FROM schedules
+WHERE week_id = $1 AND day = $2
+  AND group_id IN (SELECT group_id FROM users WHERE reminder_enabled AND group_id IS NOT NULL)
+ORDER BY group_id, pair_number
+"""
+
+USER_STATS_SQL = """
+SELECT
+    count(*) AS total,
+    count(*) FILTER (WHERE created_at >= $1) AS today,
+    count(*) FILTER (WHERE created_at >= $2) AS week,
+    count(*) FILTER (WHERE created_at >= $3) AS month,
+    count(*) FILTER (WHERE phone_number IS NOT NULL AND phone_number <> '') AS with_phone,
+    count(*) FILTER (WHERE username IS NOT NULL AND username <> '') AS with_username,
+    count(*) FILTER (WHERE hemis_login IS NOT NULL AND hemis_login <> '') AS hemis_linked,
+    count(*) FILTER (WHERE reminder_enabled) AS reminders
+FROM users
+"""
+
 
 class Database:
     def __init__(self):
         self.pool: Union[Pool, None] = None
 
+    @property
+    def enabled(self) -> bool:
+        return self.pool is not None
+
     async def create(self):
+        if asyncpg is None:
+            raise RuntimeError("DB_ENGINE=postgres uchun asyncpg kerak: pip install asyncpg")
         self.pool = await asyncpg.create_pool(
             user=config.DB_USER,
             password=config.DB_PASS,
             host=config.DB_HOST,
+            port=config.DB_PORT,
             database=config.DB_NAME,
+            min_size=config.DB_POOL_MIN,
+            max_size=config.DB_POOL_MAX,
         )
 
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
     async def execute(
         self,
         command,
@@ -28,7 +126,7 @@ class Database:
         fetchrow: bool = False,
         execute: bool = False,
     ):
-        
+
         async with self.pool.acquire() as connection:
             connection: Connection
             async with connection.transaction():
@@ -42,47 +140,57 @@ class Database:
                     result = await connection.execute(command, *args)
             return result
 
-    async def create_table_users(self):
-        sql = """
-        CREATE TABLE IF NOT EXISTS Users (
-        id SERIAL PRIMARY KEY,
-        full_name VARCHAR(255) NOT NULL,
-        username varchar(255) NULL,
-        telegram_id BIGINT NOT NULL UNIQUE
-        );
-        """
-        await self.execute(sql, execute=True)
-
-    @staticmethod
-    def format_args(sql, parameters: dict):
-        sql += " AND ".join(
-            [f"{item} = ${num}" for num, item in enumerate(parameters.keys(), start=1)]
-        )
-        return sql, tuple(parameters.values())
-
-    async def add_user(self, full_name, username, telegram_id):
-        sql = "INSERT INTO users (full_name, username, telegram_id) VALUES($1, $2, $3) returning *"
-        return await self.execute(sql, full_name, username, telegram_id, fetchrow=True)
+    # -----------------------------------------------------------------------
+    # Issiq yo'llar
+    # -----------------------------------------------------------------------
 
-    async def select_all_users(self):
-        sql = "SELECT * FROM Users"
-        return await self.execute(sql, fetch=True)
+    async def upsert_week_schedule(
+        self,
+        group_id: int,
+        week_id: int,
+        lessons: Sequence[LessonRow],
+        replace: bool = False,
+        content_hash: Optional[str] = None,
+        version: Optional[Callable[[List[Record]], str]] = None,
+    ) -> Tuple[List[Record], bool]:
+        """Haftalik jadval: bitta ``INSERT ... ON CONFLICT`` (o'zgarmagan qatorlarga tegmaydi),
+        ``replace=True`` da yo'qolgan darslar o'chiriladi.
 
-    async def select_user(self, **kwargs):
-        sql = "SELECT * FROM Users WHERE "
-        sql, parameters = self.format_args(sql, parameters=kwargs)
-        return await self.execute(sql, *parameters, fetchrow=True)
+        Bitta (group, week) uchun yozuvlar advisory lock bilan navbatlanadi.
+        Saqlangan xesh ``content_hash`` ga teng bo'lsa hech narsa yozilmaydi;
+        aks holda ``version(rows)`` yangi xesh sifatida o'sha tranzaksiyada
+        saqlanadi. ``(qatorlar, yozildimi)`` qaytariladi."""
+        columns = list(zip(*lessons)) if lessons else [()] * 7
+        async with self.pool.acquire() as connection:
+            connection: Connection
+            async with connection.transaction():
+                await connection.execute(LOCK_WEEK_SQL, group_id, week_id)
+                if content_hash is not None:
+                    stored = await connection.fetchval(SELECT_WEEK_VERSION_SQL, group_id, week_id)
+                    if stored == content_hash:
+                        return await connection.fetch(SELECT_WEEK_SCHEDULES_SQL, group_id, week_id), False
+                if lessons:
+                    await connection.execute(UPSERT_SCHEDULES_SQL, group_id, week_id, *map(list, columns))
+                if replace:
+                    await connection.execute(
+                        DELETE_MISSING_SCHEDULES_SQL, group_id, week_id, list(columns[0]), list(columns[1])
+                    )
+                rows = await connection.fetch(SELECT_WEEK_SCHEDULES_SQL, group_id, week_id)
+                if version is not None:
+                    await connection.execute(UPSERT_WEEK_VERSION_SQL, group_id, week_id, version(rows))
+                return rows, True
 
-    async def count_users(self):
-        sql = "SELECT COUNT(*) FROM Users"
-        return await self.execute(sql, fetchval=True)
+    async def reminder_batch(self, week_id: int, day: str) -> Tuple[List[Record], List[Record]]:
+        """Eslatma yoqilgan foydalanuvchilar va ularning guruhlaridagi shu kungi darslar."""
+        async with self.pool.acquire() as connection:
+            connection: Connection
+            users = await connection.fetch(REMINDER_USERS_SQL)
+            lessons = await connection.fetch(REMINDER_LESSONS_SQL, week_id, day) if users else []
+            return users, lessons
 
-    async def update_user_username(self, username, telegram_id):
-        sql = "UPDATE Users SET username=$1 WHERE telegram_id=$2"
-        return await self.execute(sql, username, telegram_id, execute=True)
+    async def user_stats(self, today: datetime, week_ago: datetime, month_ago: datetime) -> Dict[str, int]:
+        row = await self.execute(USER_STATS_SQL, today, week_ago, month_ago, fetchrow=True)
+        return dict(row) if row else {}
 
-    async def delete_users(self):
-        await self.execute("DELETE FROM Users WHERE TRUE", execute=True)
 
-    async def drop_users(self):
-        await self.execute("DROP TABLE Users", execute=True)
+db = Database()
@@ -0,0 +1,168 @@
+"""SQLite bazani PostgreSQL ga ko'chirish
+
+Ishga tushirish (loyiha ildizidan, .env da DB_HOST/DB_USER/... to'ldirilgan):
+
+    python -m utils.db.sqlite_to_postgres --sqlite utils/kiuf_bot.db
+
+1. PostgreSQL da sxema migratsiyalar orqali yaratiladi (``apply_migrations``).
+2. Jadvallar FK tartibida ``COPY`` (``copy_records_to_table``) bilan partiyalab
+   ko'chiriladi — qiymatlar PostgreSQL ustun turlariga moslab o'giriladi.
+3. ``id`` sequence'lari eng katta id ga suriladi va qatorlar soni tekshiriladi.
+
+Bo'sh bo'lmagan bazaga faqat ``--truncate`` bilan yoziladi. Ko'chirishdan keyin
+.env da ``DB_ENGINE=postgres`` qo'ying.
+"""
+
+import argparse
+import asyncio
+import logging
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from urllib.parse import quote
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from tortoise import Tortoise  # noqa: E402
+
+from data.config import DB_PATH  # noqa: E402
+from utils.db.migrations import apply_migrations  # noqa: E402
+from utils.db.postgres import db  # noqa: E402
+from utils.db.tortoise import MODELS, postgres_credentials  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# FK bog'liqliklari tartibida
+TABLES = [
+    "groups",
+    "users",
+    "weeks",
+    "schedules",
+    "hemis_sessions",
+    "schedule_versions",
+    "broadcasts",
+    "broadcast_outbox",
+    "daily_stats",
+    "fsm_states",
+]
+
+
+def _to_datetime(value):
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        parsed = datetime.fromisoformat(str(value))
+    # SQLite dagi CURRENT_TIMESTAMP qiymatlari vaqt zonasisiz (UTC)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+CONVERTERS = {
+    "boolean": bool,
+    "smallint": int,
+    "integer": int,
+    "bigint": int,
+    "timestamp with time zone": _to_datetime,
+    "timestamp without time zone": lambda v: _to_datetime(v).replace(tzinfo=None),
+    "date": lambda v: v if isinstance(v, date) else date.fromisoformat(str(v)[:10]),
+}
+
+
+async def _copy_table(source: sqlite3.Connection, conn, table: str, batch: int) -> int:
+    sqlite_columns = [row[1] for row in source.execute(f'PRAGMA table_info("{table}")')]
+    if not sqlite_columns:
+        logger.info(f"{table}: SQLite da yo'q, o'tkazib yuborildi")
+        return 0
+
+    pg_types = {
+        row["column_name"]: row["data_type"]
+        for row in await conn.fetch(
+            "SELECT column_name, data_type FROM information_schema.columns WHERE table_name = $1", table
+        )
+    }
+    columns = [name for name in sqlite_columns if name in pg_types]
+    converters = [CONVERTERS.get(pg_types[name]) for name in columns]
+
+    select_list = ", ".join(f'"{name}"' for name in columns)
+    cursor = source.execute(f'SELECT {select_list} FROM "{table}" ORDER BY rowid')
+    copied = 0
+    while True:
+        rows = cursor.fetchmany(batch)
+        if not rows:
+            break
+        records = [
+            tuple(
+                value if value is None or convert is None else convert(value)
+                for value, convert in zip(row, converters)
+            )
+            for row in rows
+        ]
+        await conn.copy_records_to_table(table, records=records, columns=columns)
+        copied += len(records)
+
+    if "id" in columns:
+        await conn.execute(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+            f'COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM "{table}"'
+        )
+    return copied
+
+
+async def migrate(sqlite_path: Path, batch: int, truncate: bool) -> None:
+    await Tortoise.init(
+        config={
+            "connections": {
+                "default": {"engine": "tortoise.backends.asyncpg", "credentials": postgres_credentials()}
+            },
+            "apps": {"models": {"models": MODELS, "default_connection": "default"}},
+        }
+    )
+    await apply_migrations()
+    await db.create()
+
+    source = sqlite3.connect(f"file:{quote(str(sqlite_path))}?mode=ro", uri=True)
+    try:
+        async with db.pool.acquire() as conn:
+            existing = await conn.fetchval('SELECT count(*) FROM "users"')
+            if existing and not truncate:
+                raise SystemExit(f"PostgreSQL bazada {existing} ta foydalanuvchi bor. Qayta yozish uchun --truncate")
+
+            async with conn.transaction():
+                if truncate:
+                    await conn.execute(
+                        "TRUNCATE " + ", ".join(f'"{table}"' for table in TABLES) + " RESTART IDENTITY CASCADE"
+                    )
+                for table in TABLES:
+                    started = time.monotonic()
+                    copied = await _copy_table(source, conn, table, batch)
+                    logger.info(f"{table}: {copied} qator, {time.monotonic() - started:.1f}s")
+
+            for table in TABLES:
+                if not source.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (table,)).fetchone():
+                    continue
+                expected = source.execute(f'SELECT count(*) FROM "{table}"').fetchone()[0]
+                actual = await conn.fetchval(f'SELECT count(*) FROM "{table}"')
+                if expected != actual:
+                    raise SystemExit(f"{table}: SQLite {expected} ≠ PostgreSQL {actual}")
+    finally:
+        source.close()
+        await db.close()
+        await Tortoise.close_connections()
+
+    logger.info("Ko'chirish tugadi. .env da DB_ENGINE=postgres qo'ying.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite → PostgreSQL ko'chirish")
+    parser.add_argument("--sqlite", type=Path, default=DB_PATH, help="manba SQLite fayl")
+    parser.add_argument("--batch", type=int, default=5000, help="COPY partiyasi hajmi")
+    parser.add_argument("--truncate", action="store_true", help="PostgreSQL jadvallarini avval tozalash")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    asyncio.run(migrate(args.sqlite, args.batch, args.truncate))
+
+
+if __name__ == "__main__":
+    main()
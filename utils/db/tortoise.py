@@ -1,23 +1,79 @@
 from tortoise import Tortoise
 
 
+MODELS = ["models.user", "models.group", "models.week", "models.schedule", "models.hemis_session", "models.schedule_version", "models.broadcast", "models.broadcast_outbox", "models.daily_stats", "models.fsm_state"]
+
 TORTOISE_ORM = {
     "connections": {
         "default": "sqlite://kiuf_bot.db"
     },
     "apps": {
         "models": {
-            "models": ["models.user", "models.group", "models.week", "models.schedule", "aerich.models"],
+            "models": MODELS,
             "default_connection": "default",
         },
     },
 }
 
 
+def sqlite_pragmas() -> dict:
+    """Har bir SQLite ulanishida bajariladigan PRAGMA lar (data/config.py dan)."""
+    from data.config import DB_BUSY_TIMEOUT, DB_CACHE_SIZE, DB_MMAP_SIZE, DB_SYNCHRONOUS
+
+    return {
+        "journal_mode": "WAL",
+        "synchronous": DB_SYNCHRONOUS,
+        "busy_timeout": DB_BUSY_TIMEOUT,
+        "cache_size": DB_CACHE_SIZE,
+        "mmap_size": DB_MMAP_SIZE,
+        "temp_store": "MEMORY",
+    }
+
+
+def sqlite_db_url(db_path) -> str:
+    from urllib.parse import urlencode
+
+    return f"sqlite:///{db_path}?{urlencode(sqlite_pragmas())}"
+
+
+def postgres_credentials() -> dict:
+    from data.config import DB_HOST, DB_NAME, DB_PASS, DB_POOL_MAX, DB_POOL_MIN, DB_PORT, DB_USER
+
+    return {
+        "host": DB_HOST,
+        "port": DB_PORT,
+        "user": DB_USER,
+        "password": DB_PASS,
+        "database": DB_NAME,
+        "minsize": DB_POOL_MIN,
+        "maxsize": DB_POOL_MAX,
+    }
+
+
+def connection_config():
+    """``DB_ENGINE`` bo'yicha Tortoise "default" ulanishi (URL yoki dict)."""
+    from data.config import DB_ENGINE, DB_PATH
+
+    if DB_ENGINE == "postgres":
+        return {"engine": "tortoise.backends.asyncpg", "credentials": postgres_credentials()}
+    return sqlite_db_url(DB_PATH.absolute())
+
+
+def describe_connection() -> str:
+    """Haqiqatda ishlayotgan "default" ulanish (Tortoise init'dan keyin), log uchun."""
+    from data.config import DB_HOST, DB_NAME, DB_PATH, DB_PORT
+
+    dialect = Tortoise.get_connection("default").capabilities.dialect
+    if dialect == "sqlite":
+        return f"SQLite ({DB_PATH})"
+    if dialect == "postgres":
+        return f"PostgreSQL ({DB_HOST}:{DB_PORT}/{DB_NAME})"
+    return dialect
+
+
 async def init_db():
-    """Initialize Tortoise ORM with SQLite database"""
+    """Initialize Tortoise ORM (SQLite yoki DB_ENGINE=postgres)"""
     import sys
-    import sqlite3
     from pathlib import Path
     
     root_dir = Path(__file__).parent.parent.parent
@@ -29,47 +85,40 @@ async def init_db():
         import models.group
         import models.week
         import models.schedule
+        import models.hemis_session
+        import models.schedule_version
+        import models.broadcast
+        import models.broadcast_outbox
+        import models.daily_stats
+        import models.fsm_state
     except ImportError as e:
         raise ImportError(f"Cannot import models. sys.path: {sys.path[:3]}") from e
     
-    db_path = Path(__file__).parent.parent / "kiuf_bot.db"
-    
+    from data.config import DB_ENGINE
+    from utils.db.migrations import apply_migrations
+    from utils.db.postgres import db
+
     await Tortoise.init(
-        db_url=f"sqlite:///{db_path.absolute()}",
-        modules={"models": ["models.user", "models.group", "models.week", "models.schedule"]},
+        config={
+            "connections": {"default": connection_config()},
+            "apps": {"models": {"models": MODELS, "default_connection": "default"}},
+        }
     )
-    await Tortoise.generate_schemas()
-    
-    if db_path.exists():
-        try:
-            conn = sqlite3.connect(str(db_path.absolute()))
-            cursor = conn.cursor()
-            
-            cursor.execute("PRAGMA table_info(users)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            migrations = [
-                ("phone_number",      "ALTER TABLE users ADD COLUMN phone_number VARCHAR(20) NULL"),
-                ("hemis_login",       "ALTER TABLE users ADD COLUMN hemis_login VARCHAR(100) NULL"),
-                ("hemis_password",    "ALTER TABLE users ADD COLUMN hemis_password VARCHAR(100) NULL"),
-                ("group_id",          "ALTER TABLE users ADD COLUMN group_id INT REFERENCES groups (id) ON DELETE SET NULL"),
-                ("reminder_enabled",  "ALTER TABLE users ADD COLUMN reminder_enabled BOOLEAN NOT NULL DEFAULT 0"),
-            ]
-            
-            for col_name, sql in migrations:
-                if col_name not in columns:
-                    cursor.execute(sql)
-                    conn.commit()
-                    print(f"✅ Added '{col_name}' column to users table")
-            
-            conn.close()
-        except Exception as e:
-            print(f"⚠️ Warning: Could not update users table: {e}")
+    # Sxema joriy bo'lsa faqat schema_version o'qiladi
+    version = await apply_migrations()
+    print(f"✅ Database schema version: {version}")
+
+    if DB_ENGINE == "postgres":
+        # Issiq yo'llar uchun asyncpg pool (Tortoise bilan bir xil sozlamalar)
+        await db.create()
     
-    print("✅ Database initialized successfully")
+    print(f"✅ Database initialized successfully: {describe_connection()}")
 
 
 async def close_db():
     """Close database connections"""
+    from utils.db.postgres import db
+
+    await db.close()
     await Tortoise.close_connections()
     print("✅ Database connections closed")
\ No newline at end of file
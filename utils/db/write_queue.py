@@ -0,0 +1,127 @@
+"""Kichik yozuvlarni bitta tranzaksiyaga yig'uvchi navbat (single writer)
+
+SQLite da har bir avtonom yozuv — alohida commit (WAL ga yozish + fsync).
+Ko'p foydalanuvchi bir vaqtda /start bossa yoki eslatmani yoqsa, shu commitlar
+ketma-ket navbatda turadi. ``WriteQueue`` yozuvlarni qisqa oyna (``delay``)
+davomida yig'ib, ``max_batch`` tagacha bitta tranzaksiyada bajaradi::
+
+    await write_queue.submit(lambda: user.save(update_fields=["language"]))
+
+``submit`` yozuv commit bo'lgandan keyin qaytadi (natija yoki xatolik bilan).
+Partiyadagi bitta yozuv xato bersa, tranzaksiya bekor qilinadi va yozuvlar
+alohida-alohida qayta bajariladi — xato faqat o'z egasiga qaytadi.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from tortoise.transactions import in_transaction
+
+from data.config import DB_WRITE_BATCH, DB_WRITE_DELAY
+
+logger = logging.getLogger(__name__)
+
+WriteFn = Callable[[], Awaitable[Any]]
+
+
+class WriteQueue:
+    def __init__(self, max_batch: int = DB_WRITE_BATCH, delay: float = DB_WRITE_DELAY, name: str = "db_writes"):
+        self.max_batch = max(1, max_batch)
+        self.delay = delay
+        self.name = name
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.writes = 0
+        self.batches = 0
+        self.fallbacks = 0
+
+    async def submit(self, fn: WriteFn) -> Any:
+        """``fn()`` ni navbatdagi tranzaksiyada bajaradi va natijasini qaytaradi."""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((fn, future))
+        return await future
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._queue = self._queue or asyncio.Queue()
+            self._worker = asyncio.create_task(self._run(), name=self.name)
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                try:
+                    if timeout > 0:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    else:
+                        batch.append(self._queue.get_nowait())
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    break
+
+            try:
+                await self._execute(batch)
+            except Exception as e:  # worker hech qachon to'xtamasligi kerak
+                logger.exception(f"{self.name}: partiya xatoligi: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _execute(self, batch: List[Tuple[WriteFn, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.writes += len(batch)
+        results = []
+        try:
+            async with in_transaction():
+                for fn, _ in batch:
+                    results.append(await fn())
+        except Exception:
+            if len(batch) == 1:
+                raise
+            # Qaysi yozuv xato berganini aniqlash uchun alohida-alohida
+            self.fallbacks += 1
+            for fn, future in batch:
+                try:
+                    result = await fn()
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def stop(self) -> None:
+        """Navbatdagi yozuvlar tugashini kutib, workerni to'xtatadi (shutdown)."""
+        if self._worker is None:
+            return
+        await self._queue.join()
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "writes": self.writes,
+            "batches": self.batches,
+            "fallbacks": self.fallbacks,
+            "avg_batch": round(self.writes / self.batches, 1) if self.batches else 0.0,
+        }
+
+
+write_queue = WriteQueue()
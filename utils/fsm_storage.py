@@ -0,0 +1,153 @@
+"""Doimiy FSM storage: bot bazasidagi ``fsm_states`` jadvali yoki Redis
+
+``MemoryStorage`` dagi holatlar (HEMIS login/captcha, fikr-mulohaza, admin
+amallari) restartda yo'qoladi va tashlab ketilganlari hech qachon
+o'chirilmaydi. Bu yerda:
+
+- ``DatabaseStorage`` — har bir kalit uchun bitta qator (state + data),
+  ``FSM_TTL`` dan keyin eskiradi; eskirganlarini ``purge_expired_states``
+  tozalaydi. SQLite va PostgreSQL rejimlarida ishlaydi.
+- ``create_storage()`` — ``FSM_STORAGE`` bo'yicha storage yaratadi
+  (``redis`` uchun aiogram ``RedisStorage``, TTL va ixcham JSON bilan).
+
+Data ixcham JSON sifatida saqlanadi, ``COMPRESS_MIN`` baytdan kattasi
+(captcha cookie'lari va h.k.) zlib bilan siqiladi.
+"""
+
+import json
+import logging
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from data.config import FSM_REDIS_URL, FSM_STORAGE, FSM_TTL
+
+logger = logging.getLogger(__name__)
+
+COMPRESS_MIN = 256
+_PLAIN = b"j"
+_ZLIB = b"z"
+
+
+def dumps_compact(data: Dict[str, Any]) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def pack_data(data: Dict[str, Any]) -> Optional[bytes]:
+    if not data:
+        return None
+    raw = dumps_compact(data).encode("utf-8")
+    if len(raw) >= COMPRESS_MIN:
+        return _ZLIB + zlib.compress(raw, 6)
+    return _PLAIN + raw
+
+
+def unpack_data(blob: Optional[bytes]) -> Dict[str, Any]:
+    if not blob:
+        return {}
+    blob = bytes(blob)
+    payload = zlib.decompress(blob[1:]) if blob[:1] == _ZLIB else blob[1:]
+    return json.loads(payload)
+
+
+class DatabaseStorage(BaseStorage):
+    """FSM holatlari bot bazasida (Tortoise ``FSMState`` modeli)."""
+
+    def __init__(self, ttl: int = FSM_TTL, key_builder: Optional[KeyBuilder] = None):
+        self.ttl = ttl
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+
+    def _expires_at(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+
+    async def _get(self, key: StorageKey):
+        from models.fsm_state import FSMState
+
+        return await FSMState.get_or_none(
+            key=self.key_builder.build(key),
+            expires_at__gt=datetime.now(timezone.utc),
+        )
+
+    async def _write(self, key: StorageKey, state: Optional[str], data: Optional[bytes]) -> None:
+        from models.fsm_state import FSMState
+
+        if state is None and data is None:
+            await FSMState.filter(key=self.key_builder.build(key)).delete()
+            return
+        # Ikkala ustun ham yoziladi — eskirgan qatordagi eski data qaytib kelmaydi.
+        # Bitta so'rov: INSERT ... ON CONFLICT(key) DO UPDATE
+        await FSMState.bulk_create(
+            [FSMState(key=self.key_builder.build(key), state=state, data=data, expires_at=self._expires_at())],
+            on_conflict=["key"],
+            update_fields=["state", "data", "expires_at"],
+        )
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._get(key)
+        state = state.state if isinstance(state, State) else state
+        await self._write(key, state, record.data if record else None)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        record = await self._get(key)
+        return record.state if record else None
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        record = await self._get(key)
+        await self._write(key, record.state if record else None, pack_data(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        record = await self._get(key)
+        return unpack_data(record.data) if record else {}
+
+    async def close(self) -> None:
+        pass
+
+
+async def purge_expired_states() -> int:
+    """Eskirgan (tashlab ketilgan) FSM holatlarini o'chiradi."""
+    from models.fsm_state import FSMState
+
+    if FSM_STORAGE != "db":
+        return 0
+    try:
+        deleted = await FSMState.filter(expires_at__lte=datetime.now(timezone.utc)).delete()
+    except Exception as e:
+        logger.error(f"FSM tozalash xatoligi: {e}", exc_info=True)
+        return 0
+    if deleted:
+        logger.info(f"Eskirgan FSM holatlari o'chirildi: {deleted} ta")
+    return deleted
+
+
+def create_redis_storage(redis=None) -> BaseStorage:
+    """aiogram ``RedisStorage`` (TTL va ixcham JSON bilan).
+
+    ``redis`` — tayyor ``redis.asyncio.Redis`` klienti; berilmasa
+    ``FSM_REDIS_URL`` dan yaratiladi. ``redis`` paketi ixtiyoriy bog'liqlik.
+    """
+    try:
+        from aiogram.fsm.storage.redis import RedisStorage
+        from redis.asyncio import Redis
+    except ImportError as e:
+        raise RuntimeError("FSM_STORAGE=redis uchun redis kerak: pip install 'redis~=5.0.1'") from e
+
+    return RedisStorage(
+        redis if redis is not None else Redis.from_url(FSM_REDIS_URL),
+        key_builder=DefaultKeyBuilder(with_destiny=True),
+        state_ttl=FSM_TTL,
+        data_ttl=FSM_TTL,
+        json_dumps=dumps_compact,
+    )
+
+
+def create_storage(backend: str = FSM_STORAGE) -> BaseStorage:
+    """``FSM_STORAGE`` sozlamasi bo'yicha storage."""
+    if backend == "redis":
+        return create_redis_storage()
+    if backend == "memory":
+        return MemoryStorage()
+    return DatabaseStorage()
@@ -1,8 +1,32 @@
-"""Internationalization (i18n) utilities for multilingual support"""
+"""Internationalization (i18n) utilities for multilingual support
 
-from typing import Dict
+``TRANSLATIONS`` — matnlarning manbasi. Birinchi ishlatilganda (yoki
+startupda ``load_catalogs()``) ular kompilyatsiya qilinadi: har bir til uchun
+bitta tekis ``{kalit: matn}`` katalogi (kalitlar intern qilingan), ``get_text``
+esa ``catalogs[language].get(key)`` — zaxira tilni har safar hisoblamasdan.
+
+Kompilyatsiyada har bir kalit barcha ``LANGUAGES`` da borligi tekshiriladi,
+yetishmasa ``ValueError`` — bot ishga tushmaydi.
+
+``I18N_DIR`` dagi tashqi kataloglar (``<til>.json`` yoki gettext
+``<til>/LC_MESSAGES/messages.mo``) ``TRANSLATIONS`` ustidan yoziladi.
+"""
+
+import gettext
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+from data.config import I18N_DIR
 from schemas.language import LanguageEnum
 
+logger = logging.getLogger(__name__)
+
+LANGUAGES = (LanguageEnum.UZ, LanguageEnum.RU, LanguageEnum.EN)
+FALLBACK_LANGUAGE = LanguageEnum.EN
+
 # Translation dictionary
 TRANSLATIONS: Dict[str, Dict[LanguageEnum, str]] = {
     
@@ -744,6 +768,11 @@ Please, write your message:""",
 
 Пожалуйста, напишите ваше сообщение:""",
     },
+    "feedback_sent": {
+        LanguageEnum.UZ: "✅ Murojaatingiz adminlarga yuborildi. Rahmat!",
+        LanguageEnum.EN: "✅ Your message has been sent to the admins. Thank you!",
+        LanguageEnum.RU: "✅ Ваше сообщение отправлено администраторам. Спасибо!",
+    },
     
     # Schedule and Profile translations
     "btn_schedule": {
@@ -816,6 +845,11 @@ Please, write your message:""",
         LanguageEnum.EN: "❌ Error connecting to HEMIS. Invalid login or password.",
         LanguageEnum.RU: "❌ Ошибка подключения к HEMIS. Неверный логин или пароль.",
     },
+    "hemis_disconnected": {
+        LanguageEnum.UZ: "✅ HEMIS hisobingiz uzildi.",
+        LanguageEnum.EN: "✅ Your HEMIS account has been disconnected.",
+        LanguageEnum.RU: "✅ Аккаунт HEMIS отключён.",
+    },
     "today_schedule": {
         LanguageEnum.UZ: "📅 <b>Bugungi dars jadvali:</b>\n\n",
         LanguageEnum.EN: "📅 <b>Today's Schedule:</b>\n\n",
@@ -854,9 +888,74 @@ Please, write your message:""",
 }
 
 
+Catalog = Dict[str, str]
+
+# til -> {kalit: matn} (load_catalogs to'ldiradi)
+_catalogs: Dict[str, Catalog] = {}
+
+
+def _read_external(directory: Path, language: LanguageEnum) -> Dict[str, str]:
+    """``I18N_DIR`` dagi bitta til katalogi (JSON yoki .mo)."""
+    json_file = directory / f"{language.value}.json"
+    if json_file.is_file():
+        return json.loads(json_file.read_text(encoding="utf-8"))
+
+    mo_file = directory / language.value / "LC_MESSAGES" / "messages.mo"
+    if mo_file.is_file():
+        with mo_file.open("rb") as f:
+            # msgid — kalit, msgstr — matn ("" — .mo sarlavhasi)
+            return {key: text for key, text in gettext.GNUTranslations(f)._catalog.items() if key}
+    return {}
+
+
+def compile_catalogs(
+    translations: Mapping[str, Mapping[str, str]],
+    overrides: Optional[Mapping[LanguageEnum, Mapping[str, str]]] = None,
+) -> Dict[str, Catalog]:
+    """Har bir til uchun tekis katalog. Biror til/kalit yetishmasa ``ValueError``."""
+    overrides = overrides or {}
+    # Tashqi kataloglardagi yangi kalitlar ham barcha tillarda bo'lishi shart
+    extra_keys = {key for texts in overrides.values() for key in texts} - set(translations)
+    keys = [sys.intern(key) for key in [*translations, *sorted(extra_keys)]]
+
+    catalogs: Dict[str, Catalog] = {}
+    missing = []
+    for language in LANGUAGES:
+        extra = overrides.get(language, {})
+        catalog = catalogs[language] = {}
+        for key in keys:
+            text = extra.get(key) or translations.get(key, {}).get(language.value)
+            if not text:
+                missing.append(f"{key}[{language.value}]")
+            catalog[key] = text or key
+
+    if missing:
+        raise ValueError(f"Tarjimalar to'liq emas ({len(missing)} ta): {', '.join(missing[:20])}")
+
+    # Noma'lum til (UNKNOWN va h.k.) — FALLBACK_LANGUAGE
+    catalogs[LanguageEnum.UNKNOWN] = catalogs[FALLBACK_LANGUAGE]
+    return catalogs
+
+
+def load_catalogs(directory: Optional[Path] = I18N_DIR) -> None:
+    """Kataloglarni (qayta) kompilyatsiya qiladi. Startupda chaqiriladi."""
+    global _catalogs
+
+    overrides = {}
+    if directory is not None and directory.is_dir():
+        for language in LANGUAGES:
+            texts = _read_external(directory, language)
+            if texts:
+                overrides[language] = texts
+                logger.info(f"i18n: {language.value} — {len(texts)} ta tashqi matn ({directory})")
+
+    _catalogs = compile_catalogs(TRANSLATIONS, overrides)
+
+
 def get_text(key: str, language: LanguageEnum = LanguageEnum.UZ) -> str:
     """Get translated text by key and language"""
-    if key in TRANSLATIONS:
-        return TRANSLATIONS[key].get(language, TRANSLATIONS[key][LanguageEnum.EN])
-    return key
+    if not _catalogs:
+        load_catalogs()
+    catalog = _catalogs.get(language) or _catalogs[FALLBACK_LANGUAGE]
+    return catalog.get(key, key)
 
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 
 from aiogram import Bot
@@ -6,12 +7,20 @@ from data.config import ADMINS
 
 
 async def on_startup_notify(bot: Bot):
-    for admin in ADMINS:
+    try:
+        bot_properties = await bot.me()
+    except Exception as err:
+        logging.exception(err)
+        return
+
+    message = ["<b>Bot ishga tushdi.</b>\n",
+               f"<b>Bot ID:</b> {bot_properties.id}",
+               f"<b>Bot Username:</b> {bot_properties.username}"]
+
+    async def notify(admin):
         try:
-            bot_properties = await bot.me()
-            message = ["<b>Bot ishga tushdi.</b>\n",
-                       f"<b>Bot ID:</b> {bot_properties.id}",
-                       f"<b>Bot Username:</b> {bot_properties.username}"]
             await bot.send_message(int(admin), "\n".join(message))
         except Exception as err:
             logging.exception(err)
+
+    await asyncio.gather(*(notify(admin) for admin in ADMINS))
@@ -1,5 +1,16 @@
+import asyncio
+import csv
+import gzip
+import os
+import queue
+import tempfile
+import threading
+from typing import AsyncIterable, Iterable, List, Optional, Sequence, Tuple
+
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.utils import get_column_letter
 
 
 async def export_to_excel(data, headings, filepath):
@@ -87,4 +98,138 @@ async def export_to_excel(data, headings, filepath):
 
     sheet.auto_filter.ref = sheet.dimensions
 
-    wb.save(filepath)
\ No newline at end of file
+    wb.save(filepath)
+
+
+# =========================
+# STREAMING EXPORT
+# =========================
+#
+# Katta jadvallar uchun: qatorlar DB dan bo'laklab (chunk) keladi, fayl esa
+# alohida thread'da yoziladi (write-only openpyxl yoki csv.gz). Xotira qator
+# soniga bog'liq emas — navbatda eng ko'pi bilan ``_QUEUE_CHUNKS`` bo'lak turadi.
+
+_QUEUE_CHUNKS = 4
+_DONE = object()
+
+FORMAT_SUFFIXES = {
+    "xlsx": ".xlsx",
+    "csv": ".csv.gz",
+}
+
+
+def _write_xlsx_stream(rows: Iterable[Sequence], headings, filepath, widths=None) -> int:
+    wb = openpyxl.Workbook(write_only=True)
+    sheet = wb.create_sheet("Data")
+
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
+    center_align = Alignment(horizontal="center", vertical="center")
+
+    # Write-only rejimda ustun kengligi oldindan beriladi (ikkinchi o'tish yo'q)
+    for colno, heading in enumerate(headings, start=1):
+        width = widths[colno - 1] if widths else len(str(heading)) + 3
+        sheet.column_dimensions[get_column_letter(colno)].width = width
+
+    sheet.freeze_panes = "A2"
+
+    header = []
+    for heading in headings:
+        cell = WriteOnlyCell(sheet, value=heading)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = center_align
+        header.append(cell)
+    sheet.append(header)
+
+    count = 0
+    for row in rows:
+        sheet.append(row)
+        count += 1
+
+    sheet.auto_filter.ref = f"A1:{get_column_letter(len(headings))}{count + 1}"
+    wb.save(filepath)
+    return count
+
+
+def _write_csv_gz_stream(rows: Iterable[Sequence], headings, filepath, widths=None) -> int:
+    count = 0
+    with gzip.open(filepath, "wt", encoding="utf-8-sig", newline="", compresslevel=6) as f:
+        writer = csv.writer(f)
+        writer.writerow(headings)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+_WRITERS = {
+    "xlsx": _write_xlsx_stream,
+    "csv": _write_csv_gz_stream,
+}
+
+
+async def stream_export(
+    chunks: AsyncIterable[List[Sequence]],
+    headings: Sequence[str],
+    fmt: str = "xlsx",
+    widths: Optional[Sequence[int]] = None,
+) -> Tuple[str, int]:
+    """Qatorlarni bo'laklab vaqtinchalik faylga yozadi.
+
+    ``chunks`` — qator ro'yxatlarini beruvchi async iterator (masalan, keyset
+    pagination bilan DB dan). Fayl thread'da yoziladi, event loop bloklanmaydi.
+
+    Qaytaradi: (vaqtinchalik fayl yo'li, qatorlar soni). Faylni yuborgandan
+    keyin o'chirish chaqiruvchining vazifasi.
+    """
+    writer = _WRITERS[fmt]
+    fd, filepath = tempfile.mkstemp(prefix="export_", suffix=FORMAT_SUFFIXES[fmt])
+    os.close(fd)
+
+    pending: "queue.Queue" = queue.Queue(maxsize=_QUEUE_CHUNKS)
+    failed = threading.Event()
+
+    def rows():
+        while True:
+            try:
+                chunk = pending.get(timeout=0.5)
+            except queue.Empty:
+                if failed.is_set():
+                    raise RuntimeError("Export bekor qilindi")
+                continue
+            if chunk is _DONE:
+                return
+            yield from chunk
+
+    def write() -> int:
+        try:
+            return writer(rows(), headings, filepath, widths)
+        except BaseException:
+            failed.set()
+            raise
+
+    def put(item) -> None:
+        # Writer yiqilsa navbat bo'shamaydi — cheksiz kutib qolmaslik uchun
+        while not failed.is_set():
+            try:
+                pending.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    write_task = asyncio.ensure_future(asyncio.to_thread(write))
+    try:
+        async for chunk in chunks:
+            if failed.is_set():
+                break
+            await asyncio.to_thread(put, chunk)
+        await asyncio.to_thread(put, _DONE)
+        count = await write_task
+    except BaseException:
+        failed.set()
+        await asyncio.gather(write_task, return_exceptions=True)
+        os.remove(filepath)
+        raise
+
+    return filepath, count
@@ -0,0 +1,196 @@
+"""Async rate limiting primitives (token bucket + fair priority scheduler)"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from enum import IntEnum
+from typing import Any, Deque, Dict, Hashable, Optional
+
+
+class Priority(IntEnum):
+    """Navbat ustuvorligi: kichik qiymat — oldinroq xizmat qilinadi."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class TokenBucket:
+    """Klassik token bucket: ``rate`` token/soniya, ko'pi bilan ``burst`` token."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, tokens: float = 1.0) -> float:
+        """Token yetarli bo'lishi uchun necha soniya kutish kerakligini qaytaradi."""
+        self._refill()
+        if self._tokens >= tokens:
+            return 0.0
+        return (tokens - self._tokens) / self.rate
+
+    def consume(self, tokens: float = 1.0) -> bool:
+        """Token bo'lsa oladi va True qaytaradi."""
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    def refund(self, tokens: float = 1.0) -> None:
+        """Ishlatilmay qolgan tokenni qaytaradi (``burst`` dan oshmaydi)."""
+        self._refill()
+        self._tokens = min(self.burst, self._tokens + tokens)
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        while not self.consume(tokens):
+            await asyncio.sleep(self.delay(tokens))
+
+
+class _Waiter:
+    __slots__ = ("future", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class PriorityRateLimiter:
+    """Token bucket ustidagi adolatli navbat.
+
+    - Yuqori ustuvorlikdagi (``Priority.INTERACTIVE``) so'rovlar har doim
+      fon so'rovlaridan (``Priority.BACKGROUND``) oldin token oladi.
+    - Bitta ustuvorlik ichida kalitlar (masalan, foydalanuvchi ID) navbatma-navbat
+      (round-robin) xizmat qilinadi — bitta foydalanuvchi navbatni egallab ololmaydi.
+    - Hech kim kutmayotgan bo'lsa va token bo'lsa, ``acquire`` darhol qaytadi.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, name: str = "limiter", history: int = 1000):
+        self.name = name
+        self._bucket = TokenBucket(rate, burst)
+        self._queues: Dict[int, "OrderedDict[Hashable, Deque[_Waiter]]"] = {}
+        self._pending = 0
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        self._granted = 0
+        self._waited = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._recent_waits: Deque[float] = deque(maxlen=history)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending
+
+    async def acquire(self, priority: int = Priority.INTERACTIVE, key: Hashable = None) -> float:
+        """Token olinguncha kutadi. Kutilgan vaqtni (soniya) qaytaradi."""
+        if self._pending == 0 and self._bucket.consume():
+            self._record(0.0)
+            return 0.0
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(loop.create_future())
+        per_key = self._queues.setdefault(int(priority), OrderedDict())
+        per_key.setdefault(key, deque()).append(waiter)
+        self._pending += 1
+        self._ensure_dispatcher()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Token berilgan, lekin korutin uyg'onmasdan bekor qilindi
+                self._bucket.refund()
+            else:
+                self._discard(int(priority), key, waiter)
+            raise
+
+        waited = time.monotonic() - waiter.enqueued_at
+        self._record(waited)
+        return waited
+
+    def stats(self) -> Dict[str, Any]:
+        """Navbat chuqurligi va kutish vaqtlari statistikasi."""
+        recent = sorted(self._recent_waits)
+        p95 = recent[int(len(recent) * 0.95) - 1] if recent else 0.0
+        return {
+            "name": self.name,
+            "rate": self._bucket.rate,
+            "burst": self._bucket.burst,
+            "queue_depth": self._pending,
+            "queue_by_priority": {
+                Priority(p).name.lower() if p in Priority._value2member_map_ else str(p):
+                    sum(len(waiters) for waiters in per_key.values())
+                for p, per_key in sorted(self._queues.items())
+            },
+            "granted": self._granted,
+            "waited": self._waited,
+            "avg_wait": (self._wait_total / self._granted) if self._granted else 0.0,
+            "max_wait": self._wait_max,
+            "p95_wait": p95,
+        }
+
+    # ------------------------------------------------------------------
+    # Ichki
+    # ------------------------------------------------------------------
+
+    def _record(self, waited: float) -> None:
+        self._granted += 1
+        if waited > 0:
+            self._waited += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        self._recent_waits.append(waited)
+
+    def _discard(self, priority: int, key: Hashable, waiter: _Waiter) -> None:
+        per_key = self._queues.get(priority)
+        if not per_key or key not in per_key:
+            return
+        try:
+            per_key[key].remove(waiter)
+        except ValueError:
+            return
+        self._pending -= 1
+        if not per_key[key]:
+            del per_key[key]
+
+    def _ensure_dispatcher(self) -> None:
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    def _pop_next(self) -> Optional[_Waiter]:
+        for priority in sorted(self._queues):
+            per_key = self._queues[priority]
+            while per_key:
+                key, waiters = next(iter(per_key.items()))
+                waiter = waiters.popleft()
+                self._pending -= 1
+                if waiters:
+                    per_key.move_to_end(key)
+                else:
+                    del per_key[key]
+                if not waiter.future.done():
+                    return waiter
+        return None
+
+    async def _dispatch(self) -> None:
+        while self._pending:
+            delay = self._bucket.delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            waiter = self._pop_next()
+            if waiter is None:
+                break
+            self._bucket.consume()
+            waiter.future.set_result(None)
+            # Uyg'otilgan korutinga ishlashga imkon beramiz
+            await asyncio.sleep(0)
@@ -0,0 +1,72 @@
+"""Single-flight: bir xil kalit uchun parallel so'rovlarni bitta bajarishga birlashtirish"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Bir kalit bo'yicha bir vaqtda faqat bitta korutina ishlaydi.
+
+    Birinchi chaqiruvchi ``fn`` ni alohida task'da ishga tushiradi; u ham,
+    shu paytda kelgan boshqa chaqiruvchilar ham shu task natijasini (yoki
+    xatoligini) ``shield`` orqali kutadi. Bitta chaqiruvchi bekor qilinsa
+    (masalan, foydalanuvchi handler'i timeout bo'lsa) faqat o'zi chiqib
+    ketadi — ish qolganlar uchun davom etadi. Oxirgi kutuvchi ham bekor
+    qilinsa task bekor qilinadi. Task tugagach kalit bo'shatiladi.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = self._inflight[key] = _Flight(asyncio.ensure_future(fn()))
+            flight.task.add_done_callback(lambda task: self._finish(key, flight))
+            self.leaders += 1
+        else:
+            self.followers += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            # Shu chaqiruvchi bekor qilindi; boshqa kutuvchi bo'lmasa ish ham to'xtaydi
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _finish(self, key: Hashable, flight: _Flight) -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        # Kutuvchi qolmagan bo'lsa "exception was never retrieved" chiqmasin
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.leaders + self.followers
+        return {
+            "name": self.name,
+            "in_flight": len(self._inflight),
+            "executed": self.leaders,
+            "collapsed": self.followers,
+            "collapse_ratio": (self.followers / total) if total else 0.0,
+        }
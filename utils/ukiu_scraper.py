@@ -1,105 +1,324 @@
-"""Utility for scraping data from ukiu.uz website"""
+"""Utility for scraping data from ukiu.uz website
+
+Sahifalar ``(page, lang)`` bo'yicha keshlanadi (natija — tayyor matn/ro'yxat):
+
+- ``SCRAPER_TTL`` ichida — keshdan, ukiu.uz ga so'rovsiz;
+- ``SCRAPER_MAX_STALE`` gacha — eski nusxa darhol qaytadi, yangilash fonda
+  (stale-while-revalidate);
+- yangilashda ``If-None-Match`` / ``If-Modified-Since`` yuboriladi — 304 bo'lsa
+  sahifa qayta yuklanmaydi va parse qilinmaydi;
+- kesh ``SCRAPER_CACHE_FILE`` ga yoziladi, restartdan keyin ham iliq;
+- ukiu.uz javob bermasa ``SCRAPER_RETRY_AFTER`` davomida qayta so'ralmaydi —
+  bor nusxa (yoki standart qiymat) darhol qaytadi, 10 soniyalik timeout
+  har bir foydalanuvchini kutdirmaydi;
+- ``prefetch()`` barcha sahifalarni uchala til uchun parallel yuklaydi
+  (startupda va vaqti-vaqti bilan) — foydalanuvchi ukiu.uz ni kutmaydi.
+
+Bir kalit uchun bir vaqtda faqat bitta yangilash ketadi (``SingleFlight``).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 import aiohttp
 from bs4 import BeautifulSoup
-from typing import Optional, Dict, List
+
+from data.config import SCRAPER_CACHE_FILE, SCRAPER_MAX_STALE, SCRAPER_RETRY_AFTER, SCRAPER_TTL
+from utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+LANGUAGES = ("uz", "ru", "en")
+# Diskka yozishni shuncha soniya kechiktirib, bir nechta yangilanish bitta yozuvga birlashadi
+SAVE_DELAY = 2
 
 
 class UKIUScraper:
     """Scraper for ukiu.uz website"""
-    
+
     BASE_URL = "https://ukiu.uz"
-    
-    def __init__(self):
+
+    def __init__(
+        self,
+        cache_file: Optional[Path] = SCRAPER_CACHE_FILE,
+        ttl: float = SCRAPER_TTL,
+        max_stale: float = SCRAPER_MAX_STALE,
+        retry_after: float = SCRAPER_RETRY_AFTER,
+    ):
         self.session: Optional[aiohttp.ClientSession] = None
-    
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.retry_after = retry_after
+
+        # "page:lang" -> {"value", "fetched_at", "url", "etag", "last_modified"}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        # "page:lang" -> oxirgi muvaffaqiyatsiz yangilash vaqti
+        self._failed_at: Dict[str, float] = {}
+        self._loaded = False
+        self._flights = SingleFlight(name="ukiu_fetch")
+        self._tasks: Set[asyncio.Task] = set()
+        self._save_task: Optional[asyncio.Task] = None
+        self._save_lock = threading.Lock()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.not_modified = 0
+        self.errors = 0
+        self.backoffs = 0
+
+        # page -> (yo'llar (birinchisi yuklanmasa keyingisi), parser, standart qiymat)
+        self.pages: Dict[str, Tuple[Tuple[str, ...], Callable[[BeautifulSoup], Any], Callable[[str], Any]]] = {
+            "admission": (("qabul/",), self._parse_main_text, lambda lang: ""),
+            "university_info": (("about", ""), self._parse_main_text, lambda lang: ""),
+            "address": (("contact",), self._parse_address, self._default_address),
+            "faculties": (("faculties",), lambda soup: self._parse_links(soup, ("faculty",)), lambda lang: []),
+            "directions": (
+                ("directions",),
+                lambda soup: self._parse_links(soup, ("direction", "specialty")),
+                lambda lang: [],
+            ),
+        }
+
     async def _get_session(self) -> aiohttp.ClientSession:
         """Get or create aiohttp session"""
         if self.session is None or self.session.closed:
             self.session = aiohttp.ClientSession()
         return self.session
-    
+
     async def close(self):
         """Close the session"""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._save_task is not None and not self._save_task.done():
+            self._save_task.cancel()
+            self._save()
         if self.session and not self.session.closed:
             await self.session.close()
-    
-    async def _fetch_page(self, url: str, lang: str = "uz") -> Optional[str]:
-        """Fetch page content"""
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    async def _fetch_page(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[Tuple[int, str, Dict[str, str]]]:
+        """Fetch page content: (status, html, validators). 304 da html bo'sh."""
+        self.fetches += 1
         try:
             session = await self._get_session()
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                validators = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
+                if response.status == 304:
+                    return 304, "", validators
                 if response.status == 200:
-                    return await response.text()
+                    return 200, await response.text(), validators
         except Exception as e:
-            print(f"Error fetching {url}: {e}")
+            logger.warning(f"Error fetching {url}: {e}")
+        self.errors += 1
         return None
-    
+
     def _parse_html(self, html: str) -> BeautifulSoup:
         """Parse HTML content"""
         return BeautifulSoup(html, 'html.parser')
-    
-    async def get_admission_info(self, lang: str = "uz") -> str:
-        """Get admission information"""
-        url = f"{self.BASE_URL}/{lang}/qabul/"
-        html = await self._fetch_page(url, lang)
-        
-        if not html:
-            return ""
-        
-        soup = self._parse_html(html)
-        
+
+    # ------------------------------------------------------------------
+    # Kesh
+    # ------------------------------------------------------------------
+
+    async def _get(self, page: str, lang: str) -> Any:
+        self._load()
+        key = f"{page}:{lang}"
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            age = time.time() - entry["fetched_at"]
+            if age < self.ttl:
+                self.hits += 1
+                return entry["value"]
+            if age < self.max_stale:
+                self.stale_hits += 1
+                self._refresh_in_background(page, lang)
+                return entry["value"]
+
+        self.misses += 1
+        fresh = None
+        if self._backing_off(key):
+            self.backoffs += 1
+        else:
+            fresh = await self._flights.do(key, lambda: self._refresh(page, lang))
+        if fresh is not None:
+            return fresh["value"]
+        # ukiu.uz javob bermadi — juda eski bo'lsa ham bor nusxa standartdan yaxshiroq
+        return entry["value"] if entry is not None else self.pages[page][2](lang)
+
+    def _backing_off(self, key: str) -> bool:
+        failed_at = self._failed_at.get(key)
+        return failed_at is not None and time.time() - failed_at < self.retry_after
+
+    async def _refresh(self, page: str, lang: str) -> Optional[Dict[str, Any]]:
+        """Sahifani (shartli so'rov bilan) yuklab keshni yangilaydi."""
+        paths, parser, _ = self.pages[page]
+        key = f"{page}:{lang}"
+        entry = self._entries.get(key)
+
+        for path in paths:
+            url = f"{self.BASE_URL}/{lang}/{path}"
+            headers = {}
+            if entry is not None and entry["url"] == url:
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+
+            result = await self._fetch_page(url, headers)
+            if result is None:
+                continue
+            status, html, validators = result
+
+            if status == 304:
+                if entry is None:
+                    continue
+                self.not_modified += 1
+                entry = {**entry, "fetched_at": time.time()}
+            else:
+                # Parse og'ir (katta sahifalar) — event loop bloklanmasin
+                value = await asyncio.to_thread(lambda: parser(self._parse_html(html)))
+                entry = {"value": value, "fetched_at": time.time(), "url": url, **validators}
+
+            self._entries[key] = entry
+            self._failed_at.pop(key, None)
+            self._schedule_save()
+            return entry
+        self._failed_at[key] = time.time()
+        return None
+
+    def _refresh_in_background(self, page: str, lang: str) -> None:
+        key = f"{page}:{lang}"
+        if self._flights.in_flight(key) or self._backing_off(key):
+            return
+        task = asyncio.create_task(self._flights.do(key, lambda: self._refresh(page, lang)))
+        self._tasks.add(task)
+        task.add_done_callback(self._background_done)
+
+    def _background_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"ukiu.uz fon yangilash xatoligi: {task.exception()}")
+
+    async def prefetch(self, force: bool = False) -> int:
+        """Barcha sahifalarni barcha tillar uchun parallel yangilaydi (yangi bo'lganlari o'tkaziladi)."""
+        self._load()
+        now = time.time()
+        targets = [
+            (page, lang)
+            for page in self.pages
+            for lang in LANGUAGES
+            if force
+            or f"{page}:{lang}" not in self._entries
+            or now - self._entries[f"{page}:{lang}"]["fetched_at"] >= self.ttl
+        ]
+        if not targets:
+            return 0
+
+        results = await asyncio.gather(
+            *(self._flights.do(f"{page}:{lang}", lambda p=page, l=lang: self._refresh(p, l)) for page, lang in targets),
+            return_exceptions=True,
+        )
+        refreshed = sum(1 for result in results if isinstance(result, dict))
+        logger.info(f"ukiu.uz sahifalari yangilandi: {refreshed}/{len(targets)}")
+        return refreshed
+
+    def start_prefetch(self) -> None:
+        """Startupda: prefetch fonda, bot ishga tushishini kutdirmasdan."""
+        task = asyncio.create_task(self.prefetch())
+        self._tasks.add(task)
+        task.add_done_callback(self._background_done)
+
+    # ------------------------------------------------------------------
+    # Disk
+    # ------------------------------------------------------------------
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.cache_file is None or not self.cache_file.is_file():
+            return
+        try:
+            self._entries.update(json.loads(self.cache_file.read_text(encoding="utf-8")))
+            logger.info(f"ukiu.uz keshi yuklandi: {len(self._entries)} ta sahifa")
+        except Exception as e:
+            logger.warning(f"ukiu.uz keshini o'qib bo'lmadi ({self.cache_file}): {e}")
+
+    def _schedule_save(self) -> None:
+        if self.cache_file is None:
+            return
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._delayed_save())
+
+    async def _delayed_save(self) -> None:
+        await asyncio.sleep(SAVE_DELAY)
+        await asyncio.to_thread(self._save)
+
+    def _save(self) -> None:
+        """Atomar yozish: vaqtinchalik fayl + ``os.replace``."""
+        with self._save_lock:
+            try:
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.cache_file.with_suffix(".tmp")
+                tmp.write_text(json.dumps(self._entries, ensure_ascii=False), encoding="utf-8")
+                os.replace(tmp, self.cache_file)
+            except Exception as e:
+                logger.error(f"ukiu.uz keshini yozib bo'lmadi: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": "ukiu_scraper",
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "fetches": self.fetches,
+            "not_modified": self.not_modified,
+            "errors": self.errors,
+            "backoffs": self.backoffs,
+        }
+
+    # ------------------------------------------------------------------
+    # Parserlar
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _parse_main_text(soup: BeautifulSoup) -> str:
         # Try to find main content
         content = soup.find('main') or soup.find('article') or soup.find('div', class_='content')
-        
+
         if content:
             # Get text content, remove scripts and styles
             for script in content(['script', 'style']):
                 script.decompose()
-            
+
             text = content.get_text(separator='\n', strip=True)
             # Limit length
             return text[:3000] if len(text) > 3000 else text
-        
-        return ""
-    
-    async def get_university_info(self, lang: str = "uz") -> str:
-        """Get university information"""
-        url = f"{self.BASE_URL}/{lang}/about"
-        html = await self._fetch_page(url, lang)
-        
-        if not html:
-            # Try home page
-            url = f"{self.BASE_URL}/{lang}/"
-            html = await self._fetch_page(url, lang)
-        
-        if not html:
-            return ""
-        
-        soup = self._parse_html(html)
-        
-        # Try to find main content
-        content = soup.find('main') or soup.find('article') or soup.find('div', class_='content')
-        
-        if content:
-            for script in content(['script', 'style']):
-                script.decompose()
-            
-            text = content.get_text(separator='\n', strip=True)
-            return text[:3000] if len(text) > 3000 else text
-        
+
         return ""
-    
-    async def get_address(self, lang: str = "uz") -> str:
-        """Get university address"""
-        url = f"{self.BASE_URL}/{lang}/contact"
-        html = await self._fetch_page(url, lang)
-        
-        if not html:
-            return "Toshkent shahri" if lang == "uz" else ("Tashkent city" if lang == "en" else "Город Ташкент")
-        
-        soup = self._parse_html(html)
-        
+
+    @staticmethod
+    def _default_address(lang: str) -> str:
+        return "Toshkent shahri" if lang == "uz" else ("Tashkent city" if lang == "en" else "Город Ташкент")
+
+    def _parse_address(self, soup: BeautifulSoup) -> Optional[str]:
         # Look for address in common locations
         address_selectors = [
             'address',
@@ -108,65 +327,57 @@ class UKIUScraper:
             '[class*="address"]',
             '[class*="contact"]',
         ]
-        
+
         for selector in address_selectors:
             element = soup.select_one(selector)
             if element:
                 return element.get_text(strip=True)
-        
-        return "Toshkent shahri" if lang == "uz" else ("Tashkent city" if lang == "en" else "Город Ташкент")
-    
-    async def get_faculties(self, lang: str = "uz") -> List[Dict[str, str]]:
-        """Get list of faculties"""
-        url = f"{self.BASE_URL}/{lang}/faculties"
-        html = await self._fetch_page(url, lang)
-        
-        if not html:
-            return []
-        
-        soup = self._parse_html(html)
-        
-        faculties = []
-        # Try to find faculty cards or links
-        faculty_elements = soup.find_all(['a', 'div'], class_=lambda x: x and 'faculty' in x.lower() if x else False)
-        
-        for elem in faculty_elements[:10]:  # Limit to 10
+
+        return None
+
+    def _parse_links(self, soup: BeautifulSoup, markers: Tuple[str, ...]) -> List[Dict[str, str]]:
+        items = []
+        # Try to find cards or links whose class mentions one of the markers
+        elements = soup.find_all(
+            ['a', 'div'],
+            class_=lambda x: x and any(marker in x.lower() for marker in markers) if x else False,
+        )
+
+        for elem in elements[:10]:  # Limit to 10
             name = elem.get_text(strip=True)
             link = elem.get('href', '')
             if name:
-                faculties.append({
+                items.append({
                     'name': name,
                     'link': link if link.startswith('http') else f"{self.BASE_URL}{link}"
                 })
-        
-        return faculties
-    
+
+        return items
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def get_admission_info(self, lang: str = "uz") -> str:
+        """Get admission information"""
+        return await self._get("admission", lang)
+
+    async def get_university_info(self, lang: str = "uz") -> str:
+        """Get university information"""
+        return await self._get("university_info", lang)
+
+    async def get_address(self, lang: str = "uz") -> str:
+        """Get university address"""
+        return await self._get("address", lang) or self._default_address(lang)
+
+    async def get_faculties(self, lang: str = "uz") -> List[Dict[str, str]]:
+        """Get list of faculties"""
+        return await self._get("faculties", lang)
+
     async def get_directions(self, lang: str = "uz") -> List[Dict[str, str]]:
         """Get list of directions/specialties"""
-        url = f"{self.BASE_URL}/{lang}/directions"
-        html = await self._fetch_page(url, lang)
-        
-        if not html:
-            return []
-        
-        soup = self._parse_html(html)
-        
-        directions = []
-        # Try to find direction cards or links
-        direction_elements = soup.find_all(['a', 'div'], class_=lambda x: x and ('direction' in x.lower() or 'specialty' in x.lower()) if x else False)
-        
-        for elem in direction_elements[:10]:  # Limit to 10
-            name = elem.get_text(strip=True)
-            link = elem.get('href', '')
-            if name:
-                directions.append({
-                    'name': name,
-                    'link': link if link.startswith('http') else f"{self.BASE_URL}{link}"
-                })
-        
-        return directions
+        return await self._get("directions", lang)
 
 
 # Global scraper instance
 scraper = UKIUScraper()
-
@@ -0,0 +1,193 @@
+"""Webhook rejimi: aiohttp server (``BOT_MODE=webhook``)
+
+- ``POST WEBHOOK_PATH`` — Telegram update'lari. ``X-Telegram-Bot-Api-Secret-Token``
+  tekshiriladi, ``update_id`` bo'yicha takrorlar tashlanadi, javob darhol
+  qaytadi va update fon task'ida qayta ishlanadi.
+- ``GET /health`` — holat (load balancer / Render health check uchun).
+- ``GET /metrics`` — Prometheus matn formatidagi hisoblagichlar.
+"""
+
+import asyncio
+import hmac
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Set
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiogram.webhook.aiohttp_server import setup_application
+from aiohttp import web
+
+from data.config import WEB_HOST, WEB_PORT, WEBHOOK_PATH, WEBHOOK_SECRET
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+# Telegram qayta yuborgan update'larni tanish uchun eslab qolinadigan id lar soni
+DEDUPE_SIZE = 10_000
+# Shutdown da tugallanmagan update'larni kutish (soniya)
+SHUTDOWN_TIMEOUT = 20
+
+
+class WebhookHandler:
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, secret: str = WEBHOOK_SECRET, dedupe_size: int = DEDUPE_SIZE):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.secret = secret
+        self.dedupe_size = dedupe_size
+
+        self._seen: "OrderedDict[int, None]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+        self.started = time.monotonic()
+
+        self.updates: Dict[str, int] = {"accepted": 0, "duplicate": 0, "unauthorized": 0, "invalid": 0}
+        self.processed = 0
+        self.failed = 0
+        self.processing_seconds = 0.0
+        self.processing_max = 0.0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self.secret and not hmac.compare_digest(request.headers.get(SECRET_HEADER, ""), self.secret):
+            self.updates["unauthorized"] += 1
+            return web.Response(status=401)
+
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except Exception as e:
+            self.updates["invalid"] += 1
+            logger.warning(f"Noto'g'ri webhook so'rovi: {e}")
+            return web.Response(status=400)
+
+        if self._is_duplicate(update.update_id):
+            self.updates["duplicate"] += 1
+            return web.Response()
+
+        self.updates["accepted"] += 1
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response()
+
+    def _is_duplicate(self, update_id: int) -> bool:
+        if update_id in self._seen:
+            return True
+        self._seen[update_id] = None
+        if len(self._seen) > self.dedupe_size:
+            self._seen.popitem(last=False)
+        return False
+
+    async def _process(self, update: Update) -> None:
+        started = time.monotonic()
+        try:
+            await self.dispatcher.feed_update(self.bot, update)
+            self.processed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.exception(f"Update {update.update_id} xatoligi: {e}")
+        finally:
+            elapsed = time.monotonic() - started
+            self.processing_seconds += elapsed
+            self.processing_max = max(self.processing_max, elapsed)
+
+    async def drain(self, timeout: float = SHUTDOWN_TIMEOUT) -> None:
+        """Qayta ishlanayotgan update'lar tugashini kutadi."""
+        if self._tasks:
+            logger.info(f"{len(self._tasks)} ta update tugashini kutamiz")
+            await asyncio.wait(list(self._tasks), timeout=timeout)
+
+    async def health(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "status": "ok",
+                "mode": "webhook",
+                "uptime": round(time.monotonic() - self.started),
+                "in_flight": len(self._tasks),
+            }
+        )
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        lines = [
+            "# TYPE kiuf_webhook_updates_total counter",
+            *(f'kiuf_webhook_updates_total{{result="{name}"}} {value}' for name, value in self.updates.items()),
+            "# TYPE kiuf_webhook_processed_total counter",
+            f"kiuf_webhook_processed_total {self.processed}",
+            "# TYPE kiuf_webhook_failed_total counter",
+            f"kiuf_webhook_failed_total {self.failed}",
+            "# TYPE kiuf_webhook_in_flight gauge",
+            f"kiuf_webhook_in_flight {len(self._tasks)}",
+            "# TYPE kiuf_webhook_processing_seconds summary",
+            f"kiuf_webhook_processing_seconds_sum {self.processing_seconds:.6f}",
+            f"kiuf_webhook_processing_seconds_count {self.processed + self.failed}",
+            "# TYPE kiuf_webhook_processing_seconds_max gauge",
+            f"kiuf_webhook_processing_seconds_max {self.processing_max:.6f}",
+            "# TYPE kiuf_uptime_seconds gauge",
+            f"kiuf_uptime_seconds {time.monotonic() - self.started:.0f}",
+        ]
+        for source in _stats_sources():
+            try:
+                lines.extend(_stats_lines(source()))
+            except Exception as e:
+                logger.debug(f"Metrika manbasi xatoligi: {e}")
+        return web.Response(text="\n".join(lines) + "\n", content_type="text/plain")
+
+
+def _stats_sources() -> List[Callable[[], Dict[str, Any]]]:
+    """Ichki komponentlarning ``stats()`` funksiyalari (rate limiter, singleflight, yozuvlar navbati, kesh)."""
+    from keyboards.inline.menu import keyboard_cache_stats
+    from loader import outgoing_limiter, throttling
+    from services.hemis_service import hemis_limiter
+    from services.schedule_service import schedule_flights
+    from services.user_cache import user_cache
+    from utils.db.write_queue import write_queue
+    from utils.ukiu_scraper import scraper
+
+    return [
+        outgoing_limiter.stats,
+        hemis_limiter.stats,
+        schedule_flights.stats,
+        write_queue.stats,
+        user_cache.stats,
+        throttling.stats,
+        keyboard_cache_stats,
+        scraper.stats,
+    ]
+
+
+def _stats_lines(stats: Dict[str, Any]) -> List[str]:
+    """``{"name": "hemis", "queue_depth": 3, "queue_by_priority": {...}}`` → Prometheus gauge'lar."""
+    component = str(stats.get("name", "component"))
+    lines = []
+    for key, value in stats.items():
+        metric = f"kiuf_{component}_{key}"
+        if isinstance(value, bool):
+            lines.append(f"{metric} {int(value)}")
+        elif isinstance(value, (int, float)):
+            lines.append(f"{metric} {value}")
+        elif isinstance(value, dict):
+            for label, sub in value.items():
+                if isinstance(sub, (int, float)):
+                    lines.append(f'{metric}{{key="{label}"}} {sub}')
+    return lines
+
+
+def create_webhook_app(dispatcher: Dispatcher, bot: Bot) -> web.Application:
+    handler = WebhookHandler(dispatcher, bot)
+    app = web.Application()
+    app["webhook_handler"] = handler
+    app.router.add_post(WEBHOOK_PATH, handler.handle)
+    app.router.add_get("/health", handler.health)
+    app.router.add_get("/metrics", handler.metrics)
+
+    async def drain(_: web.Application) -> None:
+        await handler.drain()
+
+    # Avval update'lar tugaydi, keyin dispatcher shutdown (DB yopiladi)
+    app.on_shutdown.append(drain)
+    setup_application(app, dispatcher, bot=bot)
+    return app
+
+
+def run_webhook(dispatcher: Dispatcher, bot: Bot) -> None:
+    app = create_webhook_app(dispatcher, bot)
+    web.run_app(app, host=WEB_HOST, port=WEB_PORT, print=None)